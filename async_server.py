@@ -0,0 +1,230 @@
+# Import required module/s
+import asyncio
+import time
+
+from framing import readFrame, FrameError, INPUT_FRAME, PATH_FRAME, MAX_INPUT_SIZE
+
+
+class AsyncBookingServer:
+	"""Serves any number of Clients at once on one asyncio event loop, every booking session being a coroutine.
+
+	Connections are accepted continuously and every coroutine feeds the input frames of its Client to its own
+	session state machine, which reads the shared availability data through the SnapshotHolder, which the
+	background refresher swaps without ever blocking the loop. Ending a session, or a Client going away, only
+	closes that session's connection. asyncio already sets TCP_NODELAY on every connection, so the one write
+	of each step leaves at once.
+
+	Parameters
+	----------
+	snapshots : availability_refresh.SnapshotHolder
+		Holder of the availability data shared by all the sessions
+	dialogue : callable
+		Called with `snapshots` for every new Client, returning its session: an object whose `start` returns
+		the first frames to send, whose `step` returns the frames to send for an input and whose
+		`closed` attribute turns True once the session is over, and whose `path` returns the frames to send
+		for a whole selection path sent in one PATH_FRAME, e.g. w6_activity2_server.BookingSession.
+		If the session has a `commit` Future, the frames of a step are sent only once it is done, or if it fails
+		with an OSError, the frames returned by its `commitFailed` are sent instead. If it has a
+		`watch` Future, the frames returned by its `notified` are sent as soon as it is done, unless an input
+		comes first. Its `close`, if any, is called once the connection is gone
+	host : str
+		IP address to listen on
+	port : int
+		Port address to listen on
+	goodbye : bytes
+		Frame sent to a Client when its session is over, in the same write as the last frames of the session
+	backlog : int
+		Maximum number of connections waiting to be accepted
+	max_input_size : int
+		Largest input frame accepted from a Client, a bigger one closing its connection
+	reuse_port : bool
+		If True, listen with SO_REUSEPORT, so that several processes can accept on the same port
+	idle_timeout : float
+		Seconds every round trip, from sending the frames of a step to receiving the whole next input, may
+		take before the connection is reaped, so a Client that stops sending or reading in the middle of a
+		frame is cut off too; None for no limit. A session waiting for new slots is never reaped
+	max_sessions : int
+		Number of sessions open at once past which new connections are shed, 0 for no limit
+	busy : bytes
+		Frame sent to a connection shed because the server is full, e.g. asking to retry later
+	reaped : bytes
+		Frame sent, if it can still be, to a connection reaped after `idle_timeout`
+	metrics : server_metrics.ServerMetrics
+		Metrics the time taken by every step and every write, by the `level` of the session if it has one, and the
+		duration of every session are recorded in, and the counts of sessions registered in, or None
+
+	Attributes
+	----------
+	active_sessions : int
+		Number of sessions currently open
+	total_sessions : int
+		Number of sessions opened since the server started
+	shed_sessions : int
+		Number of connections turned away because `max_sessions` were open
+	reaped_sessions : int
+		Number of sessions closed because a round trip took longer than `idle_timeout`
+	"""
+
+	def __init__(self, snapshots, dialogue, host, port, goodbye=b'', backlog=4096, max_input_size=MAX_INPUT_SIZE, reuse_port=False,
+			idle_timeout=None, max_sessions=0, busy=b'', reaped=b'', metrics=None):
+		self.snapshots = snapshots
+		self.dialogue = dialogue
+		self.host = host
+		self.port = port
+		self.goodbye = goodbye
+		self.backlog = backlog
+		self.max_input_size = max_input_size
+		self.reuse_port = reuse_port
+		self.idle_timeout = idle_timeout
+		self.max_sessions = max_sessions
+		self.busy = busy
+		self.reaped = reaped
+		self.active_sessions = 0
+		self.total_sessions = 0
+		self.shed_sessions = 0
+		self.reaped_sessions = 0
+		self.server = None
+		self.metrics = metrics
+		if metrics is not None:
+			metrics.gauge('sessions_open', "Sessions currently open", lambda: self.active_sessions)
+			metrics.counter('sessions_total', "Sessions opened since the server started", lambda: self.total_sessions)
+			metrics.counter('sessions_shed_total', "Connections turned away because the server was full", lambda: self.shed_sessions)
+			metrics.counter('sessions_reaped_total', "Sessions closed after a round trip took too long", lambda: self.reaped_sessions)
+
+	async def serveSession(self, reader, writer):
+		"""Run the dialogue of one Client until it is over or the Client disconnects.
+
+		Parameters
+		----------
+		reader : asyncio.StreamReader
+			Stream of the inputs of the Client
+		writer : asyncio.StreamWriter
+			Stream of the messages to the Client
+		"""
+
+		if self.max_sessions and self.active_sessions >= self.max_sessions:
+			# Turned away at once, without starting a session or waiting for the Client to read the answer
+			self.shed_sessions += 1
+			writer.write(self.busy)
+			writer.close()
+			return
+
+		self.active_sessions += 1
+		self.total_sessions += 1
+		metrics = self.metrics
+		started = time.perf_counter()
+		session = self.dialogue(self.snapshots)
+		read = None
+		deadline = None
+		loop = asyncio.get_running_loop()
+		try:
+			messages = session.start()
+			while True:
+				watch = getattr(session, 'watch', None)
+				if self.idle_timeout and watch is None and not session.closed:
+					deadline = loop.call_later(self.idle_timeout, self.reap, writer)
+				if session.closed:
+					messages.append(self.goodbye)
+				# All the frames of a step go out in one write
+				start = time.perf_counter()
+				writer.write(b''.join(messages))
+				await writer.drain()
+				if metrics is not None:
+					metrics.send.observe(time.perf_counter() - start, getattr(session, 'level', None))
+				if session.closed:
+					break
+				if watch is not None:
+					# A session waiting for new slots is woken up by them or by an input of the Client, whichever comes first
+					if read is None:
+						read = asyncio.ensure_future(readFrame(reader, self.max_input_size))
+					await asyncio.wait((read, asyncio.wrap_future(watch)), return_when=asyncio.FIRST_COMPLETED)
+					if not read.done():
+						messages = session.notified()
+						continue
+				if read is not None:
+					frame, read = await read, None
+				else:
+					frame = await readFrame(reader, self.max_input_size)
+				if deadline is not None:
+					deadline.cancel()
+					deadline = None
+				if frame is None or frame[0] not in (INPUT_FRAME, PATH_FRAME):
+					break
+				start = time.perf_counter()
+				if frame[0] == PATH_FRAME:
+					level = 'path'
+					messages = session.path(frame[1].decode('utf-8', errors='replace'))
+				else:
+					level = getattr(session, 'level', None)
+					messages = session.step(frame[1].decode('utf-8', errors='replace'))
+				if metrics is not None:
+					metrics.step.observe(time.perf_counter() - start, level)
+				if getattr(session, 'commit', None) is not None:
+					# The other sessions keep being served while the booking is made durable
+					try:
+						await asyncio.wrap_future(session.commit)
+					except OSError as error:
+						messages = session.commitFailed(error)
+		except (ConnectionError, FrameError):
+			pass
+		finally:
+			self.active_sessions -= 1
+			if deadline is not None:
+				deadline.cancel()
+			if read is not None:
+				read.cancel()
+			if hasattr(session, 'close'):
+				session.close()
+			if metrics is not None:
+				metrics.session.observe(time.perf_counter() - started)
+			writer.close()
+			try:
+				await writer.wait_closed()
+			except ConnectionError:
+				pass
+
+	def reap(self, writer):
+		"""Close the connection of a session whose round trip is over `idle_timeout`, which ends its coroutine."""
+
+		self.reaped_sessions += 1
+		transport = writer.transport
+		if transport.get_write_buffer_size() == 0:
+			transport.write(self.reaped)
+			transport.close()
+		else:
+			# The Client does not read what is sent, so nothing more can be
+			transport.abort()
+
+	def describe(self):
+		"""Summary of the connections served, for the logs."""
+
+		shed = "%d shed over %d at once" % (self.shed_sessions, self.max_sessions) if self.max_sessions else "no limit of sessions"
+		reaped = "%d reaped after %g s" % (self.reaped_sessions, self.idle_timeout) if self.idle_timeout else "no idle timeout"
+		return "%d sessions served, %d open, %s, %s" % (self.total_sessions, self.active_sessions, shed, reaped)
+
+	async def start(self):
+		"""Start listening and accepting connections on the running event loop.
+
+		Returns
+		-------
+		asyncio.Server
+			Listening server, also kept as the `server` attribute
+		"""
+
+		self.server = await asyncio.start_server(self.serveSession, self.host, self.port, backlog=self.backlog,
+			reuse_address=True, reuse_port=self.reuse_port or None)
+		return self.server
+
+	async def serveForever(self):
+		await self.start()
+		async with self.server:
+			await self.server.serve_forever()
+
+	def run(self):
+		"""Serve Clients on a new event loop until the process is interrupted."""
+
+		try:
+			asyncio.run(self.serveForever())
+		except KeyboardInterrupt:
+			pass
+		print("Server stopped: " + self.describe())
@@ -0,0 +1,152 @@
+# Import required module/s
+import threading
+import time
+
+
+class SnapshotHolder:
+	"""Holds the AvailabilityTable currently served, swapped atomically when fresh data is loaded.
+
+	Readers call `current` once per dialogue step and use the returned table for the whole step, so a
+	step always sees one consistent version even if a swap happens meanwhile.
+
+	Parameters
+	----------
+	table : availability_store.AvailabilityTable
+		Table served first, tagged as version 1
+
+	Attributes
+	----------
+	listeners : list
+		Callables notified with (previous table, new table) after every swap, in the thread of the swap, e.g.
+		the refresher or the event loop of a pre-fork worker re-loading the snapshot file
+	"""
+
+	def __init__(self, table):
+		self._lock = threading.Lock()
+		table.version = 1
+		self._table = table
+		self.listeners = []
+
+	def current(self):
+		"""Return the table currently served.
+
+		Returns
+		-------
+		availability_store.AvailabilityTable
+			Latest table, with its `version` attribute set
+		"""
+
+		return self._table
+
+	@property
+	def version(self):
+		return self._table.version
+
+	def swap(self, table):
+		"""Publish a fully built table, replacing the one currently served.
+
+		Parameters
+		----------
+		table : availability_store.AvailabilityTable
+			New table, tagged with the next version
+
+		Returns
+		-------
+		int
+			Version of the new table
+		"""
+
+		with self._lock:
+			previous = self._table
+			table.version = previous.version + 1
+			self._table = table
+		for listener in self.listeners:
+			listener(previous, table)
+		return table.version
+
+############################################################################################################################
+
+class AvailabilityRefresher(threading.Thread):
+	"""Background thread re-loading the availability data on an interval and swapping it into a SnapshotHolder.
+
+	The new table is parsed and indexed entirely on this thread; the serving threads only ever see the
+	single reference swap, so a refresh never blocks a client's recv or send.
+
+	Parameters
+	----------
+	snapshots : SnapshotHolder
+		Holder of the table currently served
+	load : callable
+		Called with the table currently served and returning the new table, or the same table if the
+		data has not changed
+	interval : float
+		Seconds between the end of one refresh and the start of the next
+	refresh_on_start : bool
+		If True, refresh once as soon as the thread starts, e.g. when serving a snapshot saved earlier
+
+	Attributes
+	----------
+	refresh_count : int
+		Number of refreshes attempted
+	last_duration : float
+		Seconds taken by the last refresh, or None before the first one
+	last_error : Exception
+		Error raised by the last refresh, or None if it succeeded
+	listeners : list
+		Callables notified with (previous table, new table) after every swap; the row-level
+		difference is the `changes` attribute of the new table, None after a full rebuild
+	"""
+
+	def __init__(self, snapshots, load, interval, refresh_on_start=False):
+		super().__init__(name='availability-refresher', daemon=True)
+		self.snapshots = snapshots
+		self.load = load
+		self.interval = interval
+		self.refresh_on_start = refresh_on_start
+		self.refresh_count = 0
+		self.last_duration = None
+		self.last_error = None
+		self.listeners = []
+		self._stop_event = threading.Event()
+
+	def refresh(self):
+		"""Load the data once and swap it in if it changed.
+
+		Returns
+		-------
+		bool
+			True if a new version was swapped in
+		"""
+
+		start = time.perf_counter()
+		previous = self.snapshots.current()
+		self.refresh_count += 1
+		try:
+			table = self.load(previous)
+		except Exception as error:
+			self.last_error = error
+			self.last_duration = time.perf_counter() - start
+			print("Refreshing the availability data failed, still serving version %d: %r" % (previous.version, error))
+			return False
+
+		self.last_error = None
+		swapped = table is not previous
+		if swapped:
+			self.snapshots.swap(table)
+		self.last_duration = time.perf_counter() - start
+		if swapped:
+			print("Availability data refreshed to version %d in %.2f ms, changes: %r" % (table.version, self.last_duration * 1000, table.changes))
+			for listener in self.listeners:
+				listener(previous, table)
+		return swapped
+
+	def run(self):
+		if self.refresh_on_start:
+			self.refresh()
+		while not self._stop_event.wait(self.interval):
+			self.refresh()
+
+	def stop(self):
+		"""Stop refreshing after the refresh in progress, if any."""
+
+		self._stop_event.set()
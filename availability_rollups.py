@@ -0,0 +1,305 @@
+# Import required module/s
+import bisect
+import time
+from itertools import chain
+
+import numpy as np
+
+from availability_store import menuPath
+
+
+# Levels of the menu tree a rollup is kept for, from the Dose down to the Vaccination Center
+ROLLUP_LEVELS = ('dose', 'age_group', 'state', 'district', 'hospital')
+
+# Share of the nodes past which the changed hospitals of an update are rolled up from scratch, which is then cheaper
+FULL_REBUILD_FRACTION = 0.25
+
+
+class AvailabilityRollups:
+	"""Aggregates of the slots published under every node of the menu tree of an AvailabilityTable.
+
+	For every dose, age group, state, district and hospital node the rollups keep the total slots on every
+	date, the first date with slots and the number of hospitals with slots on every date. They are computed
+	once for a version of the data, with one pass over the slot matrix for the hospitals and one vectorized
+	sum per level above them, so that "earliest date in my district" or "districts with slots tomorrow" are
+	a dictionary lookup instead of a walk down the tree. After an incremental update of the table, `updated`
+	derives its rollups from these ones, going over the hospitals of the changed rows only.
+
+	The rollups count the slots as published in the data; the reservations taken since are not subtracted.
+
+	Parameters
+	----------
+	table : availability_store.AvailabilityTable
+		Table whose `index` is rolled up
+
+	Attributes
+	----------
+	dates : list
+		Labels of the dates, as in the table
+	positions : dict
+		Position of every node in the rollup matrices, with Key as its path (dose, age group, state, district, hospital)
+		and Value as its row in the matrices
+	totals : numpy.ndarray
+		Slots published under every node, one row per node and one column per date
+	hospitals : numpy.ndarray
+		Number of hospitals with slots under every node, one row per node and one column per date
+	open_hospitals : numpy.ndarray
+		Number of hospitals with slots on any date under every node
+	first_dates : numpy.ndarray
+		Position in `dates` of the first date with slots under every node, -1 if there is none
+	build_seconds : float
+		Time taken to compute the rollups
+	"""
+
+	def __init__(self, table):
+		start = time.perf_counter()
+		self.dates = list(table.dates)
+		self.positions = {}
+		self._children = {}
+
+		# Nodes are numbered level by level, so the nodes of a level are a contiguous range of positions
+		parents = []
+		bounds = [0]
+		level = [((), table.index.root, -1)]
+		for depth in range(len(ROLLUP_LEVELS)):
+			next_level = []
+			for path, node, parent in level:
+				children = self._children[path] = []
+				for option in sorted(node.children):
+					child_path = path + (option,)
+					position = self.positions[child_path] = len(parents)
+					parents.append(parent)
+					children.append((option, position))
+					next_level.append((child_path, node.children[option], position))
+			bounds.append(len(parents))
+			level = next_level
+		parents = np.array(parents, dtype=np.intp)
+		first_hospital = bounds[-2]
+		hospital_rows = np.fromiter(chain.from_iterable(node.rows for _, node, _ in level), dtype=np.intp)
+		hospital_nodes = np.repeat(np.arange(first_hospital, len(parents)), [len(node.rows) for _, node, _ in level])
+
+		# Slots of every hospital node, summed over its rows by date
+		self.totals = np.zeros((len(parents), len(self.dates)), dtype=np.int64)
+		slots = table.slots[hospital_rows]
+		for date in range(len(self.dates)):
+			self.totals[:, date] = np.bincount(hospital_nodes, weights=slots[:, date], minlength=len(parents))
+
+		self.hospitals = np.zeros_like(self.totals)
+		self.hospitals[first_hospital:] = self.totals[first_hospital:] > 0
+		self.open_hospitals = np.zeros(len(parents), dtype=np.int64)
+		self.open_hospitals[first_hospital:] = self.totals[first_hospital:].any(axis=1)
+
+		# Every level above the hospitals is the sum of its children
+		for depth in range(len(ROLLUP_LEVELS) - 1, 0, -1):
+			children = np.arange(bounds[depth], bounds[depth + 1])
+			np.add.at(self.totals, parents[children], self.totals[children])
+			np.add.at(self.hospitals, parents[children], self.hospitals[children])
+			np.add.at(self.open_hospitals, parents[children], self.open_hospitals[children])
+
+		available = self.totals > 0
+		self.first_dates = np.where(available.any(axis=1), available.argmax(axis=1), -1)
+		self.build_seconds = time.perf_counter() - start
+
+	def updated(self, table, changes):
+		"""Derive the rollups of an incrementally updated table, summing again only the hospitals of the changed rows.
+
+		The slots of every hospital with an added, removed or updated row are summed from the table and their
+		difference with its previous totals is added to every node above it. Nodes that appear take new
+		positions past the end of the matrices and nodes that disappear are dropped from `positions`. The
+		matrices are copied first, so these rollups stay valid for the previous table. If too many hospitals
+		changed, or too many positions are left unused, the rollups are computed from scratch instead.
+
+		Parameters
+		----------
+		table : availability_store.AvailabilityTable
+			Table derived by `updateAvailabilityTable` from the table of these rollups, with the same dates
+		changes : availability_store.ChangeSet
+			Rows added, removed and updated between the two tables
+
+		Returns
+		-------
+		AvailabilityRollups
+			Rollups of `table`, equal to those computed from scratch
+		"""
+
+		start = time.perf_counter()
+		paths = {menuPath(key) for key in chain(changes.added, changes.removed, changes.updated)}
+		if len(paths) > FULL_REBUILD_FRACTION * len(self.positions) or len(self.totals) > 2 * len(self.positions) + 1:
+			return AvailabilityRollups(table)
+
+		rollups = AvailabilityRollups.__new__(AvailabilityRollups)
+		rollups.dates = self.dates
+		positions = rollups.positions = dict(self.positions)
+		children = rollups._children = dict(self._children)
+		# Lists of children are shared with these rollups until they are copied to be changed
+		owned = set()
+
+		def ownChildren(path):
+			if path not in owned:
+				children[path] = list(children[path])
+				owned.add(path)
+			return children[path]
+
+		size = len(self.totals)
+		present = []
+		gone = []
+		for path in paths:
+			node = table.index.root
+			for depth in range(1, len(path) + 1):
+				prefix = path[:depth]
+				node = node.children.get(prefix[-1]) if node is not None else None
+				if node is not None and prefix not in positions:
+					positions[prefix] = size
+					size += 1
+					bisect.insort(ownChildren(prefix[:-1]), (prefix[-1], positions[prefix]))
+					if depth < len(ROLLUP_LEVELS):
+						children[prefix] = []
+						owned.add(prefix)
+				elif node is None and prefix in positions:
+					position = positions.pop(prefix)
+					# The parent is dropped too if it is gone, with its children
+					if prefix[:-1] in children:
+						ownChildren(prefix[:-1]).remove((prefix[-1], position))
+					children.pop(prefix, None)
+			if node is not None:
+				present.append((path, node))
+			else:
+				gone.append(path)
+
+		# One more row past the nodes takes the differences of the nodes that are gone
+		sink = size
+		rollups.totals = np.zeros((size + 1, len(self.dates)), dtype=np.int64)
+		rollups.totals[:len(self.totals)] = self.totals
+		rollups.hospitals = np.zeros_like(rollups.totals)
+		rollups.hospitals[:len(self.hospitals)] = self.hospitals
+		rollups.open_hospitals = np.zeros(size + 1, dtype=np.int64)
+		rollups.open_hospitals[:len(self.open_hospitals)] = self.open_hospitals
+		rollups.first_dates = np.full(size + 1, -1, dtype=self.first_dates.dtype)
+		rollups.first_dates[:len(self.first_dates)] = self.first_dates
+
+		# Slots of the changed hospitals still in the table, summed over their rows by date, and of those gone
+		changed = [path for path, _ in present] + gone
+		new = np.zeros((len(changed), len(self.dates)), dtype=np.int64)
+		hospital_rows = np.fromiter(chain.from_iterable(node.rows for _, node in present), dtype=np.intp)
+		owners = np.repeat(np.arange(len(present)), [len(node.rows) for _, node in present])
+		slots = table.slots[hospital_rows]
+		for date in range(len(self.dates)):
+			new[:len(present), date] = np.bincount(owners, weights=slots[:, date], minlength=len(present))
+		old = np.zeros_like(new)
+		previous_positions = np.array([self.positions.get(path, -1) for path in changed], dtype=np.intp)
+		known = previous_positions >= 0
+		old[known] = self.totals[previous_positions[known]]
+
+		hospital_positions = np.array([positions[path] for path, _ in present], dtype=np.intp)
+		rollups.totals[hospital_positions] = new[:len(present)]
+		rollups.hospitals[hospital_positions] = new[:len(present)] > 0
+		rollups.open_hospitals[hospital_positions] = new[:len(present)].any(axis=1)
+
+		# Every node above a changed hospital takes the difference it makes
+		difference = new - old
+		hospitals_difference = (new > 0).astype(np.int64) - (old > 0)
+		open_difference = new.any(axis=1).astype(np.int64) - old.any(axis=1)
+		touched = [hospital_positions]
+		for depth in range(1, len(ROLLUP_LEVELS)):
+			ancestors = np.array([positions.get(path[:depth], sink) for path in changed], dtype=np.intp)
+			np.add.at(rollups.totals, ancestors, difference)
+			np.add.at(rollups.hospitals, ancestors, hospitals_difference)
+			np.add.at(rollups.open_hospitals, ancestors, open_difference)
+			touched.append(ancestors)
+
+		touched = np.unique(np.concatenate(touched))
+		available = rollups.totals[touched] > 0
+		rollups.first_dates[touched] = np.where(available.any(axis=1), available.argmax(axis=1), -1)
+		rollups.build_seconds = time.perf_counter() - start
+		return rollups
+
+	def rollup(self, *path):
+		"""Aggregates of the node reached by a path.
+
+		Parameters
+		----------
+		*path : str
+			Selected dose, age group, state, district and hospital name, in that order, stopping at any level below the dose
+
+		Returns
+		-------
+		dict
+			'slots' with the slots published on every date, 'first_date' with the first date with slots or None,
+			'hospitals' with the number of hospitals with slots on every date and 'open_hospitals' with the number
+			of hospitals with slots on any date, or None if the path is not in the data
+		"""
+
+		position = self.positions.get(path)
+		if position is None:
+			return None
+		return {
+			'slots': dict(zip(self.dates, self.totals[position].tolist())),
+			'first_date': self.firstDate(*path),
+			'hospitals': dict(zip(self.dates, self.hospitals[position].tolist())),
+			'open_hospitals': int(self.open_hospitals[position]),
+		}
+
+	def firstDate(self, *path):
+		"""First date with slots published under the node reached by a path, or None if there is none or the path is not in the data."""
+
+		position = self.positions.get(path)
+		if position is None or self.first_dates[position] < 0:
+			return None
+		return self.dates[self.first_dates[position]]
+
+	def availableOptions(self, *path, date=None):
+		"""Options of the next level below a path with slots published, e.g. the districts of a state with slots tomorrow.
+
+		Parameters
+		----------
+		*path : str
+			Selected dose, age group, state and district, in that order, stopping at any level
+		date : str
+			Label of the date the options must have slots on, or None for any date
+
+		Returns
+		-------
+		list
+			(option, slots, hospitals) of every option with slots, in the order of the menu, with the slots and
+			the number of hospitals with slots on `date`, or on any date if it is None
+
+		Raises
+		------
+		ValueError
+			If `date` is not one of the `dates`
+		"""
+
+		column = None if date is None else self.dates.index(date)
+		options = []
+		for option, position in self._children.get(path, ()):
+			if column is None:
+				slots, hospitals = int(self.totals[position].sum()), int(self.open_hospitals[position])
+			else:
+				slots, hospitals = int(self.totals[position, column]), int(self.hospitals[position, column])
+			if slots > 0:
+				options.append((option, slots, hospitals))
+		return options
+
+	def describe(self, *path):
+		"""Short description of the slots published under a path, for the options of the menus, e.g. '320 slots from May 16'."""
+
+		position = self.positions.get(path)
+		if position is None or self.first_dates[position] < 0:
+			return "no slots"
+		return "%d slots from %s" % (self.totals[position].sum(), self.dates[self.first_dates[position]])
+
+############################################################################################################################
+
+def rollupIndex(table, previous=None):
+	"""AvailabilityRollups of a table, computed the first time they are asked for and then kept as its `rollups` attribute.
+
+	If `previous` is the table `table` was updated from by `updateAvailabilityTable`, with the same dates, and
+	its rollups are computed, the rollups of `table` are derived from them and its `changes` instead.
+	"""
+
+	if table.rollups is None:
+		if previous is not None and previous.rollups is not None and table.changes is not None and table.dates == previous.dates:
+			table.rollups = previous.rollups.updated(table, table.changes)
+		else:
+			table.rollups = AvailabilityRollups(table)
+	return table.rollups
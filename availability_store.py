@@ -0,0 +1,1018 @@
+# Import required module/s
+import codecs
+import sys
+import time
+from array import array
+from html.parser import HTMLParser
+
+import numpy as np
+
+
+# Classes of the table cells holding the fields that describe a row of the availability table. Every other
+# column of the table header holds the slots available on a date, labelled by the text of its header cell.
+ROW_COLUMNS = ('hospital_name', 'state_name', 'district_name', 'vaccine_name', 'dose_num', 'age')
+
+# Classes and labels of the slot columns assumed when a page has no table header
+DEFAULT_SLOT_COLUMNS = (
+	('may_15', 'May 15'), ('may_16', 'May 16'), ('may_17', 'May 17'), ('may_18', 'May 18'),
+	('may_19', 'May 19'), ('may_20', 'May 20'), ('may_21', 'May 21')
+)
+
+# Type of the slot counts in the slot matrix
+SLOT_DTYPE = np.int32
+
+# Columns of an AvailabilityTable describing a row, all of them dictionary-encoded
+TABLE_COLUMNS = ('hospital', 'state', 'district', 'vaccine', 'dose', 'age')
+
+
+class CategoricalColumn:
+	"""Dictionary-encoded column of strings, storing every distinct value once and every row as a 4-byte code.
+
+	States, districts, vaccines, doses and age groups repeat on thousands of rows; encoding them keeps a
+	single str object per distinct value instead of one per row, and the codes in a flat array('I') instead
+	of a list of pointers.
+
+	Parameters
+	----------
+	values : list
+		Distinct values, the position of a value being its code
+	codes : array.array
+		Code of the value of every row
+	"""
+
+	__slots__ = ('values', 'codes', '_ids')
+
+	def __init__(self, values=None, codes=None):
+		self.values = values if values is not None else []
+		self.codes = codes if codes is not None else array('I')
+		self._ids = None
+
+	def encode(self, value):
+		"""Code of a value, adding it to the distinct values if it is new."""
+
+		if self._ids is None:
+			self._ids = {known: code for code, known in enumerate(self.values)}
+		code = self._ids.get(value)
+		if code is None:
+			code = self._ids[value] = len(self.values)
+			self.values.append(value)
+		return code
+
+	def append(self, value):
+		self.codes.append(self.encode(value))
+
+	def __getitem__(self, row):
+		return self.values[self.codes[row]]
+
+	def __setitem__(self, row, value):
+		self.codes[row] = self.encode(value)
+
+	def __len__(self):
+		return len(self.codes)
+
+	def __iter__(self):
+		values = self.values
+		return (values[code] for code in self.codes)
+
+	def copy(self):
+		return CategoricalColumn(list(self.values), array('I', self.codes))
+
+	def sizeInBytes(self):
+		"""Memory held by the codes, the distinct values and the lookup of the values, in bytes."""
+
+		size = sys.getsizeof(self.codes) + sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values)
+		if self._ids is not None:
+			size += sys.getsizeof(self._ids)
+		return size
+
+############################################################################################################################
+
+class AvailabilityTable:
+	"""Normalized, column-oriented store of the rows of the Vaccination availability table.
+
+	Every field of a row is kept in its own dictionary-encoded column, so that the menu
+	builders only scan compact arrays of codes instead of parsing HTML, and the slots of all
+	the rows on all the dates are kept in one integer matrix, so that availability queries
+	run as vectorized operations. A row is identified by its key (hospital, district, state,
+	dose, age, vaccine); rows removed by an incremental update stay in the columns as
+	tombstones, with None as their hospital and no slots, until the table is compacted.
+
+	Attributes
+	----------
+	dates : list
+		Labels of the dates for which slots are available, e.g. 'May 15', as found in the table header
+	hospital, state, district, vaccine, dose, age : CategoricalColumn
+		Columns of str, one entry per row
+	slots : numpy.ndarray
+		Matrix of the slots available, with one row per row of the table and one column per date
+	positions : dict
+		Position of every live row in the columns, with Key as the key of the row
+	dead_rows : int
+		Number of tombstones left in the columns by removed rows
+	index : MenuIndex
+		Menu tree of the rows, built by `buildIndex` once all the rows are appended
+	content_hash : str
+		SHA-256 of the web-page the table was parsed from, if it was fetched through a page_cache.PageCache
+	changes : ChangeSet
+		Rows changed with respect to the previous table, if the table was built by `updateAvailabilityTable`
+	name_search : name_search.NameSearchIndex
+		Search over the names of the table, built by `name_search.searchIndex`, or None until then
+	rollups : availability_rollups.AvailabilityRollups
+		Slots published under every node of the index, computed by `availability_rollups.rollupIndex`, or None until then
+	"""
+
+	def __init__(self, dates):
+		self.dates = list(dates)
+		for column in TABLE_COLUMNS:
+			setattr(self, column, CategoricalColumn())
+		self.slots = np.zeros((0, len(self.dates)), dtype=SLOT_DTYPE)
+		self.positions = {}
+		self.dead_rows = 0
+		self.index = None
+		self.content_hash = None
+		self.changes = None
+		self.name_search = None
+		self.rollups = None
+		# Slots of the rows appended since the matrix was last built, and the codes of the categorical columns
+		self._appended_slots = []
+		self._codes = {}
+
+	def __len__(self):
+		return len(self.positions)
+
+	def appendRow(self, hospital, state, district, vaccine, dose, age, slots):
+		"""Append one normalized row to the table, or overwrite the slots of the row with the same key.
+
+		Parameters
+		----------
+		hospital, state, district, vaccine, dose, age : str
+			Fields describing the row
+		slots : list
+			Slots available on each of the `dates`, as int; missing trailing dates count as no slots
+
+		Returns
+		-------
+		int
+			Position of the row in the columns
+		"""
+
+		self._codes = {}
+		key = (hospital, district, state, dose, age, vaccine)
+		row = self.positions.get(key)
+		if row is not None:
+			if row < len(self.slots):
+				self.slots[row] = 0
+				self.slots[row, :len(slots)] = slots
+			else:
+				self._appended_slots[row - len(self.slots)] = slots
+			return row
+
+		row = len(self.hospital)
+		self.hospital.append(hospital)
+		self.state.append(state)
+		self.district.append(district)
+		self.vaccine.append(vaccine)
+		self.dose.append(dose)
+		self.age.append(age)
+		self._appended_slots.append(slots)
+		# Key the row by the shared copies of its strings, so the parsed ones can be freed
+		self.positions[(self.hospital[row], self.district[row], self.state[row], self.dose[row], self.age[row], self.vaccine[row])] = row
+		return row
+
+	def flushSlots(self):
+		"""Move the slots of the rows appended since the last call into the slot matrix."""
+
+		if not self._appended_slots and self.slots.shape[1] == len(self.dates):
+			return
+		appended = slotMatrix(self._appended_slots, len(self.dates))
+		if len(self.slots) == 0:
+			self.slots = appended
+		else:
+			self.slots = np.vstack([self.slots, appended])
+		self._appended_slots = []
+
+	def removeRow(self, key):
+		"""Remove the row with the given key, leaving a tombstone in the columns.
+
+		Parameters
+		----------
+		key : tuple
+			(hospital, district, state, dose, age, vaccine) of the row
+		"""
+
+		self.flushSlots()
+		self._codes = {}
+		row = self.positions.pop(key)
+		self.hospital[row] = None
+		self.slots[row] = 0
+		self.dead_rows += 1
+
+	def iterRows(self):
+		"""Iterate over the live rows of the table.
+
+		Yields
+		------
+		tuple
+			(hospital, state, district, vaccine, dose, age, slots) of every live row, in column order
+		"""
+
+		self.flushSlots()
+		for row in sorted(self.positions.values()):
+			yield (self.hospital[row], self.state[row], self.district[row], self.vaccine[row], self.dose[row], self.age[row], self.slots[row].tolist())
+
+	def copy(self):
+		"""Copy the columns of the table, sharing the values, so that the copy can be updated while this table is served.
+
+		Returns
+		-------
+		AvailabilityTable
+			Table with the same rows and no index
+		"""
+
+		self.flushSlots()
+		table = AvailabilityTable(self.dates)
+		for column in TABLE_COLUMNS:
+			setattr(table, column, getattr(self, column).copy())
+		table.slots = self.slots.copy()
+		table.positions = dict(self.positions)
+		table.dead_rows = self.dead_rows
+		return table
+
+	def buildIndex(self):
+		"""Build the MenuIndex over the rows of the table.
+
+		Returns
+		-------
+		MenuIndex
+			Index of the menu tree, also kept as the `index` attribute
+		"""
+
+		self.flushSlots()
+		self.index = MenuIndex(self)
+		return self.index
+
+	def categoryCodes(self, column):
+		"""Dictionary-encode a categorical column, so that it can be grouped by in vectorized operations.
+
+		Parameters
+		----------
+		column : str
+			Name of the column, e.g. 'district'
+
+		Returns
+		-------
+		tuple
+			(names, codes): sorted list of the distinct values, and numpy.ndarray of the position in
+			`names` of the value of every row
+		"""
+
+		encoded = self._codes.get(column)
+		if encoded is None:
+			encoded_column = getattr(self, column)
+			values = np.array([value or '' for value in encoded_column.values], dtype=object)
+			names, ranks = np.unique(values, return_inverse=True)
+			codes = ranks.reshape(-1)[np.array(encoded_column.codes, dtype=np.intp)]
+			encoded = self._codes[column] = (names.tolist(), codes)
+		return encoded
+
+	def sizeInBytes(self):
+		"""Approximate memory held by the rows of the table, excluding its index.
+
+		Returns
+		-------
+		dict
+			Size in bytes of the categorical columns, the slot matrix and the positions of the row keys
+		"""
+
+		self.flushSlots()
+		return {
+			'columns': sum(getattr(self, column).sizeInBytes() for column in TABLE_COLUMNS),
+			'slots': self.slots.nbytes,
+			'positions': sys.getsizeof(self.positions) + sum(sys.getsizeof(key) for key in self.positions),
+		}
+
+	def rowsUnder(self, *path):
+		"""Positions of the rows matching the selections made so far along the menu tree.
+
+		Parameters
+		----------
+		*path : str
+			Selected dose, age group, state, district and hospital name, in that order, stopping at any level
+
+		Returns
+		-------
+		numpy.ndarray
+			Positions of the matching rows
+		"""
+
+		node = self.index.lookup(*path)
+		rows = []
+		pending = [node] if node is not None else []
+		while pending:
+			node = pending.pop()
+			rows.extend(node.rows)
+			pending.extend(node.children.values())
+		return np.array(rows, dtype=np.intp)
+
+	def availableDates(self, rows):
+		"""Dates on which any of the given rows, e.g. the rows of a hospital, has slots available.
+
+		Parameters
+		----------
+		rows : numpy.ndarray
+			Positions of the rows, e.g. from `rowsUnder`
+
+		Returns
+		-------
+		list
+			Labels of the dates with slots available
+		"""
+
+		available = self.slots[rows].sum(axis=0) > 0
+		return [self.dates[date] for date in np.flatnonzero(available)]
+
+	def totalSlotsBy(self, column, rows=None):
+		"""Total slots available on every date for every value of a categorical column, e.g. per district.
+
+		Parameters
+		----------
+		column : str
+			Name of the column to group by
+		rows : numpy.ndarray
+			Positions of the rows to add up, all the rows if None
+
+		Returns
+		-------
+		tuple
+			(names, totals): list of the values of the column, and numpy.ndarray with one row per value
+			and one column per date
+		"""
+
+		names, codes = self.categoryCodes(column)
+		slots = self.slots
+		if rows is not None:
+			codes = codes[rows]
+			slots = slots[rows]
+		totals = np.zeros((len(names), len(self.dates)), dtype=np.int64)
+		for date in range(len(self.dates)):
+			totals[:, date] = np.bincount(codes, weights=slots[:, date], minlength=len(names))
+		return names, totals
+
+	def hospitalsWithAvailability(self, rows=None):
+		"""Hospitals with slots available on any date.
+
+		Parameters
+		----------
+		rows : numpy.ndarray
+			Positions of the rows to consider, all the rows if None
+
+		Returns
+		-------
+		list
+			Sorted names of the hospitals
+		"""
+
+		names, codes = self.categoryCodes('hospital')
+		slots = self.slots
+		if rows is not None:
+			codes = codes[rows]
+			slots = slots[rows]
+		available = np.unique(codes[slots.any(axis=1)])
+		return [names[code] for code in available if names[code]]
+
+############################################################################################################################
+
+def parseSlotCount(text):
+	"""Convert the text of a slot cell to the number of slots, treating blank or malformed cells as no slots.
+
+	Parameters
+	----------
+	text : str
+		Text of the table cell
+
+	Returns
+	-------
+	int
+		Number of slots available
+	"""
+
+	text = text.strip()
+	if text.isdigit():
+		return int(text)
+	return 0
+
+############################################################################################################################
+
+def slotMatrix(slot_lists, width):
+	"""Stack the slots of many rows into a slot matrix.
+
+	Parameters
+	----------
+	slot_lists : list
+		Slots of every row as a list of int, missing trailing dates counting as no slots
+	width : int
+		Number of dates
+
+	Returns
+	-------
+	numpy.ndarray
+		Matrix with one row per list and `width` columns
+	"""
+
+	if all(len(slots) == width for slots in slot_lists):
+		return np.array(slot_lists, dtype=SLOT_DTYPE).reshape(len(slot_lists), width)
+
+	matrix = np.zeros((len(slot_lists), width), dtype=SLOT_DTYPE)
+	for row, slots in enumerate(slot_lists):
+		matrix[row, :len(slots)] = slots
+	return matrix
+
+############################################################################################################################
+
+def slotColumnsFromHeader(header_cells):
+	"""Discover the slot columns of the table from the cells of its header.
+
+	Parameters
+	----------
+	header_cells : list
+		(class, text) of every cell of the header row, in order
+
+	Returns
+	-------
+	list
+		(class, label) of every column holding slots, e.g. ('may_15', 'May 15'), or DEFAULT_SLOT_COLUMNS
+		if the header has none
+	"""
+
+	slot_columns = [(name, text.strip()) for name, text in header_cells if name and name not in ROW_COLUMNS]
+	return slot_columns or list(DEFAULT_SLOT_COLUMNS)
+
+############################################################################################################################
+
+def normalizeRow(cells, slot_columns):
+	"""Normalize the text of the cells of one table row, keyed by their class, into the fields of a row.
+
+	Parameters
+	----------
+	cells : dict
+		Text of the table cells of a row, with Key as 'Cell class' and Value as 'Cell text'
+	slot_columns : list
+		(class, label) of the columns holding slots, from `slotColumnsFromHeader`
+
+	Returns
+	-------
+	tuple
+		(hospital, state, district, vaccine, dose, age, slots), or None if the row does not name
+		a hospital, state, district, dose and age
+	"""
+
+	hospital, state, district, vaccine, dose, age = [cells.get(name, '').strip() for name in ROW_COLUMNS]
+	if not (hospital and state and district and dose and age):
+		return None
+
+	slots = [parseSlotCount(cells.get(name, '')) for name, _ in slot_columns]
+
+	return hospital, state, district, vaccine, dose, age, slots
+
+############################################################################################################################
+
+def parseAvailabilityTable(page_content):
+	"""Parse the HTML of the availability web-page once into an AvailabilityTable.
+
+	Parameters
+	----------
+	page_content : bytes or str
+		HTML content of the web-page
+
+	Returns
+	-------
+	AvailabilityTable
+		Normalized and indexed rows of the table body, excluding the table headers
+	"""
+
+	from bs4 import BeautifulSoup
+
+	soup = BeautifulSoup(page_content, 'html.parser')
+
+	th = soup.find('thead')
+	header_cells = []
+	if th is not None:
+		for td in th.find_all(['td', 'th']):
+			td_class = td.get('class')
+			header_cells.append((td_class[0] if td_class else None, td.get_text()))
+	slot_columns = slotColumnsFromHeader(header_cells)
+	table = AvailabilityTable([label for _, label in slot_columns])
+
+	tb = soup.find('tbody')
+	table_rows = tb.find_all('tr') if tb is not None else []
+
+	for tr in table_rows:
+		cells = {}
+		for td in tr.find_all('td'):
+			td_class = td.get('class')
+			if td_class:
+				cells[td_class[0]] = td.get_text()
+		row = normalizeRow(cells, slot_columns)
+		if row is not None:
+			table.appendRow(*row)
+
+	table.buildIndex()
+
+	return table
+
+############################################################################################################################
+
+def menuPath(key):
+	"""Order the key of a row as the selections made along the menu tree.
+
+	Parameters
+	----------
+	key : tuple
+		(hospital, district, state, dose, age, vaccine) of a row
+
+	Returns
+	-------
+	tuple
+		(dose, age, state, district, hospital) of the row
+	"""
+
+	hospital, district, state, dose, age, _ = key
+	return dose, age, state, district, hospital
+
+############################################################################################################################
+
+class ChangeSet:
+	"""Row-level difference between two successive versions of the availability table.
+
+	Attributes
+	----------
+	added : list
+		Keys of the rows that appeared
+	removed : list
+		Keys of the rows that disappeared
+	updated : list
+		Keys of the rows whose slots changed
+	"""
+
+	def __init__(self):
+		self.added = []
+		self.removed = []
+		self.updated = []
+
+	def __bool__(self):
+		return bool(self.added or self.removed or self.updated)
+
+	def __repr__(self):
+		return 'ChangeSet(added=%d, removed=%d, updated=%d)' % (len(self.added), len(self.removed), len(self.updated))
+
+############################################################################################################################
+
+class MenuNode:
+	"""Node of the MenuIndex for one selection made along the dose → age → state → district → hospital drill-down.
+
+	Attributes
+	----------
+	options : tuple
+		Sorted, deduplicated options of the next menu level. For a district node the options are
+		(hospital, vaccine) pairs, for every other node they are the keys of `children`
+	children : dict
+		Child nodes, with Key as the selected option and Value as MenuNode
+	rows : list
+		Positions in the AvailabilityTable of the rows matching the selections, only kept on hospital nodes
+	"""
+
+	__slots__ = ('options', 'children', 'rows')
+
+	def __init__(self):
+		self.options = ()
+		self.children = {}
+		self.rows = []
+
+############################################################################################################################
+
+class MenuIndex:
+	"""Precomputed nested index of the menu tree, so that every menu resolves with O(depth) dictionary lookups.
+
+	Attributes
+	----------
+	root : MenuNode
+		Node whose children are the doses
+	build_seconds : float
+		Time taken to build the index, or to update it for an incremental update
+	"""
+
+	LEVELS = ('dose', 'age', 'state', 'district', 'hospital')
+
+	def __init__(self, table):
+		start = time.perf_counter()
+
+		self.root = MenuNode()
+		hospital_pairs = {}
+		for row, key in enumerate(zip(table.dose, table.age, table.state, table.district, table.hospital)):
+			if key[-1] is None:
+				continue
+			node = self.root
+			for value in key:
+				child = node.children.get(value)
+				if child is None:
+					child = node.children[value] = MenuNode()
+				parent, node = node, child
+			node.rows.append(row)
+			hospital_pairs.setdefault(id(parent), (parent, set()))[1].add((key[-1], table.vaccine[row]))
+
+		self._finalize(self.root, 0)
+		for district_node, pairs in hospital_pairs.values():
+			district_node.options = tuple(sorted(pairs))
+
+		self.build_seconds = time.perf_counter() - start
+
+	def _finalize(self, node, depth):
+		if depth == len(self.LEVELS):
+			return
+		node.options = tuple(sorted(node.children))
+		for child in node.children.values():
+			self._finalize(child, depth + 1)
+
+	def updated(self, previous, table, changes):
+		"""Derive the index of an incrementally updated table, rebuilding only the nodes on the paths of added or removed rows.
+
+		Nodes are copied before they are changed and every other node is shared, so this index stays valid
+		for `previous`. Rows whose slots changed keep their positions and need no change to the index.
+
+		Parameters
+		----------
+		previous : AvailabilityTable
+			Table this index was built for
+		table : AvailabilityTable
+			Table derived from `previous` by `updateAvailabilityTable`
+		changes : ChangeSet
+			Rows added and removed between the two tables
+
+		Returns
+		-------
+		MenuIndex
+			Index of `table`
+		"""
+
+		start = time.perf_counter()
+		owned = {}
+		dirty = {}
+
+		def own(node):
+			copy = owned.get(id(node))
+			if copy is None:
+				copy = MenuNode()
+				copy.options = node.options
+				copy.children = dict(node.children)
+				copy.rows = list(node.rows)
+				owned[id(node)] = owned[id(copy)] = copy
+			return copy
+
+		def walk(path, create):
+			nodes = [index.root]
+			for value in path:
+				child = nodes[-1].children.get(value)
+				if child is None:
+					if not create:
+						return None
+					child = MenuNode()
+					owned[id(child)] = child
+					dirty[id(nodes[-1])] = (nodes[-1], len(nodes) - 1)
+				else:
+					child = own(child)
+				nodes[-1].children[value] = child
+				nodes.append(child)
+			dirty[id(nodes[4])] = (nodes[4], 4)
+			return nodes
+
+		index = MenuIndex.__new__(MenuIndex)
+		index.root = own(self.root)
+
+		for key in changes.removed:
+			path = menuPath(key)
+			nodes = walk(path, create=False)
+			if nodes is None:
+				continue
+			nodes[-1].rows.remove(previous.positions[key])
+			for depth in range(len(nodes) - 1, 0, -1):
+				if nodes[depth].rows or nodes[depth].children:
+					break
+				del nodes[depth - 1].children[path[depth - 1]]
+				dirty[id(nodes[depth - 1])] = (nodes[depth - 1], depth - 1)
+
+		for key in changes.added:
+			walk(menuPath(key), create=True)[-1].rows.append(table.positions[key])
+
+		for node, depth in dirty.values():
+			if depth == 4:
+				node.options = tuple(sorted({(hospital, table.vaccine[row]) for hospital, child in node.children.items() for row in child.rows}))
+			else:
+				node.options = tuple(sorted(node.children))
+
+		index.build_seconds = time.perf_counter() - start
+		return index
+
+	def lookup(self, *path):
+		"""Walk the index along the selections made so far.
+
+		Parameters
+		----------
+		*path : str
+			Selected dose, age group, state, district and hospital name, in that order, stopping at any level
+
+		Returns
+		-------
+		MenuNode
+			Node reached by the selections, or None if any of them is not available
+		"""
+
+		node = self.root
+		for value in path:
+			node = node.children.get(value)
+			if node is None:
+				return None
+		return node
+
+	def sizeInBytes(self):
+		"""Approximate memory held by the index structure itself, excluding the strings shared with the table.
+
+		Returns
+		-------
+		int
+			Size of all nodes, dicts, tuples and lists of the index in bytes
+		"""
+
+		size = 0
+		pending = [self.root]
+		while pending:
+			node = pending.pop()
+			size += sys.getsizeof(node) + sys.getsizeof(node.options) + sys.getsizeof(node.children) + sys.getsizeof(node.rows)
+			for option in node.options:
+				if isinstance(option, tuple):
+					size += sys.getsizeof(option)
+			pending.extend(node.children.values())
+		return size
+
+############################################################################################################################
+
+class _RowStreamParser(HTMLParser):
+	"""Incremental HTML parser collecting the header and the rows of the table body without building a document tree."""
+
+	def __init__(self):
+		super().__init__()
+		self.rows = []
+		self.slot_columns = None
+		self._header_cells = None
+		self._in_tbody = False
+		self._cells = None
+		self._cell_class = None
+		self._cell_text = None
+
+	def handle_starttag(self, tag, attrs):
+		if tag == 'thead':
+			self._header_cells = []
+		elif tag == 'tbody':
+			self._in_tbody = True
+			if self.slot_columns is None:
+				self.slot_columns = slotColumnsFromHeader(self._header_cells or [])
+		elif tag == 'tr' and self._in_tbody:
+			self._cells = {}
+		elif tag in ('td', 'th') and (self._cells is not None or self._header_cells is not None):
+			td_class = (dict(attrs).get('class') or '').split()
+			self._cell_class = td_class[0] if td_class else None
+			self._cell_text = []
+
+	def handle_endtag(self, tag):
+		if tag in ('td', 'th') and self._cell_text is not None:
+			if self._cells is not None:
+				if self._cell_class is not None:
+					self._cells[self._cell_class] = ''.join(self._cell_text)
+			elif self._header_cells is not None:
+				self._header_cells.append((self._cell_class, ''.join(self._cell_text)))
+			self._cell_text = None
+		elif tag == 'tr' and self._cells is not None:
+			row = normalizeRow(self._cells, self.slot_columns)
+			if row is not None:
+				self.rows.append(row)
+			self._cells = None
+		elif tag == 'thead':
+			self.slot_columns = slotColumnsFromHeader(self._header_cells)
+			self._header_cells = None
+		elif tag == 'tbody':
+			self._in_tbody = False
+
+	def handle_data(self, data):
+		if self._cell_text is not None:
+			self._cell_text.append(data)
+
+############################################################################################################################
+
+class AvailabilityRowStream:
+	"""Normalized rows parsed incrementally from the HTML of the availability web-page.
+
+	Only the rows completed by the chunk just fed to the parser are held in memory, so the memory used
+	does not grow with the size of the page.
+
+	Attributes
+	----------
+	dates : list
+		Labels of the dates of the slots of every row, found in the table header; None until the
+		header has been parsed, which always happens before the first row is emitted
+	"""
+
+	def __init__(self, chunks):
+		self.chunks = chunks
+		self.dates = None
+
+	def __iter__(self):
+		parser = _RowStreamParser()
+		decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+		for chunk in self.chunks:
+			parser.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+			if parser.slot_columns is not None:
+				self.dates = [label for _, label in parser.slot_columns]
+			yield from parser.rows
+			parser.rows.clear()
+
+		parser.feed(decoder.decode(b'', final=True))
+		parser.close()
+		if parser.slot_columns is not None:
+			self.dates = [label for _, label in parser.slot_columns]
+		yield from parser.rows
+
+############################################################################################################################
+
+def iterAvailabilityRows(chunks):
+	"""Parse the HTML of the availability web-page incrementally, emitting one normalized row per table row.
+
+	Parameters
+	----------
+	chunks : iterable
+		Successive pieces of the HTML content of the web-page, as bytes or str
+
+	Returns
+	-------
+	AvailabilityRowStream
+		Iterable of (hospital, state, district, vaccine, dose, age, slots) for every row of the table body,
+		with the labels of the dates of the slots as its `dates` attribute
+	"""
+
+	return AvailabilityRowStream(chunks)
+
+############################################################################################################################
+
+class MergedRowStream:
+	"""Rows of several AvailabilityRowStream, with their slots aligned on the union of their dates.
+
+	Attributes
+	----------
+	dates : list
+		Union of the dates of the streams, in order of first appearance; the slots of a row emitted
+		before a stream added dates only cover the dates known at that time
+	"""
+
+	def __init__(self, streams):
+		self.streams = streams
+		self.dates = []
+
+	def __iter__(self):
+		columns = {}
+		for stream in self.streams:
+			mapping = None
+			for row in stream:
+				if mapping is None:
+					mapping = [columns.setdefault(date, len(columns)) for date in stream.dates]
+					self.dates = list(columns)
+					aligned = mapping == list(range(len(mapping)))
+				if not aligned:
+					slots = [0] * len(columns)
+					for column, count in zip(mapping, row[6]):
+						slots[column] = count
+					row = row[:6] + (slots,)
+				yield row
+
+############################################################################################################################
+
+def buildAvailabilityTable(rows, dates=None):
+	"""Collect normalized rows into an indexed AvailabilityTable.
+
+	Parameters
+	----------
+	rows : iterable
+		(hospital, state, district, vaccine, dose, age, slots) tuples, e.g. from `iterAvailabilityRows`
+	dates : list
+		Labels of the dates of the slots, taken from the `dates` attribute of `rows` if None
+
+	Returns
+	-------
+	AvailabilityTable
+		Normalized and indexed rows
+	"""
+
+	table = AvailabilityTable(dates or [])
+	for row in rows:
+		table.appendRow(*row)
+
+	if dates is None:
+		table.dates = list(getattr(rows, 'dates', None) or [label for _, label in DEFAULT_SLOT_COLUMNS])
+	table.buildIndex()
+
+	return table
+
+############################################################################################################################
+
+def updateAvailabilityTable(previous, rows):
+	"""Apply a fresh copy of the rows on top of the previous table, re-indexing only what changed.
+
+	Rows are matched by their key (hospital, district, state, dose, age, vaccine) and only the rows whose
+	slots differ are written into a copy of the slot matrix, in one assignment. The previous table is
+	left untouched, so it can keep being served until the new one is swapped in. If the dates of the
+	fresh data differ from the previous ones, e.g. when the week moves on, the table is rebuilt and every
+	remaining row counts as updated.
+
+	Parameters
+	----------
+	previous : AvailabilityTable
+		Table currently served
+	rows : iterable
+		(hospital, state, district, vaccine, dose, age, slots) tuples of the fresh data, e.g. from `iterAvailabilityRows`
+
+	Returns
+	-------
+	AvailabilityTable
+		Updated table with the row-level difference kept as its `changes` attribute, or `previous`
+		itself if no row changed
+	"""
+
+	changes = ChangeSet()
+	unseen = dict(previous.positions)
+	fresh_slots = {}
+	added_rows = []
+
+	for row in rows:
+		hospital, state, district, vaccine, dose, age, slots = row
+		key = (hospital, district, state, dose, age, vaccine)
+		position = unseen.pop(key, None)
+		if position is None:
+			position = previous.positions.get(key)
+		if position is None:
+			added_rows.append(row)
+		else:
+			fresh_slots[position] = slots
+
+	dates = list(getattr(rows, 'dates', None) or previous.dates)
+
+	def keyAt(position):
+		return (previous.hospital[position], previous.district[position], previous.state[position],
+			previous.dose[position], previous.age[position], previous.vaccine[position])
+
+	if dates != previous.dates:
+		table = AvailabilityTable(dates)
+		for position, slots in fresh_slots.items():
+			table.appendRow(previous.hospital[position], previous.state[position], previous.district[position],
+				previous.vaccine[position], previous.dose[position], previous.age[position], slots)
+			changes.updated.append(keyAt(position))
+		for row in added_rows:
+			hospital, state, district, vaccine, dose, age, slots = row
+			key = (hospital, district, state, dose, age, vaccine)
+			if key not in table.positions:
+				changes.added.append(key)
+			table.appendRow(*row)
+		changes.removed.extend(unseen)
+		table.buildIndex()
+		table.changes = changes
+		return table
+
+	# Converting the whole fresh data to a matrix costs more than comparing it row by row with the previous rows as lists
+	previous_slots = previous.slots.tolist()
+	changed = [(position, slots) for position, slots in fresh_slots.items() if previous_slots[position] != slots]
+	if not changed and not added_rows and not unseen:
+		return previous
+
+	table = previous.copy()
+	if changed:
+		changed_positions = [position for position, _ in changed]
+		table.slots[changed_positions] = slotMatrix([slots for _, slots in changed], len(dates))
+		changes.updated.extend(keyAt(position) for position in changed_positions)
+
+	for row in added_rows:
+		hospital, state, district, vaccine, dose, age, slots = row
+		key = (hospital, district, state, dose, age, vaccine)
+		if key not in table.positions:
+			changes.added.append(key)
+		table.appendRow(*row)
+
+	for key in unseen:
+		table.removeRow(key)
+		changes.removed.append(key)
+
+	table.flushSlots()
+	if table.dead_rows > len(table):
+		# Too many tombstones, compact the columns with a full rebuild
+		table = buildAvailabilityTable(table.iterRows(), dates=table.dates)
+	else:
+		table.index = previous.index.updated(previous, table, changes)
+	table.changes = changes
+
+	return table
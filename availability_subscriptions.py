@@ -0,0 +1,168 @@
+# Import required module/s
+import itertools
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+
+class SubscriptionIndex:
+	"""Standing subscriptions of Clients waiting for slots, matched against every new version of the availability data.
+
+	A subscription names a district (dose, age group, state, district), optionally one of its hospitals, and
+	optionally the dates it is interested in. Subscriptions are indexed by district, and by hospital for those
+	naming one, so a new version of the data is matched through its row-level change set: only the changed rows
+	of subscribed districts are compared with the previous version, and only the subscriptions of their
+	district and hospital are looked at. The cost of a refresh grows with the number of rows changed, not with
+	the number of subscriptions.
+
+	Slots appear for a subscription when a row of its district or hospital publishes more slots on one of its
+	dates than in the previous version. A subscription fires at most once: its Future gets the path of the
+	hospital and the dates with new slots, and the subscription is dropped.
+
+	Attributes
+	----------
+	notified : int
+		Number of subscriptions that fired
+	last_match_seconds : float
+		Time taken to match the last new version of the data
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._ids = itertools.count(1)
+		# District-wide subscriptions by district path, and the others by hospital path, with Key as their id
+		self._districts = {}
+		self._hospitals = {}
+		# Path a subscription is indexed under, with Key as its id, and number of subscriptions of every district
+		self._subscribed = {}
+		self._watched = {}
+		self.notified = 0
+		self.last_match_seconds = 0.0
+
+	def subscribe(self, path, dates=None):
+		"""Register a subscription.
+
+		Parameters
+		----------
+		path : tuple
+			Dose, age group, state and district, and optionally the hospital name, of the slots awaited
+		dates : iterable
+			Labels of the dates awaited, or None for any date
+
+		Returns
+		-------
+		int
+			Id of the subscription, to unsubscribe with
+		concurrent.futures.Future
+			Done with (path of the hospital, list of the dates with new slots) once slots appear
+		"""
+
+		future = Future()
+		path = tuple(path)
+		entries = self._districts if len(path) == 4 else self._hospitals
+		with self._lock:
+			subscription = next(self._ids)
+			entries.setdefault(path, {})[subscription] = (frozenset(dates) if dates else None, future)
+			self._subscribed[subscription] = path
+			self._watched[path[:4]] = self._watched.get(path[:4], 0) + 1
+		return subscription, future
+
+	def unsubscribe(self, subscription):
+		"""Drop a subscription, e.g. when its Client goes away; nothing is done if it already fired."""
+
+		with self._lock:
+			self._drop(subscription)
+
+	def _drop(self, subscription):
+		path = self._subscribed.pop(subscription, None)
+		if path is None:
+			return
+		entries = self._districts if len(path) == 4 else self._hospitals
+		subscriptions = entries[path]
+		del subscriptions[subscription]
+		if not subscriptions:
+			del entries[path]
+		district = path[:4]
+		self._watched[district] -= 1
+		if not self._watched[district]:
+			del self._watched[district]
+
+	def __len__(self):
+		return len(self._subscribed)
+
+	def changedRows(self, previous, table):
+		"""Positions in `table` and in `previous` (-1 if it is new) of the rows of the subscribed districts that may have new slots.
+
+		The change set of `table` gives them directly; a table without one, e.g. loaded from a snapshot file,
+		has all the rows of the subscribed districts compared.
+		"""
+
+		subscribed = self._watched
+		if table.changes is not None:
+			keys = [key for key in itertools.chain(table.changes.added, table.changes.updated) if (key[3], key[4], key[2], key[1]) in subscribed]
+			rows = [table.positions[key] for key in keys]
+		else:
+			rows = []
+			for district in subscribed:
+				node = table.index.lookup(*district)
+				if node is not None:
+					for child in node.children.values():
+						rows.extend(child.rows)
+			keys = [(table.hospital[row], table.district[row], table.state[row], table.dose[row], table.age[row], table.vaccine[row]) for row in rows]
+		return np.array(rows, dtype=np.intp), np.array([previous.positions.get(key, -1) for key in keys], dtype=np.intp)
+
+	def match(self, previous, table):
+		"""Fire the subscriptions for which slots appeared in a new version of the data, e.g. as a listener of its swap.
+
+		Parameters
+		----------
+		previous : availability_store.AvailabilityTable
+			Version of the data served until now
+		table : availability_store.AvailabilityTable
+			New version of the data
+
+		Returns
+		-------
+		int
+			Number of subscriptions fired
+		"""
+
+		start = time.perf_counter()
+		fired = []
+		with self._lock:
+			if not self._subscribed:
+				return 0
+			rows, previous_rows = self.changedRows(previous, table)
+			slots = table.slots[rows]
+			previous_slots = np.zeros_like(slots)
+			known = previous_rows >= 0
+			columns = [previous.dates.index(date) if date in previous.dates else -1 for date in table.dates]
+			for column, previous_column in enumerate(columns):
+				if previous_column >= 0:
+					previous_slots[known, column] = previous.slots[previous_rows[known], previous_column]
+			increased = slots > previous_slots
+
+			for position in np.flatnonzero(increased.any(axis=1)):
+				row = rows[position]
+				path = (table.dose[row], table.age[row], table.state[row], table.district[row], table.hospital[row])
+				dates = [table.dates[column] for column in np.flatnonzero(increased[position])]
+				for entries, key in ((self._hospitals, path), (self._districts, path[:4])):
+					for subscription, (awaited, future) in list(entries.get(key, {}).items()):
+						matched = dates if awaited is None else [date for date in dates if date in awaited]
+						if matched:
+							fired.append((future, path, matched))
+							self._drop(subscription)
+			self.notified += len(fired)
+			self.last_match_seconds = time.perf_counter() - start
+			remaining = len(self._subscribed)
+
+		for future, path, dates in fired:
+			try:
+				future.set_result((path, dates))
+			except InvalidStateError:
+				pass
+		print("Matched %d changed rows against the subscriptions in %.2f ms: %d notified, %d still waiting"
+			% (len(rows), self.last_match_seconds * 1000, len(fired), remaining))
+		return len(fired)
@@ -0,0 +1,125 @@
+"""Measure the asyncio server mode holding thousands of idle sessions while hundreds of others are active.
+
+The server runs in its own process with the data of a generated page. Idle sessions connect, read the first
+prompt and stay silent. Active sessions walk down the menu to a Vaccination Center and back up to the
+Dose again and again. The benchmark reports the round trip of every step, the server's memory and CPU use,
+and checks that every idle session is still open at the end.
+
+Usage: python benchmarks/bench_async_sessions.py [n_idle] [n_active] [seconds]
+"""
+
+# Import required module/s
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from framing import encodeFrame, readFrame, INPUT_FRAME, INPUT_REQUESTS
+from mock_site import MockSite, generatePage
+
+
+# Inputs of one cycle of an active session: down to the slots of a Vaccination Center, then back to the Dose
+CYCLE = ('1', '1', '1', '1', '1', 'b', 'b', 'b', 'b', 'b')
+PORT = 24790
+
+
+async def readPrompt(reader):
+	"""Read the frames of a step up to the one asking for the next input, returning its payload."""
+
+	while True:
+		frame = await readFrame(reader)
+		if frame is None:
+			raise ConnectionError("Session closed by the server")
+		if frame[0] in INPUT_REQUESTS:
+			return frame[1]
+
+
+async def openSession():
+	reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+	await readPrompt(reader)
+	return reader, writer
+
+
+async def activeSession(deadline, latencies):
+	reader, writer = await openSession()
+	while time.perf_counter() < deadline:
+		for data in CYCLE:
+			start = time.perf_counter()
+			writer.write(encodeFrame(INPUT_FRAME, data))
+			await readPrompt(reader)
+			latencies.append(time.perf_counter() - start)
+	writer.close()
+
+
+async def stillOpen(reader):
+	try:
+		return await asyncio.wait_for(reader.read(1), 0.01) != b''
+	except asyncio.TimeoutError:
+		return True
+
+
+def serverUsage(pid):
+	with open('/proc/%d/status' % pid) as f:
+		rss_kib = next(int(line.split()[1]) for line in f if line.startswith('VmRSS'))
+	with open('/proc/%d/stat' % pid) as f:
+		fields = f.read().rsplit(')', 1)[1].split()
+	cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+	return rss_kib, cpu_seconds
+
+
+async def main(n_idle, n_active, seconds, server_pid):
+	start = time.perf_counter()
+	idle = []
+	for batch in range(0, n_idle, 500):
+		idle += await asyncio.gather(*[openSession() for _ in range(min(500, n_idle - batch))])
+	print("%d idle sessions opened in %.2f s" % (len(idle), time.perf_counter() - start))
+	rss_kib, cpu_before = serverUsage(server_pid)
+	print("server RSS with idle sessions: %.1f MiB" % (rss_kib / 1024))
+
+	latencies = []
+	start = time.perf_counter()
+	await asyncio.gather(*[activeSession(start + seconds, latencies) for _ in range(n_active)])
+	elapsed = time.perf_counter() - start
+	rss_kib, cpu_after = serverUsage(server_pid)
+
+	latencies.sort()
+	percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+	print("%d active sessions: %d steps in %.1f s, %.0f steps/s, latency p50 %.1f ms, p99 %.1f ms, max %.1f ms"
+		% (n_active, len(latencies), elapsed, len(latencies) / elapsed, percentile(0.5), percentile(0.99), latencies[-1] * 1000))
+	print("server RSS %.1f MiB, server CPU %.0f%% of one core while active" % (rss_kib / 1024, 100 * (cpu_after - cpu_before) / elapsed))
+
+	open_count = sum(await asyncio.gather(*[stillOpen(reader) for reader, _ in idle]))
+	print("idle sessions still open: %d of %d" % (open_count, len(idle)))
+	for _, writer in idle:
+		writer.close()
+
+
+if __name__ == '__main__':
+	n_idle = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+	n_active = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+	seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+	soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+	resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 2 * (n_idle + n_active) + 256)), hard))
+
+	site = MockSite({'/': generatePage(2000)})
+	server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'w6_activity2_server.py'), '--mode', 'async', '--port', str(PORT),
+		'--url', site.url(), '--no-cache', '--snapshot', '', '--journal', '', '--refresh-interval', '0'], stdout=subprocess.DEVNULL)
+	try:
+		for _ in range(300):
+			try:
+				socket.create_connection(('127.0.0.1', PORT)).close()
+				break
+			except OSError:
+				time.sleep(0.1)
+		asyncio.run(main(n_idle, n_active, seconds, server.pid))
+	finally:
+		server.terminate()
+		server.wait()
+		site.close()
@@ -0,0 +1,79 @@
+"""Measure the build time of the availability rollups and their lookups against answering the same questions
+by drilling down the menu tree and summing the slot matrix.
+
+Two questions are asked of random districts and states: the earliest date with slots in a district, and the
+districts of a state with slots on the second date. The rollups of a refresh changing 1% of the rows are also
+updated from the change set, timed against a full build and checked to be equal to it.
+
+Usage: python benchmarks/bench_availability_rollups.py [n_rows] [n_queries]
+"""
+
+# Import required module/s
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_rollups import AvailabilityRollups, rollupIndex
+from availability_store import buildAvailabilityTable, iterAvailabilityRows, updateAvailabilityTable
+from mock_site import changedRows, generatePage
+
+
+def earliestByDrillDown(table, path):
+	rows = table.rowsUnder(*path)
+	dates = table.availableDates(rows)
+	return dates[0] if dates else None
+
+
+def availableByDrillDown(table, path, date):
+	column = table.dates.index(date)
+	options = []
+	for option in table.index.lookup(*path).options:
+		slots = int(table.slots[table.rowsUnder(*path, option), column].sum())
+		if slots > 0:
+			options.append(option)
+	return options
+
+
+def perQuery(ask, queries):
+	"""Mean seconds per query and the answers."""
+
+	start = time.perf_counter()
+	answers = [ask(query) for query in queries]
+	return (time.perf_counter() - start) / len(queries), answers
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+	n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+	table = buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)]))
+	rollups = rollupIndex(table)
+	print("%d rows, %d nodes rolled up in %.0f ms" % (n_rows, len(rollups.positions), rollups.build_seconds * 1000))
+
+	refreshed = updateAvailabilityTable(table, changedRows(table, 0.01))
+	updated = rollupIndex(refreshed, table)
+	rebuilt = AvailabilityRollups(refreshed)
+	assert set(updated.positions) == set(rebuilt.positions)
+	for path in rebuilt.positions:
+		assert updated.rollup(*path) == rebuilt.rollup(*path), path
+		assert updated.availableOptions(*path) == rebuilt.availableOptions(*path), path
+	print("refresh %r: rollups updated in %.0f ms, rolled up in full in %.0f ms"
+		% (refreshed.changes, updated.build_seconds * 1000, rebuilt.build_seconds * 1000))
+
+	rng = random.Random(0)
+	districts = [path for path in rollups.positions if len(path) == 4]
+	states = [path for path in rollups.positions if len(path) == 3]
+	date = table.dates[1]
+	for label, queries, drillDown, lookup in (
+			("earliest date in a district", [rng.choice(districts) for _ in range(n_queries)],
+				lambda path: earliestByDrillDown(table, path), lambda path: rollups.firstDate(*path)),
+			("districts with slots on %s" % date, [rng.choice(states) for _ in range(n_queries)],
+				lambda path: availableByDrillDown(table, path, date),
+				lambda path: [option for option, _, _ in rollups.availableOptions(*path, date=date)])):
+		drill_seconds, expected = perQuery(drillDown, queries)
+		lookup_seconds, answers = perQuery(lookup, queries)
+		assert answers == expected, label
+		print("%-36s drill-down %9.1f us, rollups %7.1f us, %.0fx" % (label + ':', drill_seconds * 1e6, lookup_seconds * 1e6, drill_seconds / lookup_seconds))
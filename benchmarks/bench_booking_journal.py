@@ -0,0 +1,73 @@
+"""Measure how many bookings per second the journal makes durable for several commit windows.
+
+Every thread books in a loop, waiting for each of its bookings to be durable before the next one, as a
+session does before it confirms the appointment. The baseline writes and fsyncs every booking on its own.
+The journal is written to a temporary directory, or to the directory given, which should be on the disk
+the server would use.
+
+Usage: python benchmarks/bench_booking_journal.py [n_threads] [seconds] [directory]
+"""
+
+# Import required module/s
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from booking_journal import BookingJournal
+
+
+# Commit windows compared, in seconds
+COMMIT_WINDOWS = (0.0, 0.0005, 0.001, 0.002, 0.005, 0.01)
+PATH = ('1', '18+', 'Goa', 'North Goa', 'Eden Clinic')
+
+
+def bookInLoop(book, deadline, latencies):
+	n = 0
+	while time.perf_counter() < deadline:
+		start = time.perf_counter()
+		book('B%d-%d' % (threading.get_ident(), n))
+		latencies.append(time.perf_counter() - start)
+		n += 1
+
+
+def run(book, n_threads, seconds):
+	latencies = []
+	deadline = time.perf_counter() + seconds
+	threads = [threading.Thread(target=bookInLoop, args=(book, deadline, latencies)) for _ in range(n_threads)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	latencies.sort()
+	return len(latencies) / seconds, latencies[len(latencies) // 2] * 1000, latencies[int(0.99 * (len(latencies) - 1))] * 1000
+
+
+if __name__ == '__main__':
+	n_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+	seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+	directory = sys.argv[3] if len(sys.argv) > 3 else None
+
+	with tempfile.TemporaryDirectory(dir=directory) as tmp:
+		path = os.path.join(tmp, 'baseline.journal')
+		fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+		lock = threading.Lock()
+
+		def bookAlone(booking_id):
+			with lock:
+				os.write(fd, ('{"id": "%s", "date": "May 15"}\n' % booking_id).encode('utf-8'))
+				os.fsync(fd)
+
+		rate, p50, p99 = run(bookAlone, n_threads, seconds)
+		os.close(fd)
+		print("%d threads, fsync per booking:   %8.0f bookings/s, p50 %6.2f ms, p99 %6.2f ms" % (n_threads, rate, p50, p99))
+
+		for window in COMMIT_WINDOWS:
+			journal = BookingJournal(os.path.join(tmp, 'window_%g.journal' % window), commit_window=window)
+			rate, p50, p99 = run(lambda booking_id: journal.append(booking_id, PATH, 'May 15').result(), n_threads, seconds)
+			print("%d threads, commit window %4.1f ms: %8.0f bookings/s, p50 %6.2f ms, p99 %6.2f ms, %.1f bookings per fsync"
+				% (n_threads, window * 1000, rate, p50, p99, journal.records / max(1, journal.commits)))
+			journal.close()
@@ -0,0 +1,64 @@
+"""Measure a bulk booking of many requests read from a CSV file, journal included.
+
+The requests are generated for random hospitals of a generated page, a few of them with unknown
+selections, some for the 2nd Dose too early, and most with two preferred dates.
+
+Usage: python benchmarks/bench_bulk_booking.py [n_rows] [n_requests]
+"""
+
+# Import required module/s
+import csv
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from booking_journal import BookingJournal
+from bulk_booking import REQUEST_FIELDS, DATE_SEPARATOR, readBookingRequests, bookRequests, writeBookingResults
+from bench_reservations import hospitalPaths
+from mock_site import generatePage
+from slot_reservations import SlotReservations
+
+
+def generateRequests(path, paths, dates, n, seed=0):
+	rng = random.Random(seed)
+	today = datetime.date.today()
+	with open(path, 'w', newline='') as f:
+		writer = csv.writer(f)
+		writer.writerow(REQUEST_FIELDS)
+		for i in range(n):
+			dose, age_group, state, district, hospital = rng.choice(paths)
+			if i % 50 == 0:
+				hospital = 'Unknown Hospital'
+			first_dose = today - datetime.timedelta(weeks=rng.choice((2, 5, 6, 10)))
+			preferred = DATE_SEPARATOR.join(rng.sample(dates, 2)) if rng.random() < 0.8 else ''
+			writer.writerow((dose, first_dose.strftime('%d/%m/%Y'), age_group, state, district, hospital, preferred))
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+	table = buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)]))
+	with tempfile.TemporaryDirectory() as tmp:
+		requests_path = os.path.join(tmp, 'requests.csv')
+		generateRequests(requests_path, list(hospitalPaths(table.index.root)), table.dates, n_requests)
+
+		journal = BookingJournal(os.path.join(tmp, 'bookings.journal'))
+		start = time.perf_counter()
+		results = bookRequests(readBookingRequests(requests_path), table, SlotReservations(), journal)
+		booked = time.perf_counter() - start
+		writeBookingResults(os.path.join(tmp, 'requests.results.csv'), results)
+		elapsed = time.perf_counter() - start
+		journal.close()
+
+	statuses = {}
+	for result in results:
+		statuses[result['status']] = statuses.get(result['status'], 0) + 1
+	print("%d rows, %d requests: booked in %.2f s, %.2f s with the results file, %.0f requests/s" % (n_rows, n_requests, booked, elapsed, n_requests / elapsed))
+	print("outcomes: %r, %d journal fsyncs" % (statuses, journal.commits))
@@ -0,0 +1,67 @@
+"""Compare server cold start from the HTML page against cold start from a binary snapshot.
+
+Every start runs in a fresh interpreter and is timed up to the first menu being rendered,
+including the imports it needs.
+
+Usage: python benchmarks/bench_cold_start.py [n_rows]
+"""
+
+# Import required module/s
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from snapshot_file import save_snapshot
+from mock_site import generatePage
+
+
+START_FROM_HTML = '''
+import sys, time
+start = time.perf_counter()
+import w6_activity2_server as server
+from availability_store import parseAvailabilityTable
+with open(sys.argv[1], 'rb') as f:
+	table = parseAvailabilityTable(f.read())
+server.fetchVaccineDoses(table)
+print(time.perf_counter() - start, 'bs4' in sys.modules, 'requests' in sys.modules)
+'''
+
+START_FROM_SNAPSHOT = '''
+import sys, time
+start = time.perf_counter()
+import w6_activity2_server as server
+from snapshot_file import load_snapshot
+table = load_snapshot(sys.argv[1])
+server.fetchVaccineDoses(table)
+print(time.perf_counter() - start, 'bs4' in sys.modules, 'requests' in sys.modules)
+'''
+
+
+def coldStart(script, path):
+	start = time.perf_counter()
+	out = subprocess.check_output([sys.executable, '-c', script, path], cwd=ROOT, text=True).split()
+	return time.perf_counter() - start, float(out[0]), out[1] == 'True', out[2] == 'True'
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	page = generatePage(n_rows)
+
+	with tempfile.TemporaryDirectory() as directory:
+		html_path = os.path.join(directory, 'page.html')
+		snapshot_path = os.path.join(directory, 'page.snapshot')
+		with open(html_path, 'w') as f:
+			f.write(page)
+		save_snapshot(buildAvailabilityTable(iterAvailabilityRows([page])), snapshot_path)
+
+		print("Rows: %d, HTML: %.1f MiB, snapshot: %.1f MiB" % (n_rows, os.path.getsize(html_path) / 2**20, os.path.getsize(snapshot_path) / 2**20))
+		for name, script, path in (('html', START_FROM_HTML, html_path), ('snapshot', START_FROM_SNAPSHOT, snapshot_path)):
+			process_seconds, load_seconds, bs4_imported, requests_imported = coldStart(script, path)
+			print("%-8s first menu after %.1f ms (process %.1f ms), imports bs4: %s, requests: %s"
+				% (name, load_seconds * 1000, process_seconds * 1000, bs4_imported, requests_imported))
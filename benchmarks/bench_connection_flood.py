@@ -0,0 +1,190 @@
+"""Measure the latency of active sessions of the asyncio server mode while a load generator floods it with connections.
+
+The server runs in its own process with the data of a generated page, once without limits and once with
+--max-sessions and --idle-timeout. Active sessions are opened first and walk down the menu to a Vaccination
+Center and back up again and again, pausing between steps, before and during the flood. The load generator runs in another process:
+half of its connections stay silent until the server closes them, the other half send one input and
+disconnect, and every one of them reconnects at once. The benchmark reports the round trip of every step of
+the active sessions in both phases, what became of the flood connections and the shed and reaped counts
+logged by the server.
+
+Usage: python benchmarks/bench_connection_flood.py [n_active] [n_flood] [seconds]
+"""
+
+# Import required module/s
+import asyncio
+import multiprocessing
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from framing import encodeFrame, readFrame, FrameError, GOODBYE_FRAME, INPUT_FRAME, INPUT_REQUESTS
+from mock_site import MockSite, generatePage
+
+
+# Inputs of one cycle of an active session: down to the slots of a Vaccination Center, then back to the Dose
+CYCLE = ('1', '1', '1', '1', '1', 'b', 'b', 'b', 'b', 'b')
+PORT = 24791
+# Seconds an active session waits between its steps, as a user reading the menus would, so the server is not saturated without the flood
+THINK_TIME = 0.05
+# Seconds of idle timeout of the limited server, short enough for the silent flood connections to be reaped during a phase
+IDLE_TIMEOUT = 2
+
+
+async def readPrompt(reader):
+	"""Read the frames of a step up to the one asking for the next input, returning its payload."""
+
+	while True:
+		frame = await readFrame(reader)
+		if frame is None or frame[0] == GOODBYE_FRAME:
+			raise ConnectionError("Session closed by the server")
+		if frame[0] in INPUT_REQUESTS:
+			return frame[1]
+
+
+async def activeSession(reader, writer, deadline, latencies):
+	while time.perf_counter() < deadline:
+		for data in CYCLE:
+			start = time.perf_counter()
+			writer.write(encodeFrame(INPUT_FRAME, data))
+			await readPrompt(reader)
+			latencies.append(time.perf_counter() - start)
+			await asyncio.sleep(THINK_TIME)
+
+
+def report(label, latencies, elapsed):
+	latencies.sort()
+	percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+	print("  %-14s %7d steps, %6.0f steps/s, latency p50 %5.1f ms, p99 %6.1f ms, max %7.1f ms"
+		% (label, len(latencies), len(latencies) / elapsed, percentile(0.5), percentile(0.99), latencies[-1] * 1000))
+
+############################################################################################################################
+
+async def floodConnection(silent, stop, outcomes):
+	"""Connect again and again until `stop`, staying silent or sending one input, and count how every connection ended."""
+
+	while not stop.is_set():
+		try:
+			reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+		except OSError:
+			outcomes['refused'] += 1
+			await asyncio.sleep(0.01)
+			continue
+		# Connections still waiting when the flood stops are left counted as open
+		outcomes['open'] += 1
+		outcome = 'closed'
+		prompts = 0
+		try:
+			if not silent:
+				writer.write(encodeFrame(INPUT_FRAME, '1'))
+			while True:
+				frame = await readFrame(reader)
+				if frame is None:
+					break
+				if frame[0] == GOODBYE_FRAME:
+					outcome = 'busy' if b'busy' in frame[1] else 'reaped'
+					break
+				if frame[0] in INPUT_REQUESTS:
+					# The second prompt answers the input, after the one of the first menu
+					prompts += 1
+					if not silent and prompts == 2:
+						outcome = 'served'
+						break
+		except (ConnectionError, FrameError):
+			pass
+		outcomes['open'] -= 1
+		outcomes[outcome] += 1
+		writer.close()
+
+
+async def flood(n_flood, seconds):
+	stop = asyncio.Event()
+	outcomes = dict.fromkeys(('served', 'busy', 'reaped', 'closed', 'refused', 'open'), 0)
+	tasks = [asyncio.ensure_future(floodConnection(index % 2 == 0, stop, outcomes)) for index in range(n_flood)]
+	await asyncio.sleep(seconds)
+	stop.set()
+	for task in tasks:
+		task.cancel()
+	await asyncio.gather(*tasks, return_exceptions=True)
+	return outcomes
+
+
+def runFlood(n_flood, seconds, results):
+	results.put(asyncio.run(flood(n_flood, seconds)))
+
+############################################################################################################################
+
+async def phases(n_active, n_flood, seconds):
+	sessions = []
+	for _ in range(n_active):
+		reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+		await readPrompt(reader)
+		sessions.append((reader, writer))
+
+	latencies = []
+	start = time.perf_counter()
+	await asyncio.gather(*[activeSession(reader, writer, start + seconds, latencies) for reader, writer in sessions])
+	report("before flood", latencies, time.perf_counter() - start)
+
+	results = multiprocessing.Queue()
+	generator = multiprocessing.Process(target=runFlood, args=(n_flood, seconds + 2, results))
+	generator.start()
+	await asyncio.sleep(1)
+	latencies = []
+	start = time.perf_counter()
+	await asyncio.gather(*[activeSession(reader, writer, start + seconds, latencies) for reader, writer in sessions])
+	report("during flood", latencies, time.perf_counter() - start)
+	outcomes = await asyncio.get_running_loop().run_in_executor(None, results.get)
+	generator.join()
+	print("  flood connections: " + ", ".join("%d %s" % (count, outcome) for outcome, count in outcomes.items()))
+	for _, writer in sessions:
+		writer.close()
+
+
+def serve(site, options, n_active, n_flood, seconds):
+	# The server logs every selection, to a file rather than a pipe nobody reads while it runs
+	log = tempfile.TemporaryFile(mode='w+')
+	server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'w6_activity2_server.py'), '--mode', 'async', '--port', str(PORT),
+		'--url', site.url(), '--no-cache', '--snapshot', '', '--journal', '', '--refresh-interval', '0'] + options,
+		stdout=log, stderr=subprocess.DEVNULL)
+	try:
+		for _ in range(300):
+			try:
+				socket.create_connection(('127.0.0.1', PORT)).close()
+				break
+			except OSError:
+				time.sleep(0.1)
+		asyncio.run(phases(n_active, n_flood, seconds))
+	finally:
+		server.send_signal(signal.SIGINT)
+		server.wait()
+		log.seek(0)
+		output = log.read()
+	print("  " + next((line for line in output.splitlines() if line.startswith("Server stopped")), "no summary logged by the server"))
+
+
+if __name__ == '__main__':
+	n_active = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	n_flood = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+	seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+
+	soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+	resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 4 * (n_active + n_flood) + 256)), hard))
+
+	site = MockSite({'/': generatePage(2000)})
+	try:
+		for label, options in (("No limits", ['--idle-timeout', '0']),
+				("--max-sessions %d --idle-timeout %d" % (n_active + 100, IDLE_TIMEOUT),
+					['--max-sessions', str(n_active + 100), '--idle-timeout', str(IDLE_TIMEOUT)])):
+			print("%s, %d active sessions, %d flood connections:" % (label, n_active, n_flood))
+			serve(site, options, n_active, n_flood, seconds)
+	finally:
+		site.close()
@@ -0,0 +1,67 @@
+"""Compare peak memory and time of loading a large generated availability page in one piece versus streaming.
+
+Usage: python benchmarks/bench_ingest_memory.py [n_rows]
+"""
+
+# Import required module/s
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import parseAvailabilityTable, iterAvailabilityRows, buildAvailabilityTable
+from mock_site import generatePage
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def readChunks(path):
+	with open(path, 'rb') as f:
+		while True:
+			chunk = f.read(CHUNK_SIZE)
+			if not chunk:
+				return
+			yield chunk
+
+
+def loadPage(mode, path):
+	"""Load the page in the given mode in this process and print rows, seconds and peak RSS."""
+
+	start = time.perf_counter()
+	if mode == 'stream':
+		table = buildAvailabilityTable(iterAvailabilityRows(readChunks(path)))
+	else:
+		with open(path, 'rb') as f:
+			table = parseAvailabilityTable(f.read())
+	elapsed = time.perf_counter() - start
+	peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	print('%d %.3f %d %d' % (len(table), elapsed, peak_kib, hash(tuple(map(tuple, table.slots)))))
+
+
+if __name__ == '__main__':
+	if len(sys.argv) == 3:
+		loadPage(sys.argv[1], sys.argv[2])
+		sys.exit()
+
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+	with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False) as f:
+		f.write(generatePage(n_rows))
+		path = f.name
+
+	try:
+		print("Page: %d rows, %.1f MiB" % (n_rows, os.path.getsize(path) / 2**20))
+		results = {}
+		for mode in ('dom', 'stream'):
+			# Every mode runs in a fresh interpreter so that its peak RSS is not shared with the other one
+			out = subprocess.check_output([sys.executable, os.path.abspath(__file__), mode, path], text=True).split()
+			rows, seconds, peak_kib, digest = int(out[0]), float(out[1]), int(out[2]), out[3]
+			results[mode] = digest
+			print("%-6s rows=%d time=%.2fs peak_rss=%.1f MiB" % (mode, rows, seconds, peak_kib / 1024))
+		print("Both modes produced the same table:", results['dom'] == results['stream'])
+	finally:
+		os.remove(path)
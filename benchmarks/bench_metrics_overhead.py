@@ -0,0 +1,86 @@
+"""Measure the overhead of recording the latency metrics of the booking server.
+
+- observe: cost of recording one value in a labelled histogram, the loop running it being subtracted, and
+  apart from it the cost of one of the two clock reads timing every value
+- dialogue step: cost of one input of a session walking down the menu and back, recorded as the servers
+  record it (the step by level, plus the menus rendered on a miss of the menu cache), against the same
+  steps without metrics
+- render: cost of rendering all the metrics in the text format of Prometheus once they are populated
+
+Sessions run on the data of a generated page without any connection, their logs going to /dev/null.
+
+Usage: python benchmarks/bench_metrics_overhead.py [n_rows] [n_steps]
+"""
+
+# Import required module/s
+import contextlib
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from availability_refresh import SnapshotHolder
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from bench_async_sessions import CYCLE
+from menu_cache import MenuPayloadCache
+from mock_site import generatePage
+from server_metrics import ServerMetrics
+from w6_activity2_server import BookingSession
+
+
+def perStep(snapshots, metrics, n_steps):
+	"""Mean seconds per input over n_steps inputs of one session, with a cold menu cache, recorded in `metrics` unless it is None."""
+
+	BookingSession.metrics = metrics
+	BookingSession.menus = MenuPayloadCache()
+	session = BookingSession(snapshots)
+	session.start()
+	start = time.perf_counter()
+	for i in range(n_steps):
+		step_start = time.perf_counter()
+		level = session.level
+		session.step(CYCLE[i % len(CYCLE)])
+		if metrics is not None:
+			metrics.step.observe(time.perf_counter() - step_start, level)
+	return (time.perf_counter() - start) / n_steps
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	n_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+	metrics = ServerMetrics()
+	levels = ('dose', 'age_group', 'state', 'district', 'hospital', 'slot')
+	labels = [levels[i % len(levels)] for i in range(n_steps)]
+	observe, clock = metrics.send.observe, time.perf_counter
+	start = time.perf_counter()
+	for label in labels:
+		pass
+	loop = time.perf_counter() - start
+	start = time.perf_counter()
+	for label in labels:
+		observe(0.0003, label)
+	recorded = time.perf_counter() - start - loop
+	start = time.perf_counter()
+	for label in labels:
+		clock()
+	read = time.perf_counter() - start - loop
+	print("observe:        %7.0f ns per value, plus %.0f ns per clock read" % (recorded / n_steps * 1e9, read / n_steps * 1e9))
+
+	snapshots = SnapshotHolder(buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)])))
+	with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+		# The runs with and without metrics alternate, so that a slower spell of the machine hits both alike
+		runs = [(perStep(snapshots, None, n_steps), perStep(snapshots, ServerMetrics(), n_steps)) for _ in range(5)]
+		plain = min(run[0] for run in runs)
+		recorded = min(run[1] for run in runs)
+	print("dialogue step:  %7.2f us without metrics, %.2f us recorded, %.1f%% overhead"
+		% (plain * 1e6, recorded * 1e6, 100 * (recorded - plain) / plain))
+
+	metrics = ServerMetrics()
+	with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+		perStep(snapshots, metrics, n_steps)
+	start = time.perf_counter()
+	text = metrics.render()
+	print("render:         %7.2f ms for %d lines" % ((time.perf_counter() - start) * 1000, text.count('\n')))
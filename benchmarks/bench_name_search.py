@@ -0,0 +1,70 @@
+"""Measure the build time of the name search index and its prefix and fuzzy lookups over tens of thousands of hospitals.
+
+The index of a refresh changing 1% of the rows is also updated from the change set, timed against a full
+build and checked to be equal to it.
+
+Usage: python benchmarks/bench_name_search.py [n_rows] [n_queries]
+"""
+
+# Import required module/s
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows, updateAvailabilityTable
+from mock_site import changedRows, generatePage
+from name_search import NameSearchIndex, searchIndex
+
+
+# Attributes of NameSearchIndex equal between an index updated from a change set and one built in full
+INDEX_ATTRIBUTES = ('hospitals', '_paths', '_prefix_keys', '_prefix_names', '_trigrams')
+
+
+def typo(name, rng):
+	"""Name with one letter dropped."""
+
+	position = rng.randrange(len(name))
+	return name[:position] + name[position + 1:]
+
+
+def perQuery(index, queries, **filters):
+	"""Mean seconds per search and mean number of hospitals found."""
+
+	found = 0
+	start = time.perf_counter()
+	for query in queries:
+		found += len(index.search(query, **filters))
+	return (time.perf_counter() - start) / len(queries), found / len(queries)
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+	n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+	table = buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)]))
+	index = searchIndex(table)
+	names = sorted({path[4] for path in index.hospitals})
+	print("%d rows, %d hospital paths, %d hospital names, index built in %.0f ms"
+		% (n_rows, len(index.hospitals), len(names), index.build_seconds * 1000))
+
+	refreshed = updateAvailabilityTable(table, changedRows(table, 0.01))
+	updated = searchIndex(refreshed, table)
+	rebuilt = NameSearchIndex(refreshed)
+	for attribute in INDEX_ATTRIBUTES:
+		assert getattr(updated, attribute) == getattr(rebuilt, attribute), attribute
+	print("refresh %r: index updated in %.0f ms, built in full in %.0f ms"
+		% (refreshed.changes, updated.build_seconds * 1000, rebuilt.build_seconds * 1000))
+
+	rng = random.Random(0)
+	picked = [rng.choice(names) for _ in range(n_queries)]
+	for label, queries, filters in (
+			("full name", [name.lower() for name in picked], {}),
+			("prefix", [name[:len(name) - 1] for name in picked], {}),
+			("district", ['district %d-' % rng.randrange(36) for _ in range(n_queries)], {'dose': '1', 'age_group': '18+'}),
+			("typo (fuzzy)", [typo(name, rng) for name in picked], {}),
+			("no match", ['zq%dxw' % i for i in range(n_queries)], {})):
+		seconds, found = perQuery(index, queries, **filters)
+		print("%-14s %7.1f us per search, %.1f hospitals found" % (label + ':', seconds * 1e6, found))
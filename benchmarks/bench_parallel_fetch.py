@@ -0,0 +1,56 @@
+"""Compare fetching many availability pages one by one with fresh connections against the pooled concurrent fetcher.
+
+The pages are served by a local stand-in of the website with injected latency.
+
+Usage: python benchmarks/bench_parallel_fetch.py [n_pages] [rows_per_page] [latency_seconds]
+"""
+
+# Import required module/s
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import w6_activity2_server as server
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from page_cache import PageCache
+from page_fetcher import SourceFetcher
+from mock_site import MockSite, generatePage
+
+
+if __name__ == '__main__':
+	n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+	rows_per_page = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+	site = MockSite({'/state/%d' % n: generatePage(rows_per_page, seed=n) for n in range(n_pages)}, latency=latency)
+	urls = [site.url('/state/%d' % n) for n in range(n_pages)]
+	print("%d pages of %d rows, %.0f ms latency per request" % (n_pages, rows_per_page, latency * 1000))
+
+	site.connections = 0
+	start = time.perf_counter()
+	table = buildAvailabilityTable(row for url in urls for row in iterAvailabilityRows([requests.get(url).content]))
+	print("sequential, new connection per page: %7.1f ms, %d rows, %d connections" % ((time.perf_counter() - start) * 1000, len(table), site.connections))
+
+	for workers in (4, 16):
+		fetcher = SourceFetcher(workers=workers)
+		site.connections = 0
+		start = time.perf_counter()
+		table = server.fetchMultipleWebsiteData(urls, fetcher)
+		print("pooled, %2d workers:                 %7.1f ms, %d rows, %d connections" % (workers, (time.perf_counter() - start) * 1000, len(table), site.connections))
+		fetcher.close()
+
+	with tempfile.TemporaryDirectory() as directory:
+		fetcher = SourceFetcher(PageCache(directory), workers=16)
+		table = server.fetchMultipleWebsiteData(urls, fetcher)
+		site.connections = 0
+		start = time.perf_counter()
+		refreshed = server.fetchMultipleWebsiteData(urls, fetcher, previous=table)
+		print("pooled, 16 workers, revalidated:    %7.1f ms, unchanged: %s, %d connections" % ((time.perf_counter() - start) * 1000, refreshed is table, site.connections))
+		fetcher.close()
+
+	site.close()
@@ -0,0 +1,91 @@
+"""Measure how the throughput of the prefork server mode scales with its number of worker processes.
+
+For every number of workers the server is started on the data of a generated page and loaded by one
+client process per worker, each running active sessions that walk down the menu and back up again.
+
+Usage: python benchmarks/bench_prefork_scaling.py [max_workers] [sessions_per_client] [seconds]
+"""
+
+# Import required module/s
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bench_async_sessions
+from mock_site import MockSite, generatePage
+
+
+PORT = 24791
+
+
+async def runClient(n_sessions, seconds):
+	latencies = []
+	deadline = time.perf_counter() + seconds
+	await asyncio.gather(*[bench_async_sessions.activeSession(deadline, latencies) for _ in range(n_sessions)])
+	return len(latencies)
+
+
+def workerMemory(master_pid):
+	"""RSS and private (unshared) memory in MiB of every worker of the master."""
+
+	with open('/proc/%d/task/%d/children' % (master_pid, master_pid)) as f:
+		pids = [int(pid) for pid in f.read().split()]
+	usage = []
+	for pid in pids:
+		fields = {}
+		with open('/proc/%d/smaps_rollup' % pid) as f:
+			for line in f:
+				parts = line.split()
+				if len(parts) == 3 and parts[2] == 'kB':
+					fields[parts[0].rstrip(':')] = int(parts[1])
+		usage.append((fields['Rss'] / 1024, (fields['Private_Clean'] + fields['Private_Dirty']) / 1024))
+	return usage
+
+
+def waitForPort(port):
+	for _ in range(300):
+		try:
+			socket.create_connection(('127.0.0.1', port)).close()
+			return
+		except OSError:
+			time.sleep(0.1)
+
+
+if __name__ == '__main__':
+	if len(sys.argv) == 5 and sys.argv[1] == '--client':
+		bench_async_sessions.PORT = int(sys.argv[2])
+		print(asyncio.run(runClient(int(sys.argv[3]), float(sys.argv[4]))))
+		sys.exit()
+
+	max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(4, os.cpu_count() or 1)
+	sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+	seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+	print("%d cores" % (os.cpu_count() or 1))
+
+	site = MockSite({'/': generatePage(2000)})
+	workers = 1
+	baseline = None
+	while workers <= max_workers:
+		server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'w6_activity2_server.py'), '--mode', 'prefork', '--workers', str(workers),
+			'--port', str(PORT), '--url', site.url(), '--no-cache', '--snapshot', '', '--journal', '', '--refresh-interval', '0'], stdout=subprocess.DEVNULL)
+		try:
+			waitForPort(PORT)
+			clients = [subprocess.Popen([sys.executable, __file__, '--client', str(PORT), str(sessions), str(seconds)], stdout=subprocess.PIPE)
+				for _ in range(workers)]
+			steps = sum(int(client.communicate()[0]) for client in clients)
+			memory = workerMemory(server.pid)
+		finally:
+			server.terminate()
+			server.wait()
+		throughput = steps / seconds
+		baseline = baseline or throughput
+		print("%2d workers: %8.0f steps/s, %.2fx one worker, per worker RSS %.1f MiB of which private %.1f MiB"
+			% (workers, throughput, throughput / baseline, max(rss for rss, _ in memory), max(private for _, private in memory)))
+		workers *= 2
+	site.close()
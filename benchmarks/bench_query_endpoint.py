@@ -0,0 +1,100 @@
+"""Measure the requests per second of the JSON query endpoint, over keep-alive connections.
+
+The server runs in its own process in async mode with the data of a generated page. Client threads each
+keep one connection open and query the menu levels of random hospitals, the slots included, for a while.
+
+Usage: python benchmarks/bench_query_endpoint.py [n_clients] [seconds]
+"""
+
+# Import required module/s
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_site import MockSite, generatePage
+from query_server import QUERY_LEVELS
+
+
+PORT = 24792
+HTTP_PORT = 24793
+
+
+def get(connection, endpoint, params):
+	connection.request('GET', endpoint + '?' + urllib.parse.urlencode(params))
+	response = connection.getresponse()
+	return response.status, json.loads(response.read())
+
+############################################################################################################################
+
+def hospitalPaths(connection):
+	"""Walk the endpoints down to every hospital, returning their selections."""
+
+	paths = [{}]
+	for endpoint, fields in list(QUERY_LEVELS.items())[:-1]:
+		field = list(QUERY_LEVELS.values())[len(fields) + 1][-1]
+		deeper = []
+		for params in paths:
+			for option in get(connection, endpoint, params)[1]['options']:
+				deeper.append(dict(params, **{field: option['hospital'] if isinstance(option, dict) else option}))
+		paths = deeper
+	return paths
+
+############################################################################################################################
+
+def queryInLoop(paths, deadline, counts, seed):
+	rng = random.Random(seed)
+	connection = http.client.HTTPConnection('127.0.0.1', HTTP_PORT)
+	n = 0
+	while time.perf_counter() < deadline:
+		params = rng.choice(paths)
+		for endpoint, fields in QUERY_LEVELS.items():
+			status, _ = get(connection, endpoint, {field: params[field] for field in fields})
+			assert status == 200
+			n += 1
+	counts.append(n)
+	connection.close()
+
+
+if __name__ == '__main__':
+	n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+	seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+
+	site = MockSite({'/': generatePage(2000)})
+	server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'w6_activity2_server.py'), '--mode', 'async', '--port', str(PORT),
+		'--http-port', str(HTTP_PORT), '--url', site.url(), '--no-cache', '--snapshot', '', '--journal', '', '--refresh-interval', '0'],
+		stdout=subprocess.DEVNULL)
+	try:
+		for _ in range(300):
+			try:
+				socket.create_connection(('127.0.0.1', HTTP_PORT)).close()
+				break
+			except OSError:
+				time.sleep(0.1)
+		connection = http.client.HTTPConnection('127.0.0.1', HTTP_PORT)
+		paths = hospitalPaths(connection)
+		connection.close()
+		print("%d hospitals, %d clients" % (len(paths), n_clients))
+
+		counts = []
+		start = time.perf_counter()
+		threads = [threading.Thread(target=queryInLoop, args=(paths, start + seconds, counts, i)) for i in range(n_clients)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		elapsed = time.perf_counter() - start
+		print("%d requests in %.1f s, %.0f requests/s" % (sum(counts), elapsed, sum(counts) / elapsed))
+	finally:
+		server.terminate()
+		server.wait()
+		site.close()
@@ -0,0 +1,75 @@
+"""Stress the slot reservations from many threads at once and check that no slot is booked twice.
+
+Threads keep reserving slots of randomly picked hospitals and dates of a generated page, half of them
+crowding onto a few hospitals so that their last slots are fought over. At the end the slots taken at
+every hospital on every date are compared with the slots it published and with the Booking IDs granted.
+
+Usage: python benchmarks/bench_reservations.py [n_rows] [n_threads] [reservations_per_thread]
+"""
+
+# Import required module/s
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from mock_site import generatePage
+from slot_reservations import SlotReservations
+
+
+def hospitalPaths(node, path=()):
+	"""Paths of all the hospitals of the menu tree under `node`."""
+
+	if node.rows:
+		yield path
+	for option, child in node.children.items():
+		yield from hospitalPaths(child, path + (option,))
+
+
+def reserveMany(reservations, table, targets, n, seed, booking_ids):
+	rng = random.Random(seed)
+	granted = []
+	for _ in range(n):
+		path, date = rng.choice(targets)
+		booking_id = reservations.reserve(table, path, date)
+		if booking_id is not None:
+			granted.append(booking_id)
+	booking_ids.extend(granted)
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+	per_thread = int(sys.argv[3]) if len(sys.argv) > 3 else 50000
+
+	table = buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)]))
+	paths = list(hospitalPaths(table.index.root))
+	everywhere = [(path, date) for path in paths for date in table.dates]
+	crowded = [(path, date) for path in paths[:3] for date in table.dates]
+	print("%d rows, %d hospitals, %d dates, %d threads" % (n_rows, len(paths), len(table.dates), n_threads))
+
+	reservations = SlotReservations()
+	booking_ids = []
+	threads = [threading.Thread(target=reserveMany, args=(reservations, table, crowded if i % 2 else everywhere, per_thread, i, booking_ids))
+		for i in range(n_threads)]
+	start = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	elapsed = time.perf_counter() - start
+
+	attempts = n_threads * per_thread
+	print("%d attempts in %.2f s, %.0f reservations/s, %d granted, %d refused"
+		% (attempts, elapsed, attempts / elapsed, reservations.reserved, reservations.rejected))
+
+	overbooked = [(path, date) for path, date in everywhere if reservations.taken(path, date) > reservations.capacity(table, path, date)]
+	sold_out = sum(1 for path, date in crowded if reservations.remaining(table, path, date) == 0)
+	total_taken = sum(reservations.taken(path, date) for path, date in everywhere)
+	print("overbooked hospital dates: %d, crowded dates sold out: %d of %d" % (len(overbooked), sold_out, len(crowded)))
+	print("slots taken %d, Booking IDs granted %d, unique %d" % (total_taken, len(booking_ids), len(set(booking_ids))))
+	assert not overbooked and total_taken == len(booking_ids) == len(set(booking_ids)) == reservations.reserved
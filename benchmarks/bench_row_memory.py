@@ -0,0 +1,60 @@
+"""Measure the memory held per row of the availability table by each representation of the rows.
+
+- bs4 tags: the parsed document with a list of the cell Tags of every row, as first kept by the server
+- tuples of str: one tuple of freshly parsed strings and a list of slots per row
+- AvailabilityTable: dictionary-encoded columns, slot matrix and row keys, with the menu index reported apart
+
+Usage: python benchmarks/bench_row_memory.py [n_rows]
+"""
+
+# Import required module/s
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from mock_site import generatePage
+
+
+def retained(build):
+	"""Bytes still allocated by `build` once it returns, while its result is alive."""
+
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	result = build()
+	gc.collect()
+	size = tracemalloc.get_traced_memory()[0] - before
+	tracemalloc.stop()
+	return size, result
+
+############################################################################################################################
+
+def bs4Rows(page):
+	from bs4 import BeautifulSoup
+
+	soup = BeautifulSoup(page, 'html.parser')
+	return soup, [tr.find_all('td') for tr in soup.find('tbody').find_all('tr')]
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+	page = generatePage(n_rows)
+	print("%d rows" % n_rows)
+
+	size, result = retained(lambda: bs4Rows(page))
+	print("bs4 tags:          %8.0f bytes per row" % (size / n_rows))
+	del result
+
+	size, result = retained(lambda: list(iterAvailabilityRows([page])))
+	print("tuples of str:     %8.0f bytes per row" % (size / n_rows))
+	del result
+
+	size, table = retained(lambda: buildAvailabilityTable(iterAvailabilityRows([page])))
+	sizes = table.sizeInBytes()
+	index_size = table.index.sizeInBytes()
+	print("AvailabilityTable: %8.0f bytes per row (columns %.0f, slots %.0f, row keys %.0f), plus menu index %.0f"
+		% ((size - index_size) / len(table), sizes['columns'] / len(table), sizes['slots'] / len(table), sizes['positions'] / len(table), index_size / len(table)))
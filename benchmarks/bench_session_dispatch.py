@@ -0,0 +1,68 @@
+"""Measure the cost of dispatching one input to a booking session and the memory held by an open session.
+
+Sessions run on the data of a generated page without any connection, their logs going to /dev/null:
+
+- menu cycle: walk down the menu to the slots of a Vaccination Center and back up to the Dose
+- back only: go back from the Dose, which only re-renders its prompt
+- open session: memory held by a session once it has sent its first prompt, over many sessions
+
+Usage: python benchmarks/bench_session_dispatch.py [n_rows] [n_steps] [n_sessions]
+"""
+
+# Import required module/s
+import contextlib
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from availability_refresh import SnapshotHolder
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from bench_async_sessions import CYCLE
+from mock_site import generatePage
+from w6_activity2_server import BookingSession
+
+
+def perStep(session, inputs, n_steps):
+	"""Mean seconds taken by `step` over n_steps inputs, cycling through `inputs`."""
+
+	start = time.perf_counter()
+	for i in range(n_steps):
+		session.step(inputs[i % len(inputs)])
+	return (time.perf_counter() - start) / n_steps
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	n_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+	n_sessions = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+
+	snapshots = SnapshotHolder(buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)])))
+	print("%d rows, %d steps" % (n_rows, n_steps))
+
+	with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+		session = BookingSession(snapshots)
+		session.start()
+		cycle = perStep(session, CYCLE, n_steps)
+		back = perStep(session, ('b',), n_steps)
+
+		gc.collect()
+		tracemalloc.start()
+		before = tracemalloc.get_traced_memory()[0]
+		sessions = []
+		for _ in range(n_sessions):
+			session = BookingSession(snapshots)
+			session.start()
+			sessions.append(session)
+		gc.collect()
+		size = tracemalloc.get_traced_memory()[0] - before
+		tracemalloc.stop()
+
+	print("menu cycle:   %6.1f us per step" % (cycle * 1e6))
+	print("back only:    %6.1f us per step" % (back * 1e6))
+	print("open session: %6.0f bytes each, over %d sessions" % (size / n_sessions, n_sessions))
+	print("menu cache:   %s" % BookingSession.menus.describe())
@@ -0,0 +1,80 @@
+"""Compare availability queries over per-row Python lists of slots against the vectorized slot matrix.
+
+The table is generated with thousands of hospitals and a window of about three months of dates.
+
+Usage: python benchmarks/bench_slot_queries.py [n_rows] [n_dates]
+"""
+
+# Import required module/s
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows, updateAvailabilityTable
+from mock_site import generatePage
+
+
+def timed(function, repeat=5):
+	start = time.perf_counter()
+	for _ in range(repeat):
+		result = function()
+	return (time.perf_counter() - start) / repeat, result
+
+############################################################################################################################
+
+def totalsByDistrictLoop(table, slot_lists):
+	totals = {}
+	for row in table.positions.values():
+		district_totals = totals.setdefault(table.district[row], [0] * len(table.dates))
+		for date, count in enumerate(slot_lists[row]):
+			district_totals[date] += count
+	return totals
+
+############################################################################################################################
+
+def hospitalsWithAvailabilityLoop(table, slot_lists):
+	return sorted({table.hospital[row] for row in table.positions.values() if any(slot_lists[row])})
+
+############################################################################################################################
+
+def changedRowsLoop(table, slot_lists, rows):
+	changed = 0
+	for hospital, state, district, vaccine, dose, age, slots in rows:
+		if slot_lists[table.positions[(hospital, district, state, dose, age, vaccine)]] != slots:
+			changed += 1
+	return changed
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	n_dates = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+
+	table = buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows, n_dates=n_dates)]))
+	slot_lists = table.slots.tolist()
+	print("%d rows, %d hospitals, %d dates, slot matrix %.1f MiB" % (len(table), len(set(table.hospital)), len(table.dates), table.slots.nbytes / 2 ** 20))
+
+	loop_seconds, loop_totals = timed(lambda: totalsByDistrictLoop(table, slot_lists))
+	table.categoryCodes('district')
+	vector_seconds, (names, totals) = timed(lambda: table.totalSlotsBy('district'))
+	assert all(loop_totals[name] == totals[code].tolist() for code, name in enumerate(names))
+	print("total slots per district and date:  loop %8.2f ms, vectorized %7.2f ms" % (loop_seconds * 1000, vector_seconds * 1000))
+
+	loop_seconds, loop_hospitals = timed(lambda: hospitalsWithAvailabilityLoop(table, slot_lists))
+	table.categoryCodes('hospital')
+	vector_seconds, hospitals = timed(lambda: table.hospitalsWithAvailability())
+	assert loop_hospitals == hospitals
+	print("hospitals with any slot available:  loop %8.2f ms, vectorized %7.2f ms" % (loop_seconds * 1000, vector_seconds * 1000))
+
+	dose = table.index.root.options[0]
+	state_rows = lambda: table.rowsUnder(dose, '18+', 'State 0')
+	loop_seconds, loop_dates = timed(lambda: [table.dates[date] for date in range(len(table.dates)) if any(slot_lists[row][date] for row in state_rows())])
+	vector_seconds, dates = timed(lambda: table.availableDates(state_rows()))
+	assert loop_dates == dates
+	print("dates with slots in one state:      loop %8.2f ms, vectorized %7.2f ms" % (loop_seconds * 1000, vector_seconds * 1000))
+
+	fresh_rows = list(iterAvailabilityRows([generatePage(n_rows, n_dates=n_dates)]))
+	loop_seconds, _ = timed(lambda: changedRowsLoop(table, slot_lists, fresh_rows), repeat=1)
+	vector_seconds, _ = timed(lambda: updateAvailabilityTable(table, fresh_rows), repeat=1)
+	print("refresh diff of identical data:     loop %8.2f ms, table update %5.2f ms (including key matching)" % (loop_seconds * 1000, vector_seconds * 1000))
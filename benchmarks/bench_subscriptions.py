@@ -0,0 +1,87 @@
+"""Measure the matching of tens of thousands of subscriptions against a refresh of the availability data.
+
+Subscriptions wait for slots in random districts or hospitals, some of them on a few dates only. A refresh
+then publishes more slots on a random date for a fraction of the rows. It is matched through the change set,
+through a full comparison of the subscribed districts as for a table without one, and, on a sample,
+subscription by subscription as polling Clients would check it.
+
+Usage: python benchmarks/bench_subscriptions.py [n_rows] [n_subscriptions] [changed_fraction]
+"""
+
+# Import required module/s
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows, updateAvailabilityTable
+from availability_subscriptions import SubscriptionIndex
+from mock_site import generatePage
+
+
+# Number of subscriptions checked one by one to estimate polling
+POLLING_SAMPLE = 1000
+
+
+def subscribeAll(index, subscriptions):
+	return [index.subscribe(path, dates)[1] for path, dates in subscriptions]
+
+
+def pollOne(previous, table, path, dates):
+	"""Whether one subscription has new slots, checked on its own by comparing the rows under it."""
+
+	before = previous.slots[previous.rowsUnder(*path)].sum(axis=0)
+	after = table.slots[table.rowsUnder(*path)].sum(axis=0)
+	return any(after[column] > before[column] for column, date in enumerate(table.dates) if dates is None or date in dates)
+
+
+if __name__ == '__main__':
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+	n_subscriptions = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+	changed_fraction = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+
+	table = buildAvailabilityTable(iterAvailabilityRows([generatePage(n_rows)]))
+	rng = random.Random(0)
+	hospitals = []
+	for dose, age_node in table.index.root.children.items():
+		for age, state_node in age_node.children.items():
+			for state, district_node in state_node.children.items():
+				for district, hospital_node in district_node.children.items():
+					hospitals.extend((dose, age, state, district, hospital) for hospital in hospital_node.children)
+	subscriptions = []
+	for _ in range(n_subscriptions):
+		path = rng.choice(hospitals)
+		dates = rng.sample(table.dates, 2) if rng.random() < 0.5 else None
+		subscriptions.append((path if rng.random() < 0.5 else path[:4], dates))
+
+	rows = []
+	for hospital, state, district, vaccine, dose, age, slots in table.iterRows():
+		if rng.random() < changed_fraction:
+			slots[rng.randrange(len(slots))] += rng.randint(1, 50)
+		rows.append((hospital, state, district, vaccine, dose, age, slots))
+	start = time.perf_counter()
+	refreshed = updateAvailabilityTable(table, rows)
+	print("%d rows, %r applied in %.0f ms, %d subscriptions over %d hospitals"
+		% (n_rows, refreshed.changes, (time.perf_counter() - start) * 1000, n_subscriptions, len(hospitals)))
+
+	index = SubscriptionIndex()
+	futures = subscribeAll(index, subscriptions)
+	fired = index.match(table, refreshed)
+	assert fired == sum(future.done() for future in futures)
+	print("change set:     %8.2f ms per refresh, %d notified" % (index.last_match_seconds * 1000, fired))
+
+	full = SubscriptionIndex()
+	subscribeAll(full, subscriptions)
+	changes, refreshed.changes = refreshed.changes, None
+	assert full.match(table, refreshed) == fired
+	refreshed.changes = changes
+	print("full compare:   %8.2f ms per refresh" % (full.last_match_seconds * 1000))
+
+	sample = subscriptions[:POLLING_SAMPLE]
+	start = time.perf_counter()
+	polled = [pollOne(table, refreshed, path, dates) for path, dates in sample]
+	seconds = (time.perf_counter() - start) / len(sample) * n_subscriptions
+	assert polled == [future.done() for future in futures[:POLLING_SAMPLE]]
+	print("polling:        %8.2f ms per refresh, estimated from %d subscriptions" % (seconds * 1000, len(sample)))
@@ -0,0 +1,213 @@
+# Import required module/s
+import argparse
+import datetime
+import email.utils
+import hashlib
+import http.server
+import os
+import random
+import threading
+import time
+
+
+# Path of the one-off dump of the web-page used as the template for generated pages
+HTML_CONTENT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'HTML_content.txt')
+
+ROW_TEMPLATE = '''<tr class="row{num}"><td class="hospital_name">{hospital}</td><td class="state_name">{state}</td><td class="district_name">{district}</td>{slots}<td class="vaccine_name">{vaccine}</td><td class="dose_num">{dose}</td><td class="age">{age}</td></tr>
+'''
+HEADER_TEMPLATE = '''<thead><tr><td class="hospital_name">Hospital</td><td class="state_name">State</td><td class="district_name">District</td>{dates}<td class="vaccine_name">Vaccine</td><td class="dose_num">Dose</td><td class="age">Age</td></tr></thead>
+'''
+FIRST_DATE = datetime.date(2021, 5, 15)
+
+
+def generatePage(n_rows, seed=0, n_states=36, districts_per_state=20, n_dates=7):
+	"""Generate a copy of HTML_content.txt whose table body holds `n_rows` synthetic rows.
+
+	Parameters
+	----------
+	n_rows : int
+		Number of rows of the table body
+	seed : int
+		Seed of the random generator, so the same page is generated for the same arguments
+	n_states : int
+		Number of distinct states
+	districts_per_state : int
+		Number of distinct districts in every state
+	n_dates : int
+		Number of successive dates with a slot column, starting on May 15
+
+	Returns
+	-------
+	str
+		HTML content of the generated web-page
+	"""
+
+	with open(HTML_CONTENT_PATH) as f:
+		template = f.read()
+	head = template[:template.index('<thead>')]
+	tail = template[template.index('</tbody>'):]
+
+	slot_classes = []
+	header_dates = []
+	for day in range(n_dates):
+		date = FIRST_DATE + datetime.timedelta(days=day)
+		slot_classes.append(date.strftime('%b_%d').lower())
+		header_dates.append('<td class="%s">%s</td>' % (slot_classes[-1], date.strftime('%b %d')))
+
+	rng = random.Random(seed)
+	parts = [head, HEADER_TEMPLATE.format(dates=''.join(header_dates)), '<tbody>\n']
+	for num in range(1, n_rows + 1):
+		state = rng.randrange(n_states)
+		district = rng.randrange(districts_per_state)
+		slots = ''.join('<td class="%s">%d</td>' % (name, rng.choice((0, rng.randrange(200)))) for name in slot_classes)
+		parts.append(ROW_TEMPLATE.format(
+			num=num, hospital='Hospital %d' % rng.randrange(n_rows // 4 + 1), state='State %d' % state,
+			district='District %d-%d' % (state, district), slots=slots, vaccine=rng.choice(('Covaxin', 'Covishield')),
+			dose=rng.choice(('1', '2')), age=rng.choice(('18+', '45+'))))
+	parts.append(tail)
+
+	return ''.join(parts)
+
+
+def changedRows(table, fraction, seed=0):
+	"""Rows of a table as a refresh of its web-page gives them, with about `fraction` of them changed.
+
+	A third of the changed rows are dropped, the others get more slots on one date, and as many new rows as
+	dropped ones appear, half of them at new hospitals and half at known hospital names in new districts.
+
+	Parameters
+	----------
+	table : availability_store.AvailabilityTable
+		Table refreshed
+	fraction : float
+		Share of the rows changed
+	seed : int
+		Seed of the random generator
+
+	Returns
+	-------
+	list
+		(hospital, state, district, vaccine, dose, age, slots) tuples, as taken by `updateAvailabilityTable`
+	"""
+
+	rng = random.Random(seed)
+	rows = []
+	for hospital, state, district, vaccine, dose, age, slots in table.iterRows():
+		draw = rng.random()
+		if draw < fraction / 3:
+			continue
+		slots = list(slots)
+		if draw < fraction:
+			slots[rng.randrange(len(slots))] += rng.randint(1, 50)
+		rows.append((hospital, state, district, vaccine, dose, age, slots))
+	states = sorted(set(row[1] for row in rows))
+	for num in range(int(len(table) * fraction / 3)):
+		state = rng.choice(states)
+		hospital = 'New Hospital %d' % num if num % 2 else 'Hospital %d' % rng.randrange(len(table) // 4 + 1)
+		rows.append((hospital, state, 'New District %d' % rng.randrange(3), rng.choice(('Covaxin', 'Covishield')),
+			rng.choice(('1', '2')), rng.choice(('18+', '45+')), [rng.randrange(200) for _ in table.dates]))
+	return rows
+
+############################################################################################################################
+
+class MockSiteHandler(http.server.BaseHTTPRequestHandler):
+	"""Stand-in for the availability website, answering conditional requests with 304 Not Modified."""
+
+	protocol_version = 'HTTP/1.1'
+
+	def setup(self):
+		super().setup()
+		with self.server.site.lock:
+			self.server.site.connections += 1
+
+	def do_GET(self):
+		site = self.server.site
+		if site.latency:
+			time.sleep(site.latency)
+
+		with site.lock:
+			site.requests += 1
+			content = site.pages.get(self.path.split('?')[0])
+		if content is None:
+			self.send_error(404)
+			return
+
+		etag = '"%s"' % hashlib.sha1(content).hexdigest()
+		if self.headers.get('If-None-Match') == etag:
+			with site.lock:
+				site.not_modified += 1
+			self.send_response(304)
+			self.send_header('ETag', etag)
+			self.send_header('Content-Length', '0')
+			self.end_headers()
+			return
+
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/html; charset=utf-8')
+		self.send_header('Content-Length', str(len(content)))
+		self.send_header('ETag', etag)
+		self.send_header('Last-Modified', site.last_modified)
+		self.end_headers()
+		self.wfile.write(content)
+
+	def log_message(self, format, *args):
+		pass
+
+############################################################################################################################
+
+class MockSite:
+	"""Local HTTP server serving generated availability pages, run in a background thread.
+
+	Parameters
+	----------
+	pages : dict
+		Content of the pages, with Key as 'Path' and Value as 'HTML content'
+	port : int
+		Port to listen on, any free port if 0
+	latency : float
+		Delay in seconds added before answering every request
+	"""
+
+	def __init__(self, pages, port=0, latency=0.0):
+		self.pages = {path: content.encode('utf-8') if isinstance(content, str) else content for path, content in pages.items()}
+		self.latency = latency
+		self.lock = threading.Lock()
+		self.requests = 0
+		self.not_modified = 0
+		self.connections = 0
+		self.last_modified = email.utils.formatdate(usegmt=True)
+		self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', port), MockSiteHandler)
+		self.httpd.daemon_threads = True
+		self.httpd.site = self
+		self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+		self.thread.start()
+
+	def url(self, path='/'):
+		return 'http://127.0.0.1:%d%s' % (self.httpd.server_address[1], path)
+
+	def setPage(self, path, content):
+		with self.lock:
+			self.pages[path] = content.encode('utf-8') if isinstance(content, str) else content
+			self.last_modified = email.utils.formatdate(usegmt=True)
+
+	def close(self):
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Serve a generated copy of the availability web-page on localhost")
+	parser.add_argument('--rows', type=int, default=0, help="Rows of the generated page, HTML_content.txt itself if 0")
+	parser.add_argument('--port', type=int, default=8000)
+	parser.add_argument('--dates', type=int, default=7, help="Dates of the generated page")
+	parser.add_argument('--latency', type=float, default=0.0, help="Delay in seconds added to every response")
+	args = parser.parse_args()
+
+	if args.rows:
+		content = generatePage(args.rows, n_dates=args.dates)
+	else:
+		with open(HTML_CONTENT_PATH) as f:
+			content = f.read()
+	site = MockSite({'/': content}, port=args.port, latency=args.latency)
+	print("Serving the availability page at", site.url())
+	site.thread.join()
@@ -0,0 +1,223 @@
+# Import required module/s
+import fcntl
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+
+# Default seconds the journal waits after the first pending booking to gather others into the same commit; the
+# bookings queued while an fsync is in progress always share the next one
+DEFAULT_COMMIT_WINDOW = 0.0
+
+
+class JournalLockedError(OSError):
+	"""Raised when a journal is opened while another process holds it, e.g. a server running during a bulk pass."""
+
+############################################################################################################################
+
+class BookingJournal:
+	"""Append-only journal of the confirmed bookings, one JSON line each, made durable with group commit.
+
+	`append` only queues the booking and returns a Future; a writer thread takes all the bookings queued
+	during its previous fsync, and during `commit_window` more, writes them with one write and makes them
+	durable with one fsync, then resolves all their Futures. A booking must be confirmed to the Client only once its Future is
+	done, and any number of bookings arriving together then cost a single fsync.
+
+	The writer thread is started on the first `append` of every process, so a journal opened before the
+	pre-fork workers are forked serves each of them; their batches are appended to the same file, every
+	batch with a single write.
+
+	The journal holds an exclusive lock on its file until it is closed, shared by the processes forked
+	meanwhile, so that no other process appends to it with slots counted apart: opening it again from
+	another process fails at once with JournalLockedError.
+
+	Parameters
+	----------
+	path : str
+		Journal file, created if missing
+	commit_window : float
+		Seconds to wait after a booking is queued for others to join its commit, 0 to commit at once
+
+	Attributes
+	----------
+	records : int
+		Number of bookings made durable by this process
+	commits : int
+		Number of fsyncs done by this process
+	"""
+
+	def __init__(self, path, commit_window=DEFAULT_COMMIT_WINDOW):
+		self.path = path
+		self.commit_window = commit_window
+		self.records = 0
+		self.commits = 0
+		directory = os.path.dirname(path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		self._fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+		try:
+			fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+		except BlockingIOError:
+			os.close(self._fd)
+			raise JournalLockedError("Journal %s is in use by another process, e.g. a running server" % path) from None
+		self._dropTornLine()
+		self._pid = None
+		self._closing = False
+
+	def _dropTornLine(self):
+		# A crash in the middle of a write leaves a last line without its newline, which would run into the next one
+		size = os.fstat(self._fd).st_size
+		end = size
+		while end > 0:
+			start = max(0, end - 4096)
+			chunk = os.pread(self._fd, end - start, start)
+			newline = chunk.rfind(b'\n')
+			if newline >= 0:
+				end = start + newline + 1
+				break
+			end = start
+		if end < size:
+			os.ftruncate(self._fd, end)
+
+	def _startWriter(self):
+		self._pid = os.getpid()
+		self._condition = threading.Condition()
+		self._pending = []
+		self._writer = threading.Thread(target=self._run, name='booking-journal', daemon=True)
+		self._writer.start()
+
+	def append(self, booking_id, path, date):
+		"""Queue a confirmed booking to be written to the journal.
+
+		Parameters
+		----------
+		booking_id : str
+			Booking ID given to the Client
+		path : tuple
+			Dose, age group, state, district and hospital name of the booking
+		date : str
+			Label of the date booked
+
+		Returns
+		-------
+		concurrent.futures.Future
+			Done once the booking is durable, or with the OSError raised while writing it
+		"""
+
+		return self.appendMany([(booking_id, path, date)])
+
+	def appendMany(self, bookings):
+		"""Queue many confirmed bookings at once, to be made durable by the same commit, e.g. for a bulk booking.
+
+		Parameters
+		----------
+		bookings : iterable
+			Booking ID, path and date of every booking, as for `append`
+
+		Returns
+		-------
+		concurrent.futures.Future
+			Done once all the bookings are durable, or with the OSError raised while writing them
+		"""
+
+		if self._pid != os.getpid():
+			self._startWriter()
+		now = time.time()
+		lines = ''.join(json.dumps({'id': booking_id, 'path': list(path), 'date': date, 'time': now}) + '\n'
+			for booking_id, path, date in bookings)
+		future = Future()
+		with self._condition:
+			self._pending.append((lines.encode('utf-8'), lines.count('\n'), future))
+			self._condition.notify()
+		return future
+
+	def _run(self):
+		while True:
+			with self._condition:
+				while not self._pending and not self._closing:
+					self._condition.wait()
+				if not self._pending:
+					return
+			if self.commit_window and not self._closing:
+				time.sleep(self.commit_window)
+			with self._condition:
+				batch, self._pending = self._pending, []
+			self._commit(batch)
+
+	def _commit(self, batch):
+		data = memoryview(b''.join(lines for lines, _, _ in batch))
+		try:
+			while data:
+				data = data[os.write(self._fd, data):]
+			os.fsync(self._fd)
+		except OSError as error:
+			for _, _, future in batch:
+				future.set_exception(error)
+			return
+		self.records += sum(count for _, count, _ in batch)
+		self.commits += 1
+		for _, _, future in batch:
+			future.set_result(None)
+
+	def close(self):
+		"""Commit the bookings still queued and close the journal file."""
+
+		if self._pid == os.getpid():
+			with self._condition:
+				self._closing = True
+				self._condition.notify()
+			self._writer.join()
+		os.close(self._fd)
+
+############################################################################################################################
+
+def replayJournal(path, reservations, table=None):
+	"""Take again the slots of every booking in a journal, e.g. at startup on top of the loaded data.
+
+	A last line left incomplete by a crash was never confirmed to its Client and is skipped. Every
+	booking is restored whatever the slots published now; a hospital and date left with more bookings
+	than slots in `table` is logged, as no further booking is granted there until its slots go up.
+
+	Parameters
+	----------
+	path : str
+		Journal file, nothing being replayed if it does not exist
+	reservations : slot_reservations.SlotReservations
+		Inventory to take the slots in
+	table : availability_store.AvailabilityTable
+		Table served, the restored bookings being checked against its slots, or None to check nothing
+
+	Returns
+	-------
+	int
+		Number of bookings replayed
+	"""
+
+	if not os.path.exists(path):
+		return 0
+
+	count = 0
+	restored = {}
+	with open(path, 'rb') as f:
+		for line in f:
+			if not line.endswith(b'\n'):
+				break
+			try:
+				record = json.loads(line)
+			except ValueError:
+				continue
+			key = (tuple(record['path']), record['date'])
+			taken = reservations.restore(*key)
+			if taken is None:
+				print("No counter left to restore booking %s at %s on %s" % (record.get('id'), key[0], key[1]))
+			else:
+				restored[key] = taken
+			count += 1
+	if table is not None:
+		for (hospital, date), taken in restored.items():
+			published = reservations.capacity(table, hospital, date)
+			if taken > published:
+				print("Journal holds %d bookings at %s on %s, over the %d slots published" % (taken, hospital, date, published))
+	return count
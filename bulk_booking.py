@@ -0,0 +1,189 @@
+# Import required module/s
+import csv
+import datetime
+import json
+import os
+
+
+# Fields of a booking request, the preferred dates being optional
+REQUEST_FIELDS = ('dose', 'first_dose_date', 'age_group', 'state', 'district', 'hospital', 'preferred_dates')
+
+# Fields of the result written for every booking request
+RESULT_FIELDS = ('row', 'status', 'booking_id', 'date', 'reason')
+
+# Separator of the preferred dates in a CSV file
+DATE_SEPARATOR = ';'
+
+# Outcomes of a booking request
+BOOKED = 'booked'
+INVALID = 'invalid'
+NOT_ELIGIBLE = 'not_eligible'
+NO_SLOTS = 'no_slots'
+NOT_BOOKED = 'not_booked'
+
+# Weeks after the First Dose before which the 2nd Dose is not given
+SECOND_DOSE_MIN_WEEKS = 4
+
+
+def isJsonLines(path):
+	return os.path.splitext(path)[1].lower() in ('.jsonl', '.json', '.ndjson')
+
+
+def readBookingRequests(path):
+	"""Read booking requests from a CSV file with a header row, or from a JSON Lines file.
+
+	Parameters
+	----------
+	path : str
+		File of requests, read as JSON Lines if its extension is .jsonl, .ndjson or .json and as CSV otherwise.
+		The preferred dates are a list in JSON and separated by ';' in CSV
+
+	Yields
+	------
+	dict
+		Request with the REQUEST_FIELDS as keys, missing fields being empty. A line of JSON Lines that is not
+		a JSON object yields a request with only an 'error' key, which is booked as an invalid request
+	"""
+
+	json_lines = isJsonLines(path)
+	with open(path, newline='', encoding='utf-8') as f:
+		records = (parseJsonLine(line) for line in f if line.strip()) if json_lines else csv.DictReader(f)
+		for record in records:
+			if json_lines and 'error' in record:
+				yield record
+				continue
+			request = {field: str(record.get(field) or '').strip() for field in REQUEST_FIELDS[:-1]}
+			dates = record.get('preferred_dates') or []
+			if isinstance(dates, str):
+				dates = dates.split(DATE_SEPARATOR)
+			elif not isinstance(dates, list):
+				yield {'error': "preferred_dates is not a list"}
+				continue
+			request['preferred_dates'] = [str(date).strip() for date in dates if str(date).strip()]
+			yield request
+
+
+def parseJsonLine(line):
+	"""Record of one line of a JSON Lines file, or a dict with only an 'error' key if it is not a JSON object."""
+
+	try:
+		record = json.loads(line)
+	except ValueError as error:
+		return {'error': "malformed JSON: %s" % error}
+	if not isinstance(record, dict):
+		return {'error': "not a JSON object"}
+	# A field named 'error' must not pass for a line that could not be read
+	record.pop('error', None)
+	return record
+
+############################################################################################################################
+
+def weeksSinceFirstDose(first_dose_date, today):
+	"""Whole weeks between the date of the First Dose, given as DD/MM/YYYY, and today, or None if it is not a valid date."""
+
+	try:
+		first_dose = datetime.datetime.strptime(first_dose_date, "%d/%m/%Y").date()
+	except ValueError:
+		return None
+	return int((today - first_dose).days / 7)
+
+############################################################################################################################
+
+def bookRequest(request, table, reservations, today):
+	"""Validate one booking request against the menu index and reserve a slot for it.
+
+	Returns
+	-------
+	tuple
+		Status, path of the hospital and date booked, and the Booking ID or the reason the request was refused
+	"""
+
+	if 'error' in request:
+		return INVALID, None, '', request['error']
+
+	path = (request['dose'], request['age_group'], request['state'], request['district'], request['hospital'])
+	node = table.index.root
+	for field, value in zip(('dose', 'age_group', 'state', 'district', 'hospital'), path):
+		node = node.children.get(value)
+		if node is None:
+			return INVALID, None, '', "unknown %s %r" % (field, value)
+
+	if request['dose'] == '2':
+		weeks = weeksSinceFirstDose(request['first_dose_date'], today)
+		if weeks is None or weeks < 0:
+			return INVALID, None, '', "invalid first_dose_date %r" % request['first_dose_date']
+		if weeks < SECOND_DOSE_MIN_WEEKS:
+			return NOT_ELIGIBLE, None, '', "eligible for the 2nd Dose after %d weeks" % (SECOND_DOSE_MIN_WEEKS - weeks)
+
+	dates = request['preferred_dates'] or table.dates
+	for date in dates:
+		if date not in table.dates:
+			return INVALID, None, '', "unknown date %r" % date
+	for date in dates:
+		booking_id = reservations.reserve(table, path, date)
+		if booking_id is not None:
+			return BOOKED, path, date, booking_id
+	return NO_SLOTS, None, '', "no slots left on %s" % ', '.join(dates)
+
+############################################################################################################################
+
+def bookRequests(requests, table, reservations, journal=None, today=None):
+	"""Book a slot for every request in one pass, in the order of the requests.
+
+	Every request is checked against the menu index as the dialogue would: the selections must exist,
+	a request for the 2nd Dose must come at least 4 weeks after its valid First Dose date, and its
+	preferred dates, or all the dates if none is given, are tried in order until one has a slot left.
+
+	Parameters
+	----------
+	requests : iterable
+		Requests as yielded by `readBookingRequests`
+	table : availability_store.AvailabilityTable
+		Table served
+	reservations : slot_reservations.SlotReservations
+		Inventory the slots are taken from
+	journal : booking_journal.BookingJournal
+		Journal every booking is written to, all of them being durable when this returns, or None. If the
+		write fails, the slots of the pass are given back and its bookings reported as NOT_BOOKED
+	today : datetime.date
+		Date the eligibility for the 2nd Dose is counted up to, today by default
+
+	Returns
+	-------
+	list
+		Result of every request, a dict with the RESULT_FIELDS as keys
+	"""
+
+	today = today or datetime.date.today()
+	results = []
+	bookings = []
+	for row, request in enumerate(requests, 1):
+		status, path, date, detail = bookRequest(request, table, reservations, today)
+		if status == BOOKED:
+			results.append({'row': row, 'status': status, 'booking_id': detail, 'date': date, 'reason': ''})
+			bookings.append((detail, path, date, results[-1]))
+		else:
+			results.append({'row': row, 'status': status, 'booking_id': '', 'date': date, 'reason': detail})
+	if journal is not None and bookings:
+		# All the bookings of the pass are made durable by one commit
+		try:
+			journal.appendMany([booking[:3] for booking in bookings]).result()
+		except OSError as error:
+			print("Bookings of the pass could not be written to the journal: %r" % error)
+			for _, path, date, result in bookings:
+				reservations.release(path, date)
+				result.update(status=NOT_BOOKED, booking_id='', date='', reason="journal write failed: %s" % error)
+	return results
+
+############################################################################################################################
+
+def writeBookingResults(path, results):
+	"""Write the result of every request to a CSV file, or to a JSON Lines file for the same extensions as the requests."""
+
+	with open(path, 'w', newline='', encoding='utf-8') as f:
+		if isJsonLines(path):
+			f.writelines(json.dumps(result) + '\n' for result in results)
+		else:
+			writer = csv.DictWriter(f, RESULT_FIELDS)
+			writer.writeheader()
+			writer.writerows(results)
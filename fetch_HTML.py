@@ -1,8 +1,13 @@
+import os
 from bs4 import BeautifulSoup
-import requests
+from page_cache import PageCache
 
-page = requests.get("https://www.mooc.e-yantra.org/task-spec/fetch-mock-covidpage")
-soup = BeautifulSoup(page.content, 'html.parser')
+page = PageCache('.page_cache').fetch("https://www.mooc.e-yantra.org/task-spec/fetch-mock-covidpage")
 
-with open('HTML_content.txt', 'w') as f:
-    f.write(soup.prettify())
+if page.changed or not os.path.exists('HTML_content.txt'):
+    soup = BeautifulSoup(page.read(), 'html.parser')
+
+    with open('HTML_content.txt', 'w') as f:
+        f.write(soup.prettify())
+else:
+    print("Web-page not modified, HTML_content.txt is up to date")
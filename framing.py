@@ -0,0 +1,149 @@
+# Import required module/s
+import asyncio
+import select
+import struct
+
+
+# Header of every frame: its type, then the length of its payload in bytes, both in network byte order
+FRAME_HEADER = struct.Struct('!BI')
+
+# Types of the frames sent by the Server
+TEXT_FRAME = 1
+MENU_FRAME = 2
+PROMPT_FRAME = 3
+GOODBYE_FRAME = 4
+# Types of the frames sent by the Client: one input, or a whole selection path as a JSON object
+INPUT_FRAME = 5
+PATH_FRAME = 6
+
+# Frames the Server sends when it waits for an input of the Client
+INPUT_REQUESTS = (MENU_FRAME, PROMPT_FRAME)
+
+# Default largest payload accepted from the other side, bigger frames being a protocol error
+MAX_INPUT_SIZE = 1024
+
+
+class FrameError(ValueError):
+	"""Raised when the other side sends a frame that breaks the protocol."""
+
+
+def encodeFrame(frame_type, payload):
+	"""Encode one frame, ready to be written to the connection alone or joined with others.
+
+	Parameters
+	----------
+	frame_type : int
+		One of the *_FRAME constants
+	payload : str or bytes
+		Content of the frame, a str being encoded as UTF-8
+
+	Returns
+	-------
+	bytes
+		Header followed by the payload
+	"""
+
+	if isinstance(payload, str):
+		payload = payload.encode('utf-8')
+	return FRAME_HEADER.pack(frame_type, len(payload)) + payload
+
+############################################################################################################################
+
+class FrameReader:
+	"""Reads the frames sent on a blocking socket, one at a time.
+
+	Each `recv` asks for as many bytes as are available, so the frames of a whole step usually arrive with one
+	system call and the following ones are served from the buffer.
+
+	Parameters
+	----------
+	sock : socket
+		Connected socket to read from
+	max_size : int
+		Largest payload accepted, or None for no limit
+	"""
+
+	def __init__(self, sock, max_size=None):
+		self.sock = sock
+		self.max_size = max_size
+		self._buffer = bytearray()
+
+	def _fill(self, size):
+		while len(self._buffer) < size:
+			chunk = self.sock.recv(max(65536, size - len(self._buffer)))
+			if not chunk:
+				if self._buffer:
+					raise FrameError("Connection closed in the middle of a frame")
+				return False
+			self._buffer += chunk
+		return True
+
+	def readable(self, timeout):
+		"""True if a frame has started arriving, after waiting for it up to `timeout` seconds."""
+
+		if self._buffer:
+			return True
+		return bool(select.select([self.sock], [], [], timeout)[0])
+
+	def read(self):
+		"""Read the next frame.
+
+		Returns
+		-------
+		tuple
+			Type and payload as bytes of the frame, or None if the connection was closed between frames
+
+		Raises
+		------
+		FrameError
+			If the payload is bigger than `max_size` or the connection closes in the middle of a frame
+		"""
+
+		if not self._fill(FRAME_HEADER.size):
+			return None
+		frame_type, length = FRAME_HEADER.unpack_from(self._buffer)
+		if self.max_size is not None and length > self.max_size:
+			raise FrameError("Frame of %d bytes is over the limit of %d bytes" % (length, self.max_size))
+		end = FRAME_HEADER.size + length
+		if not self._fill(end):
+			raise FrameError("Connection closed in the middle of a frame")
+		payload = bytes(self._buffer[FRAME_HEADER.size:end])
+		del self._buffer[:end]
+		return frame_type, payload
+
+############################################################################################################################
+
+async def readFrame(reader, max_size=None):
+	"""Read the next frame from an asyncio stream.
+
+	Parameters
+	----------
+	reader : asyncio.StreamReader
+		Stream to read from
+	max_size : int
+		Largest payload accepted, or None for no limit
+
+	Returns
+	-------
+	tuple
+		Type and payload as bytes of the frame, or None if the stream ended between frames
+
+	Raises
+	------
+	FrameError
+		If the payload is bigger than `max_size` or the stream ends in the middle of a frame
+	"""
+
+	try:
+		header = await reader.readexactly(FRAME_HEADER.size)
+	except asyncio.IncompleteReadError as error:
+		if error.partial:
+			raise FrameError("Connection closed in the middle of a frame")
+		return None
+	frame_type, length = FRAME_HEADER.unpack(header)
+	if max_size is not None and length > max_size:
+		raise FrameError("Frame of %d bytes is over the limit of %d bytes" % (length, max_size))
+	try:
+		return frame_type, await reader.readexactly(length)
+	except asyncio.IncompleteReadError:
+		raise FrameError("Connection closed in the middle of a frame")
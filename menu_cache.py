@@ -0,0 +1,100 @@
+# Import required module/s
+from collections import OrderedDict
+
+
+# Default number of menu payloads kept for one version of the data
+DEFAULT_MAX_ENTRIES = 65536
+
+
+class MenuPayloadCache:
+	"""Encoded frames of the menus, rendered once for every version of the availability data.
+
+	The menu of a node of the dose/age/state/district/hospital tree is the same for every Client that
+	reaches it, so it is rendered and encoded the first time it is asked for and then served from the
+	cache as bytes. The cache belongs to one version of the data at a time: asking for a menu of a table
+	with another `version` drops every payload first. Past `max_entries` payloads the least recently used
+	one is dropped.
+
+	Parameters
+	----------
+	max_entries : int
+		Maximum number of payloads kept
+	name : str
+		Name of the cache in the logs
+
+	Attributes
+	----------
+	version : int
+		Version of the table the payloads were rendered from, or None before the first one
+	hits : int
+		Number of payloads served from the cache
+	misses : int
+		Number of payloads rendered because they were not cached
+	bytes_served : int
+		Number of bytes of the payloads served from the cache
+	invalidations : int
+		Number of times the payloads were dropped for a new version of the data
+	"""
+
+	def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, name='Menu cache'):
+		self.max_entries = max_entries
+		self.name = name
+		self.version = None
+		self.hits = 0
+		self.misses = 0
+		self.bytes_served = 0
+		self.invalidations = 0
+		self._payloads = OrderedDict()
+
+	def get(self, table, key, render):
+		"""Return the payload of a menu of `table`, rendering it only if it is not cached.
+
+		Parameters
+		----------
+		table : availability_store.AvailabilityTable
+			Table the menu lists the options of, with its `version` attribute set
+		key : tuple
+			Level of the menu and the selections leading to it
+		render : callable
+			Called without arguments to render the encoded payload when it is not cached
+
+		Returns
+		-------
+		bytes
+			Encoded payload of the menu
+		"""
+
+		if table.version != self.version:
+			if self.version is not None:
+				self.invalidations += 1
+				print("%s dropped for version %d: %s" % (self.name, table.version, self.describe()))
+			self._payloads.clear()
+			self.version = table.version
+
+		payload = self._payloads.get(key)
+		if payload is None:
+			self.misses += 1
+			payload = render()
+			self._payloads[key] = payload
+			if len(self._payloads) > self.max_entries:
+				self._payloads.popitem(last=False)
+			return payload
+
+		self.hits += 1
+		self.bytes_served += len(payload)
+		self._payloads.move_to_end(key)
+		return payload
+
+	@property
+	def hit_rate(self):
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+	def describe(self):
+		"""Summary of the use of the cache, for the logs."""
+
+		return "%d entries, %d hits, %d misses, %.1f%% hit rate, %d bytes served from the cache" % (
+			len(self._payloads), self.hits, self.misses, 100 * self.hit_rate, self.bytes_served)
+
+	def __len__(self):
+		return len(self._payloads)
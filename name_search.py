@@ -0,0 +1,277 @@
+# Import required module/s
+import bisect
+import time
+from collections import Counter
+from itertools import chain
+
+from availability_store import menuPath
+
+
+# Fraction of the names a trigram may appear in before it is too common to pick fuzzy candidates with
+COMMON_TRIGRAM_FRACTION = 0.1
+
+# Number of names sharing the most uncommon trigrams with the query that are scored for a fuzzy match
+FUZZY_CANDIDATES = 50
+
+# Smallest share of trigrams a name must have with the query to be a fuzzy match
+MIN_FUZZY_SCORE = 0.3
+
+# Kinds of names searched, in the order of their level in the menu tree
+NAME_KINDS = ('state', 'district', 'hospital')
+
+
+def normalizeName(name):
+	return ' '.join(name.lower().split())
+
+
+def trigrams(text):
+	padded = '  ' + text + ' '
+	return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def wordStarts(normalized):
+	"""Keys a normalized name is indexed under, from the start of each of its words to its end."""
+
+	words = normalized.split(' ')
+	return [' '.join(words[i:]) for i in range(len(words))]
+
+
+def hospitalSummary(table, rows):
+	"""Vaccines and total slots of the rows of a hospital."""
+
+	return tuple(sorted({table.vaccine[row] for row in rows})), int(table.slots[rows].sum()) if rows else 0
+
+############################################################################################################################
+
+class NameSearchIndex:
+	"""Prefix and fuzzy search over the hospital, district and state names of an AvailabilityTable.
+
+	Every distinct name is indexed under the start of each of its words in one sorted list, so a prefix
+	query is a binary search followed by a scan of the matching keys only. Names are also indexed by their
+	trigrams, so a query with a typo still finds the names sharing most of its trigrams. A match on a
+	district or state name stands for all the hospitals in it. Names are kept as (kind, name) pairs in
+	sorted order everywhere, so that an index derived by `updated` after an incremental update of the table
+	is the same as one built from scratch.
+
+	Parameters
+	----------
+	table : availability_store.AvailabilityTable
+		Table whose `index` is searched
+
+	Attributes
+	----------
+	hospitals : dict
+		Vaccines and total slots of every hospital, with Key as its path (dose, age group, state, district, hospital)
+	build_seconds : float
+		Time taken to build the index, or to update it for an incremental update
+	"""
+
+	def __init__(self, table):
+		start = time.perf_counter()
+		self.hospitals = {}
+		paths_of = {}
+		for dose, dose_node in table.index.root.children.items():
+			for age_group, age_node in dose_node.children.items():
+				for state, state_node in age_node.children.items():
+					for district, district_node in state_node.children.items():
+						for hospital, hospital_node in district_node.children.items():
+							path = (dose, age_group, state, district, hospital)
+							self.hospitals[path] = hospitalSummary(table, hospital_node.rows)
+							for kind, name in zip(NAME_KINDS, (state, district, hospital)):
+								paths_of.setdefault((kind, name), []).append(path)
+
+		self._paths = {name: sorted(paths) for name, paths in paths_of.items()}
+		prefixes = []
+		grams = {}
+		for name in sorted(self._paths):
+			normalized = normalizeName(name[1])
+			prefixes.extend((key, name) for key in wordStarts(normalized))
+			for gram in trigrams(normalized):
+				grams.setdefault(gram, []).append(name)
+		prefixes.sort()
+		self._prefix_keys = [key for key, _ in prefixes]
+		self._prefix_names = [name for _, name in prefixes]
+		self._trigrams = grams
+		self.build_seconds = time.perf_counter() - start
+
+	def updated(self, table, changes):
+		"""Derive the index of an incrementally updated table, reading again only the hospitals of the changed rows.
+
+		The vaccines and slots of the hospitals of the changed rows are read from the table and every other
+		hospital is copied over. The names are shared with this index while no hospital appears or disappears;
+		otherwise only the hospitals of the names concerned change, and the names that appear or disappear
+		are inserted into or deleted from copies of the sorted prefix keys and of their trigram lists. This
+		index stays valid for the previous table.
+
+		Parameters
+		----------
+		table : availability_store.AvailabilityTable
+			Table derived by `updateAvailabilityTable` from the table of this index
+		changes : availability_store.ChangeSet
+			Rows added, removed and updated between the two tables
+
+		Returns
+		-------
+		NameSearchIndex
+			Index of `table`, the same as one built from scratch
+		"""
+
+		start = time.perf_counter()
+		index = NameSearchIndex.__new__(NameSearchIndex)
+		index.hospitals = dict(self.hospitals)
+		appeared = []
+		disappeared = []
+		for path in {menuPath(key) for key in chain(changes.added, changes.removed, changes.updated)}:
+			node = table.index.lookup(*path)
+			if node is not None and node.rows:
+				if path not in self.hospitals:
+					appeared.append(path)
+				index.hospitals[path] = hospitalSummary(table, node.rows)
+			elif index.hospitals.pop(path, None) is not None:
+				disappeared.append(path)
+
+		index._paths, index._prefix_keys, index._prefix_names, index._trigrams = self._paths, self._prefix_keys, self._prefix_names, self._trigrams
+		if appeared or disappeared:
+			changed = {}
+			for paths, add in ((appeared, True), (disappeared, False)):
+				for path in paths:
+					for name in zip(NAME_KINDS, path[2:]):
+						if name not in changed:
+							changed[name] = set(self._paths.get(name, ()))
+						if add:
+							changed[name].add(path)
+						else:
+							changed[name].discard(path)
+			index._paths = dict(self._paths)
+			new_names = []
+			old_names = []
+			for name, paths in changed.items():
+				if paths:
+					if name not in self._paths:
+						new_names.append(name)
+					index._paths[name] = sorted(paths)
+				else:
+					del index._paths[name]
+					old_names.append(name)
+			if new_names or old_names:
+				index._indexNames(self, new_names, old_names)
+		index.build_seconds = time.perf_counter() - start
+		return index
+
+	def _indexNames(self, previous, new_names, old_names):
+		"""Insert names into and delete names from copies of the prefix keys and trigram lists of the previous index."""
+
+		self._prefix_keys = list(previous._prefix_keys)
+		self._prefix_names = list(previous._prefix_names)
+		self._trigrams = dict(previous._trigrams)
+		# Trigram lists are shared with the previous index until they are copied to be changed
+		owned = set()
+		for name, add in chain(((name, False) for name in old_names), ((name, True) for name in new_names)):
+			normalized = normalizeName(name[1])
+			for key in wordStarts(normalized):
+				low = bisect.bisect_left(self._prefix_keys, key)
+				high = bisect.bisect_right(self._prefix_keys, key, low)
+				position = bisect.bisect_left(self._prefix_names, name, low, high)
+				if add:
+					self._prefix_keys.insert(position, key)
+					self._prefix_names.insert(position, name)
+				else:
+					del self._prefix_keys[position]
+					del self._prefix_names[position]
+			for gram in trigrams(normalized):
+				if gram not in owned:
+					self._trigrams[gram] = list(self._trigrams.get(gram, ()))
+					owned.add(gram)
+				names = self._trigrams[gram]
+				if add:
+					bisect.insort(names, name)
+				else:
+					names.remove(name)
+					if not names:
+						del self._trigrams[gram]
+						owned.discard(gram)
+
+	def prefixNames(self, query):
+		"""Names with a word starting with the query, in the order of the indexed keys."""
+
+		position = bisect.bisect_left(self._prefix_keys, query)
+		while position < len(self._prefix_keys) and self._prefix_keys[position].startswith(query):
+			yield self._prefix_names[position]
+			position += 1
+
+	def fuzzyNames(self, query):
+		"""Names sharing at least MIN_FUZZY_SCORE of their trigrams with the query, best first.
+
+		Candidates are picked by the trigrams of the query that are not too common, then scored on all their
+		trigrams, so a query made only of common trigrams has no fuzzy match.
+		"""
+
+		query_grams = trigrams(query)
+		common = COMMON_TRIGRAM_FRACTION * len(self._paths)
+		postings = [self._trigrams[gram] for gram in query_grams if gram in self._trigrams]
+		shared = Counter()
+		for names in postings:
+			if len(names) > common:
+				continue
+			shared.update(names)
+		scored = []
+		for name, _ in shared.most_common(FUZZY_CANDIDATES):
+			name_grams = trigrams(normalizeName(name[1]))
+			count = len(query_grams & name_grams)
+			score = count / (len(query_grams) + len(name_grams) - count)
+			if score >= MIN_FUZZY_SCORE:
+				scored.append((-score, name))
+		scored.sort()
+		return [name for _, name in scored]
+
+	def search(self, query, dose=None, age_group=None, limit=10):
+		"""Hospitals whose name, district or state starts with the query, or else matches it fuzzily.
+
+		Parameters
+		----------
+		query : str
+			Part of a name, in any case
+		dose : str
+			Dose the hospitals must offer, or None for any
+		age_group : str
+			Age Group the hospitals must offer, or None for any
+		limit : int
+			Maximum number of hospitals returned
+
+		Returns
+		-------
+		list
+			Paths (dose, age group, state, district, hospital) of the matching hospitals
+		"""
+
+		query = normalizeName(query)
+		if not query:
+			return []
+
+		found = {}
+		for find in (self.prefixNames, self.fuzzyNames):
+			for name in find(query):
+				for path in self._paths[name]:
+					if (dose is None or path[0] == dose) and (age_group is None or path[1] == age_group):
+						found.setdefault(path, None)
+						if len(found) == limit:
+							return list(found)
+			if found:
+				break
+		return list(found)
+
+############################################################################################################################
+
+def searchIndex(table, previous=None):
+	"""NameSearchIndex of a table, built the first time it is asked for and then kept as its `name_search` attribute.
+
+	If `previous` is the table `table` was updated from by `updateAvailabilityTable` and its index is built,
+	the index of `table` is derived from it and its `changes` instead.
+	"""
+
+	if table.name_search is None:
+		if previous is not None and previous.name_search is not None and table.changes is not None:
+			table.name_search = previous.name_search.updated(table, table.changes)
+		else:
+			table.name_search = NameSearchIndex(table)
+	return table.name_search
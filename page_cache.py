@@ -0,0 +1,205 @@
+# Import required module/s
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+# Size of the pieces in which a page is downloaded and read back from the cache
+CHUNK_SIZE = 64 * 1024
+
+
+class CachedPage:
+	"""Snapshot of a web-page stored in the PageCache.
+
+	Attributes
+	----------
+	url : str
+		URL the page was fetched from
+	path : str
+		Path of the file holding the content of the page
+	sha256 : str
+		Hex digest of the content of the page
+	etag : str
+		ETag sent by the website with the page, or None
+	last_modified : str
+		Last-Modified date sent by the website with the page, or None
+	changed : bool
+		True if the content differs from the snapshot cached before this fetch
+	"""
+
+	def __init__(self, url, path, meta, changed):
+		self.url = url
+		self.path = path
+		self.sha256 = meta['sha256']
+		self.etag = meta.get('etag')
+		self.last_modified = meta.get('last_modified')
+		self.changed = changed
+
+	def iterChunks(self, chunk_size=CHUNK_SIZE):
+		"""Read the content of the page back in pieces.
+
+		Yields
+		------
+		bytes
+			Successive pieces of the content
+		"""
+
+		with open(self.path, 'rb') as f:
+			while True:
+				chunk = f.read(chunk_size)
+				if not chunk:
+					return
+				yield chunk
+
+	def read(self):
+		"""Read the whole content of the page.
+
+		Returns
+		-------
+		bytes
+			Content of the page
+		"""
+
+		with open(self.path, 'rb') as f:
+			return f.read()
+
+############################################################################################################################
+
+class PageCache:
+	"""On-disk cache of fetched web-pages, revalidated with conditional requests.
+
+	Every URL is stored as a content file named after its SHA-256, along with a JSON file holding its
+	ETag, Last-Modified date and content hash. The JSON file is replaced atomically, so a reader never
+	sees a half-written snapshot.
+
+	Parameters
+	----------
+	cache_dir : str
+		Directory holding the cached pages, created if missing
+	"""
+
+	def __init__(self, cache_dir):
+		self.cache_dir = cache_dir
+		os.makedirs(cache_dir, exist_ok=True)
+
+	def _metaPath(self, url):
+		return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+	def _loadMeta(self, url):
+		try:
+			with open(self._metaPath(url)) as f:
+				meta = json.load(f)
+		except (OSError, ValueError):
+			return None
+		if not os.path.exists(os.path.join(self.cache_dir, meta['content_file'])):
+			return None
+		return meta
+
+	def _page(self, url, meta, changed):
+		return CachedPage(url, os.path.join(self.cache_dir, meta['content_file']), meta, changed)
+
+	def cached(self, url):
+		"""Return the snapshot of the page stored for the URL, without any network access.
+
+		Parameters
+		----------
+		url : str
+			URL of the web-page
+
+		Returns
+		-------
+		CachedPage
+			Stored snapshot, or None if the URL was never fetched
+		"""
+
+		meta = self._loadMeta(url)
+		if meta is None:
+			return None
+		return self._page(url, meta, changed=False)
+
+	def fetch(self, url, session=None, timeout=None, offline=False):
+		"""Fetch the page for the URL, revalidating the stored snapshot with a conditional request.
+
+		Parameters
+		----------
+		url : str
+			URL of the web-page
+		session : requests.Session
+			Session to send the request with, a new connection is used if None
+		timeout : float
+			Timeout of the request in seconds
+		offline : bool
+			If True, serve the stored snapshot without any network access
+
+		Returns
+		-------
+		CachedPage
+			Snapshot of the page, with `changed` False when the website answered 304 Not Modified
+			or sent the same content again
+
+		Raises
+		------
+		FileNotFoundError
+			If `offline` is True and the URL was never fetched
+		"""
+
+		meta = self._loadMeta(url)
+
+		if offline:
+			if meta is None:
+				raise FileNotFoundError("No cached snapshot of %s in %s" % (url, self.cache_dir))
+			return self._page(url, meta, changed=False)
+
+		headers = {}
+		if meta is not None:
+			if meta.get('etag'):
+				headers['If-None-Match'] = meta['etag']
+			if meta.get('last_modified'):
+				headers['If-Modified-Since'] = meta['last_modified']
+
+		if session is None:
+			import requests
+			session = requests
+
+		with session.get(url, headers=headers, timeout=timeout, stream=True) as page:
+			if page.status_code == 304 and meta is not None:
+				# Drain the empty body so the connection goes back to the pool
+				page.content
+				return self._page(url, meta, changed=False)
+			page.raise_for_status()
+
+			digest = hashlib.sha256()
+			fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+			try:
+				with os.fdopen(fd, 'wb') as f:
+					for chunk in page.iter_content(chunk_size=CHUNK_SIZE):
+						digest.update(chunk)
+						f.write(chunk)
+				sha256 = digest.hexdigest()
+				new_meta = {
+					'url': url,
+					'etag': page.headers.get('ETag'),
+					'last_modified': page.headers.get('Last-Modified'),
+					'sha256': sha256,
+					'content_file': os.path.basename(self._metaPath(url))[:-len('.json')] + '-' + sha256[:16] + '.html',
+					'fetched_at': time.time(),
+				}
+				os.replace(tmp_path, os.path.join(self.cache_dir, new_meta['content_file']))
+			except BaseException:
+				if os.path.exists(tmp_path):
+					os.remove(tmp_path)
+				raise
+
+		# The content is stored under its own hash, so switching the metadata file over is what
+		# atomically publishes the new snapshot
+		fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+		with os.fdopen(fd, 'w') as f:
+			json.dump(new_meta, f)
+		os.replace(tmp_path, self._metaPath(url))
+		if meta is not None and meta['content_file'] != new_meta['content_file']:
+			os.remove(os.path.join(self.cache_dir, meta['content_file']))
+
+		changed = meta is None or meta['sha256'] != new_meta['sha256']
+		return self._page(url, new_meta, changed=changed)
@@ -0,0 +1,119 @@
+# Import required module/s
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class FetchedPage:
+	"""Web-page downloaded without a PageCache, held in memory.
+
+	Attributes
+	----------
+	url : str
+		URL the page was fetched from
+	sha256 : str
+		Hex digest of the content of the page
+	changed : bool
+		Always True, as there is no earlier snapshot to compare with
+	"""
+
+	def __init__(self, url, content):
+		self.url = url
+		self.content = content
+		self.sha256 = hashlib.sha256(content).hexdigest()
+		self.changed = True
+
+	def iterChunks(self):
+		yield self.content
+
+	def read(self):
+		return self.content
+
+############################################################################################################################
+
+class SourceFetcher:
+	"""Fetches many availability pages concurrently on a thread pool over pooled keep-alive connections.
+
+	All requests share one requests.Session whose connection pool holds a connection per worker, so
+	only the first request to a host pays for the TCP/TLS handshake. Connection errors, read timeouts
+	and 5xx answers are retried with exponential backoff.
+
+	Parameters
+	----------
+	cache : page_cache.PageCache
+		Cache the pages are revalidated against, or None to always download them in full
+	workers : int
+		Number of pages fetched at the same time
+	timeout : float
+		Timeout in seconds of connecting to and of reading from every source
+	retries : int
+		Number of retries of a failed request to a source
+	backoff : float
+		Backoff factor in seconds between retries
+	"""
+
+	def __init__(self, cache=None, workers=8, timeout=10.0, retries=2, backoff=0.2):
+		self.cache = cache
+		self.timeout = timeout
+		self.session = requests.Session()
+		retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+			status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(['GET']), raise_on_status=False)
+		adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+		self.session.mount('http://', adapter)
+		self.session.mount('https://', adapter)
+		self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='source-fetcher')
+
+	def fetch(self, url, offline=False):
+		"""Fetch one source.
+
+		Parameters
+		----------
+		url : str
+			URL of the web-page
+		offline : bool
+			If True, serve the page from the cache without any network access
+
+		Returns
+		-------
+		page_cache.CachedPage or FetchedPage
+			Fetched page, falling back to the cached snapshot if the source cannot be reached
+		"""
+
+		if self.cache is None:
+			page = self.session.get(url, timeout=self.timeout)
+			page.raise_for_status()
+			return FetchedPage(url, page.content)
+
+		try:
+			return self.cache.fetch(url, session=self.session, timeout=self.timeout, offline=offline)
+		except requests.RequestException as error:
+			page = self.cache.cached(url)
+			if page is None:
+				raise
+			print("Fetching %s failed, using its cached snapshot: %r" % (url, error))
+			return page
+
+	def fetchAll(self, urls, offline=False):
+		"""Fetch all the sources concurrently.
+
+		Parameters
+		----------
+		urls : list
+			URLs of the web-pages
+		offline : bool
+			If True, serve the pages from the cache without any network access
+
+		Returns
+		-------
+		list
+			Fetched pages, in the order of `urls`
+		"""
+
+		return list(self.executor.map(lambda url: self.fetch(url, offline=offline), urls))
+
+	def close(self):
+		self.executor.shutdown()
+		self.session.close()
@@ -0,0 +1,193 @@
+# Import required module/s
+import asyncio
+import gc
+import os
+import signal
+import time
+
+from async_server import AsyncBookingServer
+from availability_rollups import rollupIndex
+from name_search import searchIndex
+from server_metrics import MetricsDumper
+from snapshot_file import load_snapshot
+
+
+# Seconds a worker has to stay up to count as started; a worker exiting sooner is restarted only after this delay
+RESTART_DELAY = 1.0
+
+
+def loadIndexedSnapshot(path):
+	"""Table of a snapshot file with its search index and rollups built, so that no Client waits for them once it is swapped in."""
+
+	table = load_snapshot(path)
+	searchIndex(table)
+	rollupIndex(table)
+	return table
+
+############################################################################################################################
+
+
+class PreforkServer:
+	"""Master process forking workers that all accept Clients on the same port, each one running an AsyncBookingServer.
+
+	The master loads the availability data once and forks the workers after it, so they share its pages
+	copy-on-write instead of each fetching and parsing the web-page; the garbage collector is frozen first so
+	that it does not dirty the shared pages. Every worker listens on HOST/PORT with SO_REUSEPORT and the kernel
+	spreads the connections among them. The master restarts any worker that exits and, if a refresher is
+	given, refreshes the data itself: the new data is saved to the binary snapshot file and every worker maps
+	it in on SIGUSR1.
+
+	Parameters
+	----------
+	snapshots : availability_refresh.SnapshotHolder
+		Holder of the availability data loaded by the master
+	dialogue : callable
+		Called with the SnapshotHolder of a worker for every new Client, returning its session, as for AsyncBookingServer
+	host : str
+		IP address to listen on
+	port : int
+		Port address to listen on
+	workers : int
+		Number of worker processes, e.g. one per core
+	goodbye : bytes
+		Frame sent to a Client when its session is over
+	refresher : availability_refresh.AvailabilityRefresher
+		Refresher run by the master on its interval, not started as a thread, or None to never refresh
+	snapshot_path : str
+		Binary snapshot file the refreshed data is saved to and re-loaded from by the workers
+	metrics_file : str
+		File the `metrics` option is written to: every worker writes its own, suffixed by its process id, every
+		`metrics_interval` seconds, and the master, which loads the data, writes it after every refresh
+	metrics_interval : float
+		Seconds between two writes of the metrics of a worker
+	**options
+		Other arguments of the AsyncBookingServer of every worker, e.g. `idle_timeout`, or `max_sessions`,
+		which limits the sessions of each worker
+
+	Attributes
+	----------
+	workers : dict
+		Start time of every running worker, with Key as its process id
+	restarts : int
+		Number of workers restarted after they exited
+	"""
+
+	def __init__(self, snapshots, dialogue, host, port, workers, goodbye=b'', refresher=None, snapshot_path=None,
+			metrics_file=None, metrics_interval=10.0, **options):
+		self.snapshots = snapshots
+		self.dialogue = dialogue
+		self.host = host
+		self.port = port
+		self.n_workers = workers
+		self.goodbye = goodbye
+		self.refresher = refresher
+		self.snapshot_path = snapshot_path
+		self.options = options
+		# Not started in the master, which must not fork with threads running, but by every worker for its own metrics
+		self.dumper = None
+		if metrics_file and options.get('metrics') is not None:
+			self.dumper = MetricsDumper(options['metrics'], metrics_file, metrics_interval)
+		self.workers = {}
+		self.restarts = 0
+		self._stopping = False
+
+	def spawnWorker(self):
+		"""Fork one worker process.
+
+		Returns
+		-------
+		int
+			Process id of the worker
+		"""
+
+		# SIGUSR1, whose default action kills, stays blocked in the worker until its event loop handles it
+		signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})
+		pid = os.fork()
+		if pid == 0:
+			code = 1
+			try:
+				self._runWorker()
+				code = 0
+			finally:
+				os._exit(code)
+
+		signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGUSR1})
+		self.workers[pid] = time.monotonic()
+		print("Worker %d started" % pid)
+		return pid
+
+	def _runWorker(self):
+		signal.signal(signal.SIGTERM, signal.SIG_DFL)
+		signal.signal(signal.SIGINT, signal.SIG_IGN)
+		server = AsyncBookingServer(self.snapshots, self.dialogue, self.host, self.port, goodbye=self.goodbye, reuse_port=True, **self.options)
+		if self.dumper is not None:
+			self.dumper.path = '%s.%d' % (self.dumper.path, os.getpid())
+			self.dumper.start()
+		asyncio.run(self._serveWorker(server))
+
+	async def _serveWorker(self, server):
+		loop = asyncio.get_running_loop()
+
+		def reload():
+			task = loop.run_in_executor(None, loadIndexedSnapshot, self.snapshot_path)
+			task.add_done_callback(lambda done: self.snapshots.swap(done.result()) if done.exception() is None else None)
+
+		if self.snapshot_path:
+			loop.add_signal_handler(signal.SIGUSR1, reload)
+			# A refresh signalled since the fork is delivered now, to the handler
+			signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGUSR1})
+		await server.serveForever()
+
+	def notifyWorkers(self, previous, table):
+		"""Listener of the refresher: have every worker re-load the snapshot file just saved."""
+
+		for pid in self.workers:
+			os.kill(pid, signal.SIGUSR1)
+
+	def stop(self, signum=None, frame=None):
+		self._stopping = True
+
+	def run(self):
+		"""Fork the workers and supervise them until SIGTERM or SIGINT, then stop them."""
+
+		signal.signal(signal.SIGTERM, self.stop)
+		signal.signal(signal.SIGINT, self.stop)
+		if self.refresher is not None and self.snapshot_path:
+			self.refresher.listeners.append(self.notifyWorkers)
+
+		# Objects allocated so far are never collected again, so the workers do not touch their shared pages
+		gc.collect()
+		gc.freeze()
+		for _ in range(self.n_workers):
+			self.spawnWorker()
+		if self.dumper is not None:
+			self.dumper.dump()
+
+		next_refresh = time.monotonic() + self.refresher.interval if self.refresher is not None else None
+		if self.refresher is not None and self.refresher.refresh_on_start:
+			next_refresh = time.monotonic()
+
+		while not self._stopping:
+			pid, status = os.waitpid(-1, os.WNOHANG)
+			if pid in self.workers:
+				started = self.workers.pop(pid)
+				print("Worker %d exited with status %d, restarting it" % (pid, os.waitstatus_to_exitcode(status)))
+				if time.monotonic() - started < RESTART_DELAY:
+					time.sleep(RESTART_DELAY)
+				if not self._stopping:
+					self.restarts += 1
+					self.spawnWorker()
+				continue
+
+			if next_refresh is not None and time.monotonic() >= next_refresh:
+				self.refresher.refresh()
+				if self.dumper is not None:
+					self.dumper.dump()
+				next_refresh = time.monotonic() + self.refresher.interval
+			time.sleep(0.2)
+
+		for pid in self.workers:
+			os.kill(pid, signal.SIGTERM)
+		for pid in self.workers:
+			os.waitpid(pid, 0)
+		self.workers = {}
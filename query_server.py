@@ -0,0 +1,218 @@
+# Import required module/s
+import http.server
+import json
+import threading
+import urllib.parse
+
+from menu_cache import MenuPayloadCache
+from server_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from availability_rollups import rollupIndex
+
+
+# Endpoints of the query server, each listing the options of one level of the menu tree, with the
+# parameters selecting the node whose options are listed, in the order of the menu
+QUERY_LEVELS = {
+	'/doses': (),
+	'/age-groups': ('dose',),
+	'/states': ('dose', 'age_group'),
+	'/districts': ('dose', 'age_group', 'state'),
+	'/hospitals': ('dose', 'age_group', 'state', 'district'),
+	'/slots': ('dose', 'age_group', 'state', 'district', 'hospital'),
+}
+
+# Endpoints answered from the rollups of the data, with their required parameters and the optional ones narrowing
+# the node queried, in the order of the menu
+ROLLUP_QUERIES = {
+	'/earliest': (('dose', 'age_group'), ('state', 'district', 'hospital')),
+	'/available': (('dose', 'age_group'), ('state', 'district')),
+}
+
+
+class AvailabilityQueries:
+	"""Answers the JSON queries of programmatic clients over the menu index of the availability data served.
+
+	Every endpoint of QUERY_LEVELS takes the selections of the levels above it as query parameters and
+	answers with the options of the next level: the doses, age groups, states and districts as strings,
+	the hospitals as {"hospital", "vaccine"} objects and the slots as {"date", "slots", "available"}
+	objects, `slots` being the published count and `available` what is left after the reservations.
+
+	The endpoints of ROLLUP_QUERIES answer from the rollups of the data, with the published slots:
+	/earliest with the "first_date" with slots, the "slots" and the "hospitals" with slots on every date and
+	the "open_hospitals" under a node, e.g. a district, and /available with the options of the next level
+	with slots, on the `date` parameter if given, as {"name", "slots", "hospitals"} objects, e.g. the
+	districts of a state with slots tomorrow. Every response carries the `version` of the data it was
+	answered from.
+
+	The encoded responses are cached for the version of the data they were answered from, except for the
+	slots, which change with every reservation.
+
+	Parameters
+	----------
+	snapshots : availability_refresh.SnapshotHolder
+		Holder of the availability data served
+	reservations : slot_reservations.SlotReservations
+		Inventory of the slots taken, or None to report the published slots as available
+
+	Attributes
+	----------
+	responses : menu_cache.MenuPayloadCache
+		Encoded responses of the current version, with its hit rate and bytes served
+	"""
+
+	def __init__(self, snapshots, reservations=None):
+		self.snapshots = snapshots
+		self.reservations = reservations
+		self.responses = MenuPayloadCache(name='Query cache')
+		self._lock = threading.Lock()
+
+	def answer(self, endpoint, params):
+		"""Answer one query.
+
+		Parameters
+		----------
+		endpoint : str
+			Path of the query, one of QUERY_LEVELS
+		params : dict
+			Query parameters
+
+		Returns
+		-------
+		int
+			HTTP status of the response
+		bytes
+			JSON body of the response
+		"""
+
+		if endpoint in ROLLUP_QUERIES:
+			return self.answerRollup(endpoint, params)
+		fields = QUERY_LEVELS.get(endpoint)
+		if fields is None:
+			return 404, self.error("unknown endpoint %s, one of %s" % (endpoint, ', '.join(list(QUERY_LEVELS) + list(ROLLUP_QUERIES))))
+		missing = [field for field in fields if not params.get(field)]
+		if missing:
+			return 400, self.error("missing parameter %s" % ', '.join(missing))
+
+		table = self.snapshots.current()
+		path = tuple(params[field] for field in fields)
+		node = table.index.lookup(*path)
+		if node is None:
+			return 404, self.error("no availability for %s" % ', '.join('%s=%s' % pair for pair in zip(fields, path)))
+
+		if endpoint == '/slots':
+			return 200, self.encode(table, self.slotOptions(table, path, node))
+		with self._lock:
+			return 200, self.responses.get(table, (endpoint,) + path, lambda: self.encode(table, self.options(endpoint, node)))
+
+	def answerRollup(self, endpoint, params):
+		required, optional = ROLLUP_QUERIES[endpoint]
+		missing = [field for field in required if not params.get(field)]
+		if missing:
+			return 400, self.error("missing parameter %s" % ', '.join(missing))
+		path = tuple(params[field] for field in required)
+		for field in optional:
+			if not params.get(field):
+				break
+			path += (params[field],)
+
+		table = self.snapshots.current()
+		rollups = rollupIndex(table)
+		if path not in rollups.positions:
+			return 404, self.error("no availability for %s" % ', '.join('%s=%s' % pair for pair in zip(required + optional, path)))
+		date = params.get('date') or None
+		if endpoint == '/available' and date is not None and date not in rollups.dates:
+			return 400, self.error("unknown date %s, one of %s" % (date, ', '.join(rollups.dates)))
+
+		with self._lock:
+			return 200, self.responses.get(table, (endpoint, date) + path, lambda: self.encodeRollup(table, rollups, endpoint, path, date))
+
+	def encodeRollup(self, table, rollups, endpoint, path, date):
+		if endpoint == '/earliest':
+			return json.dumps(dict(rollups.rollup(*path), version=table.version)).encode('utf-8')
+		options = [{'name': name, 'slots': slots, 'hospitals': hospitals} for name, slots, hospitals in rollups.availableOptions(*path, date=date)]
+		return json.dumps({'version': table.version, 'date': date, 'options': options}).encode('utf-8')
+
+	def options(self, endpoint, node):
+		if endpoint == '/hospitals':
+			return [{'hospital': hospital, 'vaccine': vaccine} for hospital, vaccine in node.options]
+		return list(node.options)
+
+	def slotOptions(self, table, path, node):
+		# The slots of the rows of the hospital on every date, summed at once
+		published = table.slots[node.rows].sum(axis=0).tolist() if node.rows else [0] * len(table.dates)
+		options = []
+		for date, slots in zip(table.dates, published):
+			available = slots if self.reservations is None else max(0, slots - self.reservations.taken(path, date))
+			options.append({'date': date, 'slots': slots, 'available': available})
+		return options
+
+	def encode(self, table, options):
+		return json.dumps({'version': table.version, 'options': options}).encode('utf-8')
+
+	def error(self, message):
+		return json.dumps({'error': message}).encode('utf-8')
+
+############################################################################################################################
+
+class QueryRequestHandler(http.server.BaseHTTPRequestHandler):
+	"""Handler of the GET requests of the QueryServer, keeping the connection alive between them.
+
+	The headers and body of a response are buffered and sent with one write, with TCP_NODELAY, so that a
+	response never waits for the delayed ACK of its headers. /metrics answers with the metrics of the server,
+	if it has any, in the text format of Prometheus.
+	"""
+
+	protocol_version = 'HTTP/1.1'
+	disable_nagle_algorithm = True
+	wbufsize = -1
+
+	def do_GET(self):
+		url = urllib.parse.urlsplit(self.path)
+		if url.path == '/metrics' and self.server.metrics is not None:
+			status, body, content_type = 200, self.server.metrics.render().encode('utf-8'), METRICS_CONTENT_TYPE
+		else:
+			status, body = self.server.queries.answer(url.path.rstrip('/') or '/', dict(urllib.parse.parse_qsl(url.query)))
+			content_type = 'application/json'
+		self.send_response(status)
+		self.send_header('Content-Type', content_type)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+############################################################################################################################
+
+class QueryServer:
+	"""HTTP server of the AvailabilityQueries, run in a background thread of the booking server.
+
+	Parameters
+	----------
+	queries : AvailabilityQueries
+		Queries answered
+	host : str
+		IP address to listen on
+	port : int
+		Port to listen on, any free port if 0
+	metrics : server_metrics.ServerMetrics
+		Metrics served at /metrics, or None
+	"""
+
+	def __init__(self, queries, host, port, metrics=None):
+		self.queries = queries
+		self.httpd = http.server.ThreadingHTTPServer((host, port), QueryRequestHandler)
+		self.httpd.daemon_threads = True
+		self.httpd.queries = queries
+		self.httpd.metrics = metrics
+		self.thread = threading.Thread(target=self.httpd.serve_forever, name='query-server', daemon=True)
+
+	def start(self):
+		self.thread.start()
+		return self
+
+	def url(self, path='/'):
+		return 'http://%s:%d%s' % (self.httpd.server_address[0], self.httpd.server_address[1], path)
+
+	def close(self):
+		self.httpd.shutdown()
+		self.httpd.server_close()
@@ -0,0 +1,217 @@
+# Import required module/s
+import bisect
+import os
+import threading
+from collections import OrderedDict
+
+
+# Upper bounds in seconds of the buckets of the latency histograms, from a tenth of a millisecond to a minute
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds in seconds of the buckets of the session duration histogram, from a second to an hour
+SESSION_BUCKETS = (1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# Content type of the text exposition format of Prometheus
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+	"""Counts of the values observed in fixed buckets, with their sum, as a Prometheus histogram.
+
+	Recording a value is one binary search over the bucket bounds and two additions, without a lock: every
+	histogram of the server is recorded from one thread, e.g. the event loop or the refresher, while the
+	exposition only reads it.
+
+	Parameters
+	----------
+	bounds : tuple
+		Sorted upper bounds of the buckets, a last bucket holding the values above them
+
+	Attributes
+	----------
+	counts : list
+		Number of values observed in every bucket, not cumulated
+	sum : float
+		Sum of the values observed
+	"""
+
+	__slots__ = ('bounds', 'counts', 'sum')
+
+	def __init__(self, bounds):
+		self.bounds = bounds
+		self.counts = [0] * (len(bounds) + 1)
+		self.sum = 0.0
+
+	def observe(self, value):
+		self.counts[bisect.bisect_left(self.bounds, value)] += 1
+		self.sum += value
+
+	@property
+	def count(self):
+		return sum(self.counts)
+
+############################################################################################################################
+
+class HistogramFamily:
+	"""Histograms of one metric, one for every value of its label, e.g. one for every level of the menu.
+
+	Parameters
+	----------
+	name : str
+		Name of the metric
+	help : str
+		Description of the metric
+	label : str
+		Name of the label telling the histograms apart, or None for a single histogram
+	bounds : tuple
+		Upper bounds of the buckets of the histograms
+	"""
+
+	def __init__(self, name, help, label=None, bounds=LATENCY_BUCKETS):
+		self.name = name
+		self.help = help
+		self.label = label
+		self.bounds = bounds
+		self.histograms = OrderedDict()
+
+	def observe(self, value, label_value=None):
+		"""Record a value, in the histogram of `label_value`, which is created the first time it is recorded."""
+
+		histogram = self.histograms.get(label_value)
+		if histogram is None:
+			histogram = self.histograms.setdefault(label_value, Histogram(self.bounds))
+		# Histogram.observe inlined, as this is called for every step of every session
+		histogram.counts[bisect.bisect_left(self.bounds, value)] += 1
+		histogram.sum += value
+
+	def render(self):
+		lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s histogram' % self.name]
+		for label_value, histogram in list(self.histograms.items()):
+			labels = '%s="%s",' % (self.label, label_value) if self.label else ''
+			cumulated = 0
+			for bound, count in zip(self.bounds + (float('inf'),), list(histogram.counts)):
+				cumulated += count
+				lines.append('%s_bucket{%sle="%s"} %d' % (self.name, labels, '+Inf' if bound == float('inf') else repr(bound), cumulated))
+			labels = '{%s}' % labels.rstrip(',') if labels else ''
+			lines.append('%s_sum%s %r' % (self.name, labels, histogram.sum))
+			lines.append('%s_count%s %d' % (self.name, labels, cumulated))
+		return lines
+
+############################################################################################################################
+
+class ServerMetrics:
+	"""Latency histograms and counts of the booking server, exposed in the text format of Prometheus.
+
+	The histograms are recorded where the time is spent: `ingest` for every stage of loading the data
+	(fetch, parse, index), `render_menu` for every menu rendered on a miss of the menu cache and `step` for every
+	input handled, both by level of the menu, `send` for the write of the frames of every step by level,
+	and `session` for the duration of every session. The counts, e.g. the sessions open or the bookings
+	made, are already kept by the objects of the server: they are registered as callables and only read
+	when the metrics are rendered, so they cost nothing to record.
+
+	Parameters
+	----------
+	prefix : str
+		Prefix of the names of the metrics
+
+	Example
+	-------
+	>>> metrics = ServerMetrics()
+	>>> metrics.step.observe(0.0002, 'state')
+	>>> metrics.gauge('sessions_open', "Sessions currently open", lambda: server.active_sessions)
+	>>> text = metrics.render()
+	"""
+
+	def __init__(self, prefix='cowin_'):
+		self.prefix = prefix
+		self._lock = threading.Lock()
+		self._histograms = []
+		self._values = OrderedDict()
+		self.ingest = self.histogram('ingest_seconds', "Time taken by every stage of loading the availability data", 'stage')
+		self.render_menu = self.histogram('menu_render_seconds', "Time taken to render a menu missing from the menu cache", 'level')
+		self.step = self.histogram('step_seconds', "Time taken to handle an input of a Client, by level of the menu it answers", 'level')
+		self.send = self.histogram('send_seconds', "Time taken to write the frames of a step until they are handed to the kernel, by level of the menu sent", 'level')
+		self.session = self.histogram('session_seconds', "Duration of the sessions, from the connection to its close", bounds=SESSION_BUCKETS)
+
+	def histogram(self, name, help, label=None, bounds=LATENCY_BUCKETS):
+		"""Register a HistogramFamily and return it."""
+
+		family = HistogramFamily(self.prefix + name, help, label, bounds)
+		self._histograms.append(family)
+		return family
+
+	def gauge(self, name, help, read):
+		"""Register a value that goes up and down, read by calling `read` whenever the metrics are rendered."""
+
+		with self._lock:
+			self._values[self.prefix + name] = ('gauge', help, read)
+
+	def counter(self, name, help, read):
+		"""Register a count that only goes up, read by calling `read` whenever the metrics are rendered."""
+
+		with self._lock:
+			self._values[self.prefix + name] = ('counter', help, read)
+
+	def render(self):
+		"""All the metrics in the text exposition format of Prometheus.
+
+		Returns
+		-------
+		str
+			Text of the metrics, e.g. served at /metrics
+		"""
+
+		lines = []
+		with self._lock:
+			values = list(self._values.items())
+		for name, (kind, help, read) in values:
+			lines += ['# HELP %s %s' % (name, help), '# TYPE %s %s' % (name, kind), '%s %s' % (name, read())]
+		for family in self._histograms:
+			lines += family.render()
+		return '\n'.join(lines) + '\n'
+
+	def dump(self, path):
+		"""Write the rendered metrics to a file, replacing it atomically so that a reader never sees half of it."""
+
+		temporary = '%s.%d.tmp' % (path, os.getpid())
+		with open(temporary, 'w') as f:
+			f.write(self.render())
+		os.replace(temporary, path)
+
+############################################################################################################################
+
+class MetricsDumper(threading.Thread):
+	"""Background thread writing the metrics to a file on an interval, for servers without an HTTP endpoint.
+
+	Parameters
+	----------
+	metrics : ServerMetrics
+		Metrics written
+	path : str
+		File the metrics are written to, e.g. read by the textfile collector of a Prometheus node exporter
+	interval : float
+		Seconds between two writes
+	"""
+
+	def __init__(self, metrics, path, interval):
+		super().__init__(name='metrics-dumper', daemon=True)
+		self.metrics = metrics
+		self.path = path
+		self.interval = interval
+		self._stop_event = threading.Event()
+
+	def run(self):
+		while not self._stop_event.wait(self.interval):
+			self.dump()
+
+	def dump(self):
+		try:
+			self.metrics.dump(self.path)
+		except OSError as error:
+			print("Writing the metrics to %s failed: %r" % (self.path, error))
+
+	def stop(self):
+		"""Stop writing, after writing the metrics one last time."""
+
+		self._stop_event.set()
+		self.dump()
@@ -0,0 +1,197 @@
+# Import required module/s
+import hashlib
+import itertools
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+
+
+# Default number of locks the hospitals are spread over
+DEFAULT_STRIPES = 64
+
+# Default number of counters, one for every hospital and date booked, the shared memory growing only as they are used
+DEFAULT_ENTRIES = 1 << 20
+
+# Words of a counter in the shared memory: two of the digest of its hospital and date, then the slots taken
+ENTRY_WORDS = 3
+
+
+class SlotReservations:
+	"""Inventory of the Vaccination slots taken at every hospital on every date, reserved with an atomic check-and-decrement.
+
+	The availability data only publishes how many slots a hospital has on a date; the number taken here is
+	kept apart, with Key as the path of the hospital in the menu tree and the date, so it carries over
+	every refresh of the data. A hospital and date have as many slots as the rows of the hospital have in
+	the table served, and a reservation is granted only while fewer have been taken.
+
+	The counters live in an anonymous shared memory mapping, so the worker processes of the pre-fork mode,
+	forked after the inventory is created, all count the same slots. It is an open-addressing hash table
+	keyed by a 128-bit digest of the hospital and date, split into `stripes` regions, each with its own
+	process-shared lock, so that reservations at unrelated hospitals almost never wait for each other.
+	Reading a count takes no lock. Once the `entries` counters of a region are all used, no new hospital
+	and date of that region can be reserved.
+
+	Parameters
+	----------
+	stripes : int
+		Number of locks and regions of counters
+	entries : int
+		Number of counters, shared evenly by the regions
+
+	Attributes
+	----------
+	reserved : int
+		Number of reservations granted by this process
+	rejected : int
+		Number of reservations refused by this process because no slot was left
+	"""
+
+	def __init__(self, stripes=DEFAULT_STRIPES, entries=DEFAULT_ENTRIES):
+		self.stripes = stripes
+		self._per_stripe = max(1, entries // stripes)
+		self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+		# Anonymous mappings are shared with the processes forked afterwards, and zero-filled: a zero digest marks a free counter
+		self._memory = mmap.mmap(-1, 8 * ENTRY_WORDS * stripes * self._per_stripe)
+		self._cells = memoryview(self._memory).cast('Q')
+		self._ids = itertools.count(1)
+		self._id_prefix = '%X' % int(time.time())
+		self._reserved = [0] * stripes
+		self._rejected = [0] * stripes
+
+	def _digest(self, path, date):
+		"""Two words identifying a hospital and date in every process, the first never zero.
+
+		The region of a digest is taken from the second word and its place in the region from the first one
+		without its low bit, which is forced to one and would otherwise leave half the regions unused.
+		"""
+
+		first, second = struct.unpack('QQ', hashlib.blake2b(repr((path, date)).encode('utf-8'), digest_size=16).digest())
+		return first | 1, second
+
+	def _find(self, first, second):
+		"""Index in the cells of the counter of a digest, or of the free counter it would take, or None if its region is full."""
+
+		cells = self._cells
+		start = (second % self.stripes) * self._per_stripe
+		offset = (first >> 1) % self._per_stripe
+		for probe in range(self._per_stripe):
+			index = ENTRY_WORDS * (start + (offset + probe) % self._per_stripe)
+			if cells[index] == 0 or (cells[index] == first and cells[index + 1] == second):
+				return index
+		return None
+
+	def _add(self, first, second, index, count):
+		"""Set the counter at `index` to `count`, claiming it for the digest if it is free, under the lock of its region."""
+
+		cells = self._cells
+		cells[index + 2] = count
+		if cells[index] == 0:
+			# The digest is written last, so a reader never matches a counter whose count is not set yet
+			cells[index + 1] = second
+			cells[index] = first
+
+	def capacity(self, table, path, date):
+		"""Slots published in `table` for a hospital on a date.
+
+		Parameters
+		----------
+		table : availability_store.AvailabilityTable
+			Table served
+		path : tuple
+			Dose, age group, state, district and hospital name
+		date : str
+			Label of the date, one of `table.dates`
+
+		Returns
+		-------
+		int
+			Total slots of the rows of the hospital on that date, 0 if either is unknown
+		"""
+
+		node = table.index.lookup(*path)
+		if node is None or not node.rows or date not in table.dates:
+			return 0
+		return int(table.slots[node.rows, table.dates.index(date)].sum())
+
+	def remaining(self, table, path, date):
+		"""Slots of a hospital on a date not taken yet."""
+
+		return max(0, self.capacity(table, path, date) - self.taken(path, date))
+
+	def reserve(self, table, path, date):
+		"""Take one slot of a hospital on a date if any is left.
+
+		Parameters
+		----------
+		table : availability_store.AvailabilityTable
+			Table served, giving the slots published for the hospital
+		path : tuple
+			Dose, age group, state, district and hospital name
+		date : str
+			Label of the date
+
+		Returns
+		-------
+		str
+			Booking ID of the reservation, or None if no slot is left
+		"""
+
+		capacity = self.capacity(table, path, date)
+		first, second = self._digest(path, date)
+		stripe = second % self.stripes
+		with self._locks[stripe]:
+			index = self._find(first, second)
+			count = self._cells[index + 2] if index is not None else capacity
+			if count >= capacity:
+				self._rejected[stripe] += 1
+				return None
+			self._add(first, second, index, count + 1)
+			self._reserved[stripe] += 1
+		# The process id keeps the IDs of the pre-fork workers apart, as they fork with the same counter
+		return '%s-%X-%06d' % (self._id_prefix, os.getpid(), next(self._ids))
+
+	def restore(self, path, date):
+		"""Take one slot of a hospital on a date whatever its capacity, for a booking made before, e.g. from the journal.
+
+		Returns
+		-------
+		int
+			Number of slots of the hospital taken on that date, or None if no counter was left for it
+		"""
+
+		first, second = self._digest(path, date)
+		with self._locks[second % self.stripes]:
+			index = self._find(first, second)
+			if index is None:
+				return None
+			count = self._cells[index + 2] + 1
+			self._add(first, second, index, count)
+		return count
+
+	def release(self, path, date):
+		"""Give back one slot of a hospital on a date, for a reservation whose booking could not be recorded."""
+
+		first, second = self._digest(path, date)
+		stripe = second % self.stripes
+		with self._locks[stripe]:
+			index = self._find(first, second)
+			if index is not None and self._cells[index] != 0 and self._cells[index + 2] > 0:
+				self._cells[index + 2] -= 1
+				self._reserved[stripe] -= 1
+
+	@property
+	def reserved(self):
+		return sum(self._reserved)
+
+	@property
+	def rejected(self):
+		return sum(self._rejected)
+
+	def taken(self, path, date):
+		"""Number of slots of a hospital taken on a date."""
+
+		first, second = self._digest(path, date)
+		index = self._find(first, second)
+		return self._cells[index + 2] if index is not None and self._cells[index] == first else 0
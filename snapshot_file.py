@@ -0,0 +1,218 @@
+# Import required module/s
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+import numpy as np
+
+from availability_store import TABLE_COLUMNS, AvailabilityTable, CategoricalColumn, MenuIndex, MenuNode, buildAvailabilityTable
+
+
+# Layout of a snapshot file, all integers little-endian:
+#   header       SNAPSHOT_HEADER
+#   strings      uint32 offsets[n_strings + 1] into the UTF-8 blob, then the blob padded to 4 bytes
+#   dates        uint32 string ids[n_dates]
+#   columns      uint32 string ids[n_rows] for each of TABLE_COLUMNS
+#   slots        int32 counts[n_rows * n_dates], row-major
+#   index        uint32 parent[n_nodes], uint32 label string id[n_nodes], uint32 hospital node[n_rows]
+#   options      uint32 district node[n_pairs], hospital string id[n_pairs], vaccine string id[n_pairs]
+# Index nodes are written breadth-first with the children of a node in sorted order, node 0 being the root,
+# and the (hospital, vaccine) options of the district nodes are written in sorted order.
+SNAPSHOT_MAGIC = b'COWINSNP'
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('<8sHHIIIIIQ64s')
+NO_NODE = 0xFFFFFFFF
+
+
+def _uint32Array(values):
+	column = array('I', values)
+	if sys.byteorder == 'big':
+		column.byteswap()
+	return column
+
+############################################################################################################################
+
+def save_snapshot(table, path):
+	"""Write the normalized table and its menu index to a versioned binary snapshot file.
+
+	Strings are stored once in a string table and every column as a fixed-width array of string ids,
+	so the file can be mapped back into memory by `load_snapshot` without any parsing. The file is
+	replaced atomically.
+
+	Parameters
+	----------
+	table : availability_store.AvailabilityTable
+		Indexed table to save
+	path : str
+		Path of the snapshot file
+	"""
+
+	if table.dead_rows:
+		compacted = buildAvailabilityTable(table.iterRows(), dates=table.dates)
+		compacted.content_hash = table.content_hash
+		compacted.version = getattr(table, 'version', 0)
+		table = compacted
+
+	string_ids = {}
+	def stringId(value):
+		string_id = string_ids.get(value)
+		if string_id is None:
+			string_id = string_ids[value] = len(string_ids)
+		return string_id
+
+	dates = _uint32Array(stringId(date) for date in table.dates)
+	columns = []
+	for name in TABLE_COLUMNS:
+		column = getattr(table, name)
+		value_ids = [stringId(value) for value in column.values]
+		columns.append(_uint32Array(value_ids[code] for code in column.codes))
+	table.flushSlots()
+	slots = table.slots.astype('<i4').tobytes()
+
+	node_parent = array('I')
+	node_label = array('I')
+	hospital_node = array('I', [NO_NODE]) * len(table)
+	option_node = array('I')
+	option_hospital = array('I')
+	option_vaccine = array('I')
+	pending = [(table.index.root, NO_NODE, NO_NODE)]
+	for node, parent, label in pending:
+		node_id = len(node_parent)
+		node_parent.append(parent)
+		node_label.append(label)
+		for row in node.rows:
+			hospital_node[row] = node_id
+		for option in node.options:
+			if isinstance(option, tuple):
+				option_node.append(node_id)
+				option_hospital.append(stringId(option[0]))
+				option_vaccine.append(stringId(option[1]))
+		for option in sorted(node.children):
+			pending.append((node.children[option], node_id, stringId(option)))
+	index_columns = [_uint32Array(column) for column in (node_parent, node_label, hospital_node, option_node, option_hospital, option_vaccine)]
+
+	blob = bytearray()
+	offsets = [0]
+	for value in string_ids:
+		blob += value.encode('utf-8')
+		offsets.append(len(blob))
+	blob += b'\0' * (-len(blob) % 4)
+
+	header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(table.dates), len(string_ids), len(table),
+		len(node_parent), len(option_node), len(blob), getattr(table, 'version', 0), (table.content_hash or '').encode('ascii'))
+
+	directory = os.path.dirname(os.path.abspath(path))
+	os.makedirs(directory, exist_ok=True)
+	fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+	try:
+		with os.fdopen(fd, 'wb') as f:
+			f.write(header)
+			f.write(_uint32Array(offsets))
+			f.write(blob)
+			f.write(dates)
+			for column in columns:
+				f.write(column)
+			f.write(slots)
+			for column in index_columns:
+				f.write(column)
+		os.replace(tmp_path, path)
+	except BaseException:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+		raise
+
+############################################################################################################################
+
+def load_snapshot(path):
+	"""Map a snapshot file written by `save_snapshot` into memory and rebuild the indexed table from it.
+
+	The slot matrix is a read-only view of the mapped file rather than a copy, and a server starting from
+	a snapshot never imports bs4 or requests.
+
+	Parameters
+	----------
+	path : str
+		Path of the snapshot file
+
+	Returns
+	-------
+	availability_store.AvailabilityTable
+		Indexed table, with the `content_hash` of the web-page it was parsed from
+
+	Raises
+	------
+	ValueError
+		If the file is not a snapshot or was written in another format version
+	"""
+
+	# The mapping stays open for as long as the slot matrix viewing it is referenced
+	with open(path, 'rb') as f:
+		mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+	magic, format_version, n_dates, n_strings, n_rows, n_nodes, n_pairs, blob_size, data_version, content_hash = SNAPSHOT_HEADER.unpack_from(mapped)
+	if magic != SNAPSHOT_MAGIC:
+		raise ValueError("%s is not an availability snapshot" % path)
+	if format_version != SNAPSHOT_FORMAT_VERSION:
+		raise ValueError("Snapshot %s has format version %d, expected %d" % (path, format_version, SNAPSHOT_FORMAT_VERSION))
+
+	view = memoryview(mapped)
+	position = SNAPSHOT_HEADER.size
+	def uint32s(count):
+		nonlocal position
+		values = view[position:position + 4 * count]
+		position += 4 * count
+		if sys.byteorder == 'big':
+			values = array('I', values)
+			values.byteswap()
+			return values
+		return values.cast('I')
+
+	offsets = uint32s(n_strings + 1)
+	blob = bytes(view[position:position + blob_size])
+	position += blob_size
+	strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(n_strings)]
+
+	table = AvailabilityTable([strings[i] for i in uint32s(n_dates)])
+	for name in TABLE_COLUMNS:
+		# Re-encode the column with its own distinct values only
+		string_ids, codes = np.unique(np.frombuffer(mapped, dtype='<u4', count=n_rows, offset=position), return_inverse=True)
+		position += 4 * n_rows
+		setattr(table, name, CategoricalColumn([strings[i] for i in string_ids.tolist()], array('I', codes.astype(np.uint32).tobytes())))
+	table.slots = np.frombuffer(mapped, dtype='<i4', count=n_rows * n_dates, offset=position).reshape(n_rows, n_dates)
+	position += 4 * n_rows * n_dates
+	table.positions = {key: row for row, key in enumerate(zip(table.hospital, table.district, table.state, table.dose, table.age, table.vaccine))}
+
+	node_parent = uint32s(n_nodes)
+	node_label = uint32s(n_nodes)
+	hospital_node = uint32s(n_rows)
+
+	option_node = uint32s(n_pairs)
+	option_hospital = uint32s(n_pairs)
+	option_vaccine = uint32s(n_pairs)
+
+	nodes = [MenuNode() for _ in range(n_nodes)]
+	for node_id in range(1, n_nodes):
+		nodes[node_parent[node_id]].children[strings[node_label[node_id]]] = nodes[node_id]
+	for row in range(n_rows):
+		nodes[hospital_node[row]].rows.append(row)
+
+	# Children were attached in sorted order, the options of the district nodes are the (hospital, vaccine) pairs
+	for node in nodes:
+		node.options = tuple(node.children)
+	district_options = {}
+	for pair in range(n_pairs):
+		district_options.setdefault(option_node[pair], []).append((strings[option_hospital[pair]], strings[option_vaccine[pair]]))
+	for node_id, options in district_options.items():
+		nodes[node_id].options = tuple(options)
+
+	index = MenuIndex.__new__(MenuIndex)
+	index.root = nodes[0]
+	index.build_seconds = 0.0
+	table.index = index
+	table.content_hash = content_hash.rstrip(b'\0').decode('ascii') or None
+	table.version = data_version
+
+	return table
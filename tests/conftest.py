@@ -0,0 +1,44 @@
+# Import required module/s
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from availability_store import buildAvailabilityTable, iterAvailabilityRows
+from mock_site import changedRows, generatePage
+
+
+# Rows of the generated page the tables of the tests are built from, small enough to build in a few milliseconds
+N_ROWS = 2000
+
+
+def menuTree(table):
+	"""Every node of the menu index of a table, by path, with its options and the rows under it given by their content rather than their positions."""
+
+	tree = {}
+	pending = [((), table.index.root)]
+	while pending:
+		path, node = pending.pop()
+		tree[path] = (node.options, sorted((table.hospital[row], table.vaccine[row], list(table.slots[row])) for row in node.rows))
+		pending.extend((path + (option,), child) for option, child in node.children.items())
+	return tree
+
+
+def tableContent(table):
+	"""Dates and live rows of a table, in a form equal for two tables holding the same data."""
+
+	return table.dates, sorted((row[:6], list(row[6])) for row in table.iterRows())
+
+
+@pytest.fixture
+def table():
+	return buildAvailabilityTable(iterAvailabilityRows([generatePage(N_ROWS)]))
+
+
+@pytest.fixture
+def fresh_rows(table):
+	return changedRows(table, 0.05, seed=1)
@@ -0,0 +1,134 @@
+# Import required module/s
+import asyncio
+from concurrent.futures import Future
+
+from async_server import AsyncBookingServer
+from framing import encodeFrame, readFrame, FRAME_HEADER, GOODBYE_FRAME, INPUT_FRAME, MENU_FRAME
+
+
+# Seconds of idle timeout of the servers of the tests, short enough for the tests to wait for it
+IDLE_TIMEOUT = 0.2
+
+BUSY = encodeFrame(GOODBYE_FRAME, "busy")
+REAPED = encodeFrame(GOODBYE_FRAME, "reaped")
+
+
+class EchoSession:
+	"""Session answering every input with a menu holding it, waiting for a Future on 'w' and ending on 'q'."""
+
+	def __init__(self, snapshots):
+		self.closed = False
+		self.watch = None
+
+	def start(self):
+		return [encodeFrame(MENU_FRAME, "menu")]
+
+	def step(self, data):
+		if data == 'q':
+			self.closed = True
+			return []
+		if data == 'w':
+			self.watch = Future()
+			return [encodeFrame(MENU_FRAME, "waiting")]
+		return [encodeFrame(MENU_FRAME, data)]
+
+
+def serve(client, **limits):
+	"""Run `client` against a server of EchoSessions on a free port, returning the server once it is done."""
+
+	async def run():
+		server = AsyncBookingServer(None, EchoSession, '127.0.0.1', 0, goodbye=encodeFrame(GOODBYE_FRAME, ""),
+			busy=BUSY, reaped=REAPED, **limits)
+		await server.start()
+		try:
+			await client(server, server.server.sockets[0].getsockname()[1])
+		finally:
+			server.server.close()
+			await server.server.wait_closed()
+		return server
+
+	return asyncio.run(asyncio.wait_for(run(), 10))
+
+
+async def readAll(reader):
+	"""Frames sent until the connection is closed."""
+
+	frames = []
+	while True:
+		frame = await readFrame(reader)
+		if frame is None:
+			return frames
+		frames.append(frame)
+
+
+def test_silent_client_is_reaped():
+	async def client(server, port):
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		assert await readAll(reader) == [(MENU_FRAME, b"menu"), (GOODBYE_FRAME, b"reaped")]
+		writer.close()
+
+	assert serve(client, idle_timeout=IDLE_TIMEOUT).reaped_sessions == 1
+
+
+def test_client_stalled_in_the_middle_of_a_frame_is_reaped():
+	async def client(server, port):
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		writer.write(encodeFrame(INPUT_FRAME, "12345")[:FRAME_HEADER.size + 2])
+		assert (await readAll(reader))[-1] == (GOODBYE_FRAME, b"reaped")
+		writer.close()
+
+	assert serve(client, idle_timeout=IDLE_TIMEOUT).reaped_sessions == 1
+
+
+def test_client_answering_in_time_is_not_reaped():
+	async def client(server, port):
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		await readFrame(reader)
+		for data in ('1', '2', '3', '4'):
+			await asyncio.sleep(IDLE_TIMEOUT / 2)
+			writer.write(encodeFrame(INPUT_FRAME, data))
+			assert await readFrame(reader) == (MENU_FRAME, data.encode())
+		writer.write(encodeFrame(INPUT_FRAME, 'q'))
+		assert await readAll(reader) == [(GOODBYE_FRAME, b"")]
+		writer.close()
+
+	server = serve(client, idle_timeout=IDLE_TIMEOUT)
+	assert (server.reaped_sessions, server.total_sessions) == (0, 1)
+
+
+def test_waiting_session_is_not_reaped():
+	async def client(server, port):
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		await readFrame(reader)
+		writer.write(encodeFrame(INPUT_FRAME, 'w'))
+		assert await readFrame(reader) == (MENU_FRAME, b"waiting")
+		await asyncio.sleep(3 * IDLE_TIMEOUT)
+		writer.write(encodeFrame(INPUT_FRAME, 'q'))
+		assert await readAll(reader) == [(GOODBYE_FRAME, b"")]
+		writer.close()
+
+	assert serve(client, idle_timeout=IDLE_TIMEOUT).reaped_sessions == 0
+
+
+def test_connections_over_max_sessions_are_shed():
+	async def client(server, port):
+		sessions = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+		for reader, _ in sessions:
+			assert await readFrame(reader) == (MENU_FRAME, b"menu")
+
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		assert await readAll(reader) == [(GOODBYE_FRAME, b"busy")]
+		writer.close()
+
+		reader, writer = sessions.pop()
+		writer.write(encodeFrame(INPUT_FRAME, 'q'))
+		await readAll(reader)
+		writer.close()
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		assert await readFrame(reader) == (MENU_FRAME, b"menu")
+		assert server.active_sessions == 2
+		for _, writer in sessions + [(reader, writer)]:
+			writer.close()
+
+	server = serve(client, max_sessions=2)
+	assert (server.shed_sessions, server.total_sessions) == (1, 3)
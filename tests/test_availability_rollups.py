@@ -0,0 +1,63 @@
+# Import required module/s
+import pytest
+
+from availability_rollups import AvailabilityRollups, rollupIndex
+from availability_store import menuPath, updateAvailabilityTable
+from mock_site import changedRows
+
+
+def rollupsContent(rollups):
+	"""Aggregates and options of every node of the rollups, in a form equal for two rollups of the same data."""
+
+	return {path: (rollups.rollup(*path), rollups.availableOptions(*path)) for path in rollups.positions}
+
+
+def test_rollups_sum_the_rows_under_every_node(table):
+	rollups = rollupIndex(table)
+	key, row = next(iter(table.positions.items()))
+	path = menuPath(key)
+
+	for depth in range(1, 6):
+		rows = table.rowsUnder(*path[:depth])
+		totals = table.slots[rows].sum(axis=0).tolist()
+		assert list(rollups.rollup(*path[:depth])['slots'].values()) == totals
+		dates = table.availableDates(rows)
+		assert rollups.firstDate(*path[:depth]) == (dates[0] if dates else None)
+	assert rollups.rollup('3') is None
+
+
+def test_available_options_on_a_date(table):
+	rollups = rollupIndex(table)
+	path = menuPath(next(iter(table.positions)))[:3]
+	date = table.dates[1]
+
+	options = rollups.availableOptions(*path, date=date)
+
+	assert options
+	for district, slots, hospitals in options:
+		assert slots == int(table.slots[table.rowsUnder(*path, district), 1].sum()) > 0
+	with pytest.raises(ValueError):
+		rollups.availableOptions(*path, date='Feb 30')
+
+
+@pytest.mark.parametrize('fraction', [0.002, 0.05])
+def test_update_equals_full_rebuild(table, fraction):
+	previous = rollupIndex(table)
+	before = rollupsContent(previous)
+	refreshed = updateAvailabilityTable(table, changedRows(table, fraction, seed=3))
+
+	updated = rollupIndex(refreshed, table)
+
+	assert updated is not previous
+	assert rollupsContent(updated) == rollupsContent(AvailabilityRollups(refreshed))
+	assert rollupsContent(previous) == before
+
+
+def test_successive_updates_equal_full_rebuild(table):
+	rollupIndex(table)
+	for seed in range(5):
+		refreshed = updateAvailabilityTable(table, changedRows(table, 0.02, seed=seed))
+		rollupIndex(refreshed, table)
+		table = refreshed
+
+	assert rollupsContent(table.rollups) == rollupsContent(AvailabilityRollups(table))
@@ -0,0 +1,36 @@
+# Import required module/s
+from availability_store import buildAvailabilityTable, updateAvailabilityTable
+from conftest import menuTree, tableContent
+
+
+def test_update_equals_full_rebuild(table, fresh_rows):
+	updated = updateAvailabilityTable(table, fresh_rows)
+	rebuilt = buildAvailabilityTable(fresh_rows)
+
+	assert updated.changes.added and updated.changes.removed and updated.changes.updated
+	assert tableContent(updated) == tableContent(rebuilt)
+	assert menuTree(updated) == menuTree(rebuilt)
+
+
+def test_update_leaves_previous_table_unchanged(table, fresh_rows):
+	content, tree = tableContent(table), menuTree(table)
+
+	updateAvailabilityTable(table, fresh_rows)
+
+	assert tableContent(table) == content
+	assert menuTree(table) == tree
+
+
+def test_update_without_changes_returns_previous(table):
+	assert updateAvailabilityTable(table, list(table.iterRows())) is table
+
+
+def test_update_compacts_tombstones(table):
+	rows = list(table.iterRows())
+	kept = rows[:len(rows) // 3]
+
+	updated = updateAvailabilityTable(table, kept)
+
+	assert updated.dead_rows == 0
+	assert len(updated) == len(kept)
+	assert menuTree(updated) == menuTree(buildAvailabilityTable(kept))
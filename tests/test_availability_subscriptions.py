@@ -0,0 +1,141 @@
+# Import required module/s
+import json
+
+import pytest
+
+from availability_refresh import SnapshotHolder
+from availability_store import menuPath, updateAvailabilityTable
+from availability_subscriptions import SubscriptionIndex
+from menu_cache import MenuPayloadCache
+from slot_reservations import SlotReservations
+from w6_activity2_server import BookingSession, HOSPITAL_LEVEL, WATCH_LEVEL, WATCH_PROMPT
+
+
+def refreshed(table, key, column, change):
+	"""Table updated from `table` with the slots of the row of `key` on the date of `column` changed by `change`."""
+
+	rows = []
+	for row in table.iterRows():
+		if (row[0], row[2], row[1], row[4], row[5], row[3]) == key:
+			slots = list(row[6])
+			slots[column] = max(0, slots[column] + change)
+			row = row[:6] + (slots,)
+		rows.append(row)
+	return updateAvailabilityTable(table, rows)
+
+
+@pytest.fixture
+def key(table):
+	"""Key of a row of the 1st Dose, which a path selects without the date of the First Dose."""
+
+	return next(key for key in table.positions if key[3] == '1')
+
+
+def test_district_subscription_fires_once_on_new_slots(table, key):
+	index = SubscriptionIndex()
+	_, future = index.subscribe(menuPath(key)[:4])
+	new_table = refreshed(table, key, 2, 10)
+
+	assert index.match(table, new_table) == 1
+	assert future.result(0) == (menuPath(key), [table.dates[2]])
+	assert len(index) == 0
+	assert index.match(new_table, refreshed(new_table, key, 2, 10)) == 0
+
+
+def test_subscriptions_elsewhere_are_left_waiting(table, key):
+	index = SubscriptionIndex()
+	path = menuPath(key)
+	_, other_hospital = index.subscribe(path[:4] + ('Nowhere',))
+	_, other_dates = index.subscribe(path, [table.dates[0], table.dates[1]])
+	_, other_district = index.subscribe(path[:3] + ('Nowhere',))
+
+	assert index.match(table, refreshed(table, key, 2, 10)) == 0
+	assert not any(future.done() for future in (other_hospital, other_dates, other_district))
+	assert len(index) == 3
+
+
+def test_fewer_slots_notify_nobody(table, key):
+	index = SubscriptionIndex()
+	index.subscribe(menuPath(key))
+	table.slots[table.positions[key], 2] = 10
+
+	assert index.match(table, refreshed(table, key, 2, -5)) == 0
+
+
+def test_unsubscribed_never_fires(table, key):
+	index = SubscriptionIndex()
+	subscription, future = index.subscribe(menuPath(key))
+
+	index.unsubscribe(subscription)
+
+	assert index.match(table, refreshed(table, key, 2, 10)) == 0
+	assert not future.done()
+
+
+def test_table_without_change_set_is_compared_in_full(table, key):
+	index = SubscriptionIndex()
+	_, future = index.subscribe(menuPath(key), [table.dates[3]])
+	new_table = refreshed(table, key, 3, 10)
+	new_table.changes = None
+
+	assert index.match(table, new_table) == 1
+	assert future.result(0) == (menuPath(key), [table.dates[3]])
+
+
+@pytest.fixture
+def snapshots(table, monkeypatch):
+	monkeypatch.setattr(BookingSession, 'menus', MenuPayloadCache())
+	monkeypatch.setattr(BookingSession, 'reservations', SlotReservations(stripes=4))
+	monkeypatch.setattr(BookingSession, 'subscriptions', SubscriptionIndex())
+	snapshots = SnapshotHolder(table)
+	snapshots.listeners.append(BookingSession.subscriptions.match)
+	return snapshots
+
+
+def watchingSession(snapshots, key):
+	"""Session waiting for new slots in the District of `key`, with the frames of the step that started the wait."""
+
+	session = BookingSession(snapshots)
+	session.start()
+	frames = session.path(json.dumps(dict(zip(('dose', 'age_group', 'state', 'district'), menuPath(key)), watch=True)))
+	assert session.level == WATCH_LEVEL
+	return session, frames
+
+
+def test_waiting_session_is_sent_the_new_slots(table, key, snapshots):
+	session, _ = watchingSession(snapshots, key)
+	path = menuPath(key)
+
+	snapshots.swap(refreshed(table, key, 2, 10))
+
+	assert session.watch.done()
+	frames = session.notified()
+	assert b"New slots at " + path[4].encode('utf-8') in frames[0]
+	assert session.watch is None and len(session.subscriptions) == 0
+
+
+def test_waiting_session_is_prompted_to_go_back_or_quit(key, snapshots):
+	session, frames = watchingSession(snapshots, key)
+
+	assert frames[-1] == WATCH_PROMPT
+	assert session.step('x')[-1] == WATCH_PROMPT
+	assert session.level == WATCH_LEVEL
+
+
+def test_waiting_session_goes_back(key, snapshots):
+	session, _ = watchingSession(snapshots, key)
+
+	session.step('b')
+
+	assert session.level == HOSPITAL_LEVEL
+	assert session.watch is None and len(session.subscriptions) == 0
+
+
+def test_waiting_session_quits(key, snapshots):
+	session, _ = watchingSession(snapshots, key)
+
+	assert session.step('q') == []
+	session.close()
+
+	assert session.closed
+	assert len(session.subscriptions) == 0
@@ -0,0 +1,87 @@
+# Import required module/s
+import json
+
+import pytest
+
+from availability_store import menuPath
+from booking_journal import BookingJournal, JournalLockedError, replayJournal
+from slot_reservations import SlotReservations
+
+
+# Path of the hospital of the bookings journaled by the tests
+HOSPITAL = ('1', '18+', 'State 1', 'District 1-1', 'Hospital 1')
+
+
+def writeBookings(path, bookings):
+	"""Journal bookings and wait until they are durable."""
+
+	journal = BookingJournal(path)
+	futures = [journal.append(booking_id, hospital, date) for booking_id, hospital, date in bookings]
+	for future in futures:
+		future.result()
+	journal.close()
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+	path = str(tmp_path / 'bookings.jsonl')
+	writeBookings(path, [('A-1-000001', HOSPITAL, 'May 15'), ('A-1-000002', HOSPITAL, 'May 15'), ('A-1-000003', HOSPITAL, 'May 16')])
+	with open(path, 'a') as f:
+		f.write(json.dumps({'id': 'A-1-000004', 'path': list(HOSPITAL), 'date': 'May 15'})[:30])
+
+	reservations = SlotReservations(stripes=4)
+
+	assert replayJournal(path, reservations) == 3
+	assert reservations.taken(HOSPITAL, 'May 15') == 2
+	assert reservations.taken(HOSPITAL, 'May 16') == 1
+
+
+def test_reopening_drops_torn_last_line(tmp_path):
+	path = str(tmp_path / 'bookings.jsonl')
+	writeBookings(path, [('A-1-000001', HOSPITAL, 'May 15')])
+	with open(path, 'a') as f:
+		f.write('{"id": "A-1-0000')
+
+	writeBookings(path, [('A-1-000002', HOSPITAL, 'May 16')])
+
+	with open(path) as f:
+		records = [json.loads(line) for line in f]
+	assert [record['id'] for record in records] == ['A-1-000001', 'A-1-000002']
+
+
+def test_replay_restores_every_booking(tmp_path):
+	path = str(tmp_path / 'bookings.jsonl')
+	writeBookings(path, [('A-1-%06d' % number, HOSPITAL, 'May 15') for number in range(100)])
+
+	reservations = SlotReservations(stripes=4)
+
+	assert replayJournal(path, reservations) == 100
+	assert reservations.taken(HOSPITAL, 'May 15') == 100
+
+
+def test_replay_logs_bookings_over_published(table, tmp_path, capsys):
+	path = str(tmp_path / 'bookings.jsonl')
+	key, row = next((key, row) for key, row in table.positions.items() if table.slots[row, 0] > 0)
+	hospital, date = menuPath(key), table.dates[0]
+	reservations = SlotReservations(stripes=4)
+	published = reservations.capacity(table, hospital, date)
+	writeBookings(path, [('A-1-%06d' % number, hospital, date) for number in range(published + 1)])
+
+	assert replayJournal(path, reservations, table) == published + 1
+	assert reservations.remaining(table, hospital, date) == 0
+	assert "over the %d slots published" % published in capsys.readouterr().out
+
+
+def test_journal_is_locked_while_open(tmp_path):
+	path = str(tmp_path / 'bookings.jsonl')
+	journal = BookingJournal(path)
+	try:
+		with pytest.raises(JournalLockedError):
+			BookingJournal(path)
+	finally:
+		journal.close()
+
+	BookingJournal(path).close()
+
+
+def test_replay_of_missing_journal(tmp_path):
+	assert replayJournal(str(tmp_path / 'missing.jsonl'), SlotReservations(stripes=4)) == 0
@@ -0,0 +1,122 @@
+# Import required module/s
+import errno
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from availability_refresh import SnapshotHolder
+from availability_store import menuPath
+from framing import FRAME_HEADER, INPUT_REQUESTS, TEXT_FRAME
+from menu_cache import MenuPayloadCache
+from slot_reservations import SlotReservations
+from w6_activity2_server import BookingSession, DISTRICT_LEVEL, HOSPITAL_LEVEL, LEVEL_LABELS, SLOT_LEVEL, STATE_LEVEL
+
+
+def decodeFrames(messages):
+	"""(frame type, text) of every encoded frame of a step."""
+
+	frames = []
+	for message in messages:
+		position = 0
+		while position < len(message):
+			frame_type, size = FRAME_HEADER.unpack_from(message, position)
+			position += FRAME_HEADER.size
+			frames.append((frame_type, message[position:position + size].decode('utf-8')))
+			position += size
+	return frames
+
+
+def pathFields(table, published):
+	"""Fields of a path to a hospital of the 1st Dose and a date whose slots published are, or are not, above 0."""
+
+	reservations = SlotReservations(stripes=1)
+	for key in table.positions:
+		path = menuPath(key)
+		if path[0] != '1':
+			continue
+		for date in table.dates:
+			if (reservations.capacity(table, path, date) > 0) == published:
+				return dict(zip(('dose', 'age_group', 'state', 'district', 'hospital'), path), date=date)
+	raise LookupError("No such path in the table")
+
+
+class FailingJournal:
+	"""Journal whose every write fails as on a full disk."""
+
+	def append(self, booking_id, path, date):
+		future = Future()
+		future.set_exception(OSError(errno.ENOSPC, "No space left on device"))
+		return future
+
+
+@pytest.fixture
+def session(table, monkeypatch):
+	monkeypatch.setattr(BookingSession, 'menus', MenuPayloadCache())
+	monkeypatch.setattr(BookingSession, 'reservations', SlotReservations(stripes=4))
+	session = BookingSession(SnapshotHolder(table))
+	session.start()
+	return session
+
+
+def test_path_books_in_one_message(table, session):
+	frames = decodeFrames(session.path(json.dumps(pathFields(table, published=True))))
+
+	assert session.closed
+	assert any(frame_type == TEXT_FRAME and "Booking ID" in text for frame_type, text in frames)
+	assert session.reservations.reserved == 1
+
+
+def test_failed_journal_write_gives_the_slot_back(table, session, monkeypatch):
+	monkeypatch.setattr(BookingSession, 'journal', FailingJournal())
+	fields = pathFields(table, published=True)
+	session.path(json.dumps(fields))
+
+	with pytest.raises(OSError) as error:
+		session.commit.result()
+	frames = decodeFrames(session.commitFailed(error.value))
+
+	assert frames == [(TEXT_FRAME, "\n<<< Your appointment could not be scheduled, try again later!")]
+	hospital = tuple(fields[field] for field in ('dose', 'age_group', 'state', 'district', 'hospital'))
+	assert session.reservations.taken(hospital, fields['date']) == 0
+	assert session.commit is None
+
+
+@pytest.mark.parametrize('field, value, level', [
+	('state', 'Nowhere', STATE_LEVEL),
+	('district', 'Nowhere', DISTRICT_LEVEL),
+	('hospital', None, HOSPITAL_LEVEL),
+])
+def test_path_stops_at_first_failing_level(table, session, field, value, level):
+	fields = pathFields(table, published=True)
+	fields[field] = value
+	fields['date'] = 'Nowhere'
+
+	frames = decodeFrames(session.path(json.dumps(fields)))
+
+	reason = "unknown %s %s" % (field, value) if value else "missing " + field
+	assert [text for _, text in frames if "Path stopped" in text] == ["\n<<< Path stopped at the %s: %s" % (LEVEL_LABELS[level], reason)]
+	assert session.level == level
+	assert (session.dose, session.age_group) == (fields['dose'], fields['age_group'])
+	assert not session.closed
+	assert session.reservations.reserved == 0
+	assert frames[-1][0] in INPUT_REQUESTS
+
+
+def test_path_stops_at_date_without_slots(table, session):
+	frames = decodeFrames(session.path(json.dumps(pathFields(table, published=False))))
+
+	assert [text for _, text in frames if "Path stopped at the " + LEVEL_LABELS[SLOT_LEVEL] in text]
+	assert session.level == SLOT_LEVEL
+	assert not session.closed
+	assert session.reservations.reserved == 0
+	assert frames[-1][0] in INPUT_REQUESTS
+
+
+@pytest.mark.parametrize('data', ['{"dose": ', '["1", "18+"]'])
+def test_path_not_a_json_object_is_an_invalid_input(session, data):
+	frames = decodeFrames(session.path(data))
+
+	assert frames[0][1].startswith("\n<<< Invalid path")
+	assert session.invalid_count == 1
+	assert frames[-1][0] in INPUT_REQUESTS
@@ -0,0 +1,167 @@
+# Import required module/s
+import datetime
+import json
+import os
+
+import pytest
+
+from availability_store import menuPath
+from booking_journal import BookingJournal, replayJournal
+from bulk_booking import bookRequests, readBookingRequests, writeBookingResults, BOOKED, INVALID, NOT_BOOKED, NOT_ELIGIBLE, NO_SLOTS
+from slot_reservations import SlotReservations
+
+
+# Date the eligibility for the 2nd Dose is counted up to
+TODAY = datetime.date(2021, 5, 15)
+
+
+def requestFor(table, dose='1', published=True):
+	"""Request for a hospital of a dose with, or without, slots published on its first date with some or none."""
+
+	reservations = SlotReservations(stripes=1)
+	for key in table.positions:
+		path = menuPath(key)
+		if path[0] != dose:
+			continue
+		for date in table.dates:
+			if (reservations.capacity(table, path, date) > 0) == published:
+				request = dict(zip(('dose', 'age_group', 'state', 'district', 'hospital'), path))
+				request.update(first_dose_date='', preferred_dates=[date])
+				return request
+	raise LookupError("No such hospital in the table")
+
+
+@pytest.fixture
+def reservations():
+	return SlotReservations(stripes=4)
+
+
+def test_valid_request_is_booked(table, reservations):
+	request = requestFor(table)
+
+	result, = bookRequests([request], table, reservations, today=TODAY)
+
+	assert (result['status'], result['date']) == (BOOKED, request['preferred_dates'][0])
+	assert result['booking_id']
+	assert reservations.reserved == 1
+
+
+@pytest.mark.parametrize('field, value, reason', [
+	('dose', '3', "unknown dose"),
+	('state', 'Nowhere', "unknown state"),
+	('district', 'Nowhere', "unknown district"),
+	('hospital', '', "unknown hospital"),
+	('preferred_dates', ['Feb 30'], "unknown date"),
+])
+def test_unknown_selection_is_invalid(table, reservations, field, value, reason):
+	request = requestFor(table)
+	request[field] = value
+
+	result, = bookRequests([request], table, reservations, today=TODAY)
+
+	assert result['status'] == INVALID
+	assert result['reason'].startswith(reason)
+	assert reservations.reserved == 0
+
+
+@pytest.mark.parametrize('first_dose_date, status', [
+	('01/05/2021', NOT_ELIGIBLE),
+	('17/04/2021', BOOKED),
+	('31/02/2021', INVALID),
+	('', INVALID),
+	('01/06/2021', INVALID),
+])
+def test_second_dose_eligibility(table, reservations, first_dose_date, status):
+	request = requestFor(table, dose='2')
+	request['first_dose_date'] = first_dose_date
+
+	result, = bookRequests([request], table, reservations, today=TODAY)
+
+	assert result['status'] == status
+
+
+def test_no_slots_left(table, reservations):
+	request = requestFor(table, published=False)
+
+	result, = bookRequests([request], table, reservations, today=TODAY)
+
+	assert result['status'] == NO_SLOTS
+	assert reservations.rejected == 1
+
+
+def test_requests_take_the_slots_in_order(table, reservations):
+	request = requestFor(table)
+	capacity = reservations.capacity(table, tuple(request[field] for field in ('dose', 'age_group', 'state', 'district', 'hospital')), request['preferred_dates'][0])
+
+	results = bookRequests([request] * (capacity + 2), table, reservations, today=TODAY)
+
+	assert [result['status'] for result in results] == [BOOKED] * capacity + [NO_SLOTS] * 2
+	assert [result['row'] for result in results] == list(range(1, capacity + 3))
+
+
+def test_bookings_are_durable_when_the_pass_returns(table, reservations, tmp_path):
+	path = str(tmp_path / 'bookings.jsonl')
+	journal = BookingJournal(path)
+	results = bookRequests([requestFor(table)] * 2, table, reservations, journal, today=TODAY)
+	journal.close()
+
+	replayed = SlotReservations(stripes=4)
+
+	assert replayJournal(path, replayed) == 2
+	with open(path) as f:
+		assert [json.loads(line)['id'] for line in f] == [result['booking_id'] for result in results]
+
+
+@pytest.mark.parametrize('name', ['requests.csv', 'requests.jsonl'])
+def test_requests_and_results_files(table, reservations, tmp_path, name):
+	request = requestFor(table)
+	path = str(tmp_path / name)
+	if name.endswith('.csv'):
+		with open(path, 'w') as f:
+			f.write(','.join(request) + '\n')
+			f.write(','.join(';'.join(value) if isinstance(value, list) else value for value in request.values()) + '\n')
+	else:
+		with open(path, 'w') as f:
+			f.write(json.dumps(request) + '\n\n')
+
+	requests = list(readBookingRequests(path))
+	results = bookRequests(requests, table, reservations, today=TODAY)
+	writeBookingResults(str(tmp_path / ('results' + name[8:])), results)
+
+	assert requests == [request]
+	assert [result['status'] for result in results] == [BOOKED]
+	assert (tmp_path / ('results' + name[8:])).read_text().count(BOOKED) == 1
+
+
+def test_unreadable_json_lines_are_invalid(table, reservations, tmp_path):
+	request = requestFor(table)
+	path = tmp_path / 'requests.jsonl'
+	path.write_text('\n'.join([json.dumps(request), '{"dose": "1",', '["not", "an", "object"]',
+		json.dumps(dict(request, preferred_dates=';'.join(request['preferred_dates']), error='forged')),
+		json.dumps(dict(request, preferred_dates=15))]) + '\n')
+
+	results = bookRequests(readBookingRequests(str(path)), table, reservations, today=TODAY)
+
+	assert [result['status'] for result in results] == [BOOKED, INVALID, INVALID, BOOKED, INVALID]
+	assert results[1]['reason'].startswith("malformed JSON")
+	assert results[2]['reason'] == "not a JSON object"
+	assert results[4]['reason'] == "preferred_dates is not a list"
+
+
+@pytest.mark.skipif(not os.path.exists('/dev/full'), reason="needs /dev/full to fail the journal write")
+def test_failed_journal_write_gives_the_slots_back(table, reservations, tmp_path):
+	request = requestFor(table)
+	hospital = (request['dose'], request['age_group'], request['state'], request['district'], request['hospital'])
+	journal = BookingJournal(str(tmp_path / 'bookings.jsonl'))
+	full = os.open('/dev/full', os.O_WRONLY)
+	os.dup2(full, journal._fd)
+	os.close(full)
+	try:
+		results = bookRequests([request] * 2 + [dict(request, state='Nowhere')], table, reservations, journal, today=TODAY)
+	finally:
+		journal.close()
+
+	assert [result['status'] for result in results] == [NOT_BOOKED, NOT_BOOKED, INVALID]
+	assert all(result['reason'].startswith("journal write failed") and not result['booking_id'] for result in results[:2])
+	assert reservations.reserved == 0
+	assert all(reservations.taken(hospital, date) == 0 for date in table.dates)
@@ -0,0 +1,48 @@
+# Import required module/s
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from page_cache import PageCache
+from page_fetcher import SourceFetcher
+from w6_activity2_server import fetchWebsiteData
+
+
+@pytest.fixture
+def silent_site():
+	"""URL of a website accepting connections and never answering, with the list of the connections it accepted."""
+
+	listener = socket.create_server(('127.0.0.1', 0))
+	accepted = []
+
+	def accept():
+		while True:
+			try:
+				accepted.append(listener.accept()[0])
+			except OSError:
+				return
+
+	threading.Thread(target=accept, daemon=True).start()
+	yield 'http://127.0.0.1:%d/' % listener.getsockname()[1], accepted
+	listener.close()
+	for conn in accepted:
+		conn.close()
+
+
+@pytest.mark.parametrize('stream', [False, True])
+@pytest.mark.parametrize('cached', [False, True])
+def test_single_website_is_fetched_with_timeout_and_retries(silent_site, tmp_path, stream, cached):
+	url, accepted = silent_site
+	fetcher = SourceFetcher(workers=1, timeout=0.2, retries=2, backoff=0)
+	cache = PageCache(str(tmp_path)) if cached else None
+
+	start = time.perf_counter()
+	with pytest.raises(requests.ConnectionError):
+		fetchWebsiteData(url, stream=stream, cache=cache, session=fetcher.session, timeout=fetcher.timeout)
+	fetcher.close()
+
+	assert time.perf_counter() - start < 5
+	assert len(accepted) == 3
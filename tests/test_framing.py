@@ -0,0 +1,81 @@
+# Import required module/s
+import asyncio
+
+import pytest
+
+from framing import encodeFrame, readFrame, FrameError, FrameReader, FRAME_HEADER, INPUT_FRAME, MENU_FRAME, TEXT_FRAME
+
+
+class ChunkedSocket:
+	"""Socket stand-in whose `recv` returns the given pieces of data one at a time, then the end of the connection."""
+
+	def __init__(self, *chunks):
+		self.chunks = list(chunks)
+
+	def recv(self, size):
+		if not self.chunks:
+			return b''
+		chunk = self.chunks.pop(0)
+		if len(chunk) > size:
+			self.chunks.insert(0, chunk[size:])
+			chunk = chunk[:size]
+		return chunk
+
+
+def readFrames(data, count, max_size=None):
+	"""Frames read from a stream holding `data`, the FrameError ending them being raised once they are read."""
+
+	async def readAll():
+		stream = streamOf(data)
+		return [await readFrame(stream, max_size) for _ in range(count)]
+
+	return asyncio.run(readAll())
+
+
+def streamOf(data):
+	"""StreamReader holding `data` then its end, created within the event loop reading it."""
+
+	reader = asyncio.StreamReader()
+	reader.feed_data(data)
+	reader.feed_eof()
+	return reader
+
+
+def test_frames_of_one_recv_are_read_one_at_a_time():
+	reader = FrameReader(ChunkedSocket(encodeFrame(TEXT_FRAME, "Welcome") + encodeFrame(MENU_FRAME, "1. Dose")))
+
+	assert reader.read() == (TEXT_FRAME, b"Welcome")
+	assert reader.read() == (MENU_FRAME, b"1. Dose")
+	assert reader.read() is None
+
+
+def test_frame_split_across_recvs():
+	data = encodeFrame(TEXT_FRAME, "Sélection") + encodeFrame(INPUT_FRAME, "")
+	reader = FrameReader(ChunkedSocket(*[data[i:i + 1] for i in range(len(data))]))
+
+	assert reader.read() == (TEXT_FRAME, "Sélection".encode('utf-8'))
+	assert reader.read() == (INPUT_FRAME, b"")
+	assert reader.read() is None
+
+
+def test_oversized_frame_is_refused_from_its_header():
+	reader = FrameReader(ChunkedSocket(FRAME_HEADER.pack(INPUT_FRAME, 2048)), max_size=1024)
+
+	with pytest.raises(FrameError):
+		reader.read()
+
+
+@pytest.mark.parametrize('data', [encodeFrame(INPUT_FRAME, "12345")[:3], encodeFrame(INPUT_FRAME, "12345")[:-1]])
+def test_connection_closed_in_the_middle_of_a_frame(data):
+	with pytest.raises(FrameError):
+		FrameReader(ChunkedSocket(data)).read()
+
+
+def test_readFrame_reads_frames_up_to_the_end_of_the_stream():
+	assert readFrames(encodeFrame(INPUT_FRAME, "1") + encodeFrame(INPUT_FRAME, "2"), 3) == [(INPUT_FRAME, b"1"), (INPUT_FRAME, b"2"), None]
+
+
+@pytest.mark.parametrize('data', [encodeFrame(INPUT_FRAME, "x" * 2048), encodeFrame(INPUT_FRAME, "12")[:-1], b'\x05'])
+def test_readFrame_refuses_oversized_and_truncated_frames(data):
+	with pytest.raises(FrameError):
+		readFrames(data, 1, max_size=1024)
@@ -0,0 +1,72 @@
+# Import required module/s
+from types import SimpleNamespace
+
+from availability_refresh import SnapshotHolder
+from availability_store import buildAvailabilityTable
+from menu_cache import MenuPayloadCache
+from w6_activity2_server import BookingSession
+
+
+class Renderer:
+	"""Render callable counting its calls, rendering the payload it is given."""
+
+	def __init__(self, payload):
+		self.payload = payload
+		self.calls = 0
+
+	def __call__(self):
+		self.calls += 1
+		return self.payload
+
+
+def test_menu_is_rendered_once_per_version():
+	cache = MenuPayloadCache()
+	table = SimpleNamespace(version=1)
+	render = Renderer(b'menu')
+
+	assert [cache.get(table, ('state', '1', '18+'), render) for _ in range(3)] == [b'menu'] * 3
+	assert render.calls == 1
+	assert (cache.hits, cache.misses, cache.bytes_served) == (2, 1, 8)
+
+
+def test_new_version_drops_every_payload():
+	cache = MenuPayloadCache()
+	render = Renderer(b'menu')
+	cache.get(SimpleNamespace(version=1), ('dose',), render)
+	cache.get(SimpleNamespace(version=1), ('age_group', '1'), render)
+
+	cache.get(SimpleNamespace(version=2), ('dose',), render)
+
+	assert render.calls == 3
+	assert len(cache) == 1
+	assert (cache.version, cache.invalidations) == (2, 1)
+
+
+def test_least_recently_used_payload_is_dropped():
+	cache = MenuPayloadCache(max_entries=2)
+	table = SimpleNamespace(version=1)
+	cache.get(table, 'a', Renderer(b'a'))
+	cache.get(table, 'b', Renderer(b'b'))
+	cache.get(table, 'a', Renderer(b'a'))
+
+	cache.get(table, 'c', Renderer(b'c'))
+
+	render = Renderer(b'b')
+	cache.get(table, 'b', render)
+	assert render.calls == 1
+	assert cache.get(table, 'c', Renderer(b'c')) == b'c'
+
+
+def test_session_menus_follow_the_data_swapped_in(table, monkeypatch):
+	monkeypatch.setattr(BookingSession, 'menus', MenuPayloadCache())
+	snapshots = SnapshotHolder(table)
+	session = BookingSession(snapshots)
+	session.start()
+	before = session.step('1')
+
+	snapshots.swap(buildAvailabilityTable([row for row in table.iterRows() if row[5] == '45+'], dates=table.dates))
+	after = session.prompt()
+
+	assert b'18+' in before[-1] and b'45+' in before[-1]
+	assert b'18+' not in after[-1] and b'45+' in after[-1]
+	assert BookingSession.menus.invalidations == 1
@@ -0,0 +1,67 @@
+# Import required module/s
+import copy
+
+import pytest
+
+from availability_store import menuPath, updateAvailabilityTable
+from mock_site import changedRows
+from name_search import NameSearchIndex, searchIndex
+
+
+# Attributes of NameSearchIndex equal between an index updated from a change set and one built in full
+INDEX_ATTRIBUTES = ('hospitals', '_paths', '_prefix_keys', '_prefix_names', '_trigrams')
+
+
+def searchContent(index):
+	"""Copy of the structures of a search index, left as they are by any later change to the index."""
+
+	return copy.deepcopy({attribute: getattr(index, attribute) for attribute in INDEX_ATTRIBUTES})
+
+
+def test_prefix_of_any_word_finds_the_hospital(table):
+	path = menuPath(next(iter(table.positions)))
+	index = searchIndex(table)
+
+	assert path in index.search(path[4].lower(), limit=1000)
+	assert path in index.search(path[4].split()[-1], limit=1000)
+
+
+def test_search_filters_on_dose_and_age_group(table):
+	index = searchIndex(table)
+
+	found = index.search('district 1-', dose='2', age_group='45+')
+
+	assert found
+	assert all(path[:2] == ('2', '45+') and path[3].startswith('District 1-') for path in found)
+
+
+def test_typo_is_found_fuzzily(table):
+	path = menuPath(next(iter(table.positions)))
+	index = searchIndex(table)
+
+	assert path[4] in {found[4] for found in index.search(path[4].replace('Hospital', 'Hospitl'), limit=1000)}
+	assert index.search('zqxw') == []
+
+
+@pytest.mark.parametrize('fraction', [0.002, 0.05])
+def test_update_equals_full_rebuild(table, fraction):
+	previous = searchIndex(table)
+	before = searchContent(previous)
+	refreshed = updateAvailabilityTable(table, changedRows(table, fraction, seed=3))
+
+	updated = searchIndex(refreshed, table)
+
+	assert updated is not previous
+	assert searchContent(updated) == searchContent(NameSearchIndex(refreshed))
+	assert searchContent(previous) == before
+	assert updated.search('new hospital') == NameSearchIndex(refreshed).search('new hospital')
+
+
+def test_successive_updates_equal_full_rebuild(table):
+	searchIndex(table)
+	for seed in range(5):
+		refreshed = updateAvailabilityTable(table, changedRows(table, 0.02, seed=seed))
+		searchIndex(refreshed, table)
+		table = refreshed
+
+	assert searchContent(table.name_search) == searchContent(NameSearchIndex(table))
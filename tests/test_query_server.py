@@ -0,0 +1,110 @@
+# Import required module/s
+import http.client
+import json
+
+import pytest
+
+from availability_refresh import SnapshotHolder
+from availability_store import buildAvailabilityTable, menuPath
+from query_server import AvailabilityQueries, QueryServer
+from slot_reservations import SlotReservations
+
+
+def firstPath(table):
+	"""Dose, age group, state, district and hospital name of the first row of a table."""
+
+	return menuPath(next(iter(table.positions)))
+
+
+def answerJson(queries, endpoint, **params):
+	status, body = queries.answer(endpoint, params)
+	return status, json.loads(body)
+
+
+@pytest.fixture
+def snapshots(table):
+	return SnapshotHolder(table)
+
+
+@pytest.fixture
+def queries(snapshots):
+	return AvailabilityQueries(snapshots, SlotReservations(stripes=4))
+
+
+def test_options_of_every_level(table, queries):
+	dose, age_group, state, district, hospital = firstPath(table)
+
+	assert answerJson(queries, '/doses')[1]['options'] == list(table.index.root.options)
+	status, answer = answerJson(queries, '/hospitals', dose=dose, age_group=age_group, state=state, district=district)
+	assert status == 200
+	assert {'hospital': hospital, 'vaccine': table.vaccine[0]} in answer['options']
+	assert answer['version'] == 1
+
+
+@pytest.mark.parametrize('endpoint, params, status, message', [
+	('/vaccines', {}, 404, "unknown endpoint /vaccines"),
+	('/states', {'dose': '1'}, 400, "missing parameter age_group"),
+	('/districts', {'dose': '1'}, 400, "missing parameter age_group, state"),
+	('/districts', {'dose': '1', 'age_group': '18+', 'state': 'Nowhere'}, 404, "no availability for dose=1, age_group=18+, state=Nowhere"),
+])
+def test_bad_queries(queries, endpoint, params, status, message):
+	answer_status, answer = answerJson(queries, endpoint, **params)
+
+	assert answer_status == status
+	assert answer['error'].startswith(message)
+
+
+def test_answers_are_cached_for_one_version(table, snapshots, queries):
+	dose, age_group = firstPath(table)[:2]
+	first = queries.answer('/states', {'dose': dose, 'age_group': age_group})
+
+	assert queries.answer('/states', {'dose': dose, 'age_group': age_group}) == first
+	assert (queries.responses.hits, queries.responses.misses) == (1, 1)
+
+	snapshots.swap(buildAvailabilityTable([row for row in table.iterRows() if row[1] != table.state[0]], dates=table.dates))
+	status, answer = answerJson(queries, '/states', dose=dose, age_group=age_group)
+
+	assert status == 200
+	assert answer['version'] == 2
+	assert table.state[0] not in answer['options']
+	assert (queries.responses.misses, queries.responses.invalidations) == (2, 1)
+
+
+def test_slots_follow_the_reservations(table, queries):
+	path = firstPath(table)
+	fields = dict(zip(('dose', 'age_group', 'state', 'district', 'hospital'), path))
+	date, published = next((option['date'], option['slots']) for option in answerJson(queries, '/slots', **fields)[1]['options'] if option['slots'])
+
+	queries.reservations.reserve(table, path, date)
+
+	slot, = [option for option in answerJson(queries, '/slots', **fields)[1]['options'] if option['date'] == date]
+	assert slot == {'date': date, 'slots': published, 'available': published - 1}
+
+
+def test_slots_without_reservations_are_the_published_ones(table, snapshots):
+	queries = AvailabilityQueries(snapshots)
+	path = firstPath(table)
+	inventory = SlotReservations(stripes=1)
+
+	status, answer = answerJson(queries, '/slots', **dict(zip(('dose', 'age_group', 'state', 'district', 'hospital'), path)))
+
+	assert status == 200
+	assert queries.reservations is None
+	assert answer['options'] == [{'date': date, 'slots': inventory.capacity(table, path, date), 'available': inventory.capacity(table, path, date)}
+		for date in table.dates]
+
+
+def test_keep_alive_requests_over_http(table, queries):
+	server = QueryServer(queries, '127.0.0.1', 0).start()
+	try:
+		connection = http.client.HTTPConnection(*server.httpd.server_address, timeout=5)
+		for path, status in (('/doses', 200), ('/states?dose=1', 400), ('/nowhere', 404), ('/doses/', 200)):
+			connection.request('GET', path)
+			response = connection.getresponse()
+			body = json.loads(response.read())
+			assert response.status == status
+			assert response.getheader('Content-Type') == 'application/json'
+			assert ('options' in body) == (status == 200)
+		connection.close()
+	finally:
+		server.close()
@@ -0,0 +1,101 @@
+# Import required module/s
+import os
+import threading
+
+from availability_store import menuPath
+from slot_reservations import SlotReservations
+
+
+# Attempts of every thread or process, together many more than the slots published
+ATTEMPTS = 200
+
+
+def busiestSlot(table):
+	"""Path of the hospital and date of the row with the most slots published on a date."""
+
+	path, date, _ = max(((menuPath(key), date, int(table.slots[row, column])) for key, row in table.positions.items()
+		for column, date in enumerate(table.dates)), key=lambda slot: slot[2])
+	return path, date
+
+
+def test_concurrent_reserve_never_exceeds_published(table):
+	reservations = SlotReservations(stripes=4, entries=1024)
+	path, date = busiestSlot(table)
+	capacity = reservations.capacity(table, path, date)
+	booking_ids = []
+
+	def book():
+		for _ in range(ATTEMPTS):
+			booking_id = reservations.reserve(table, path, date)
+			if booking_id is not None:
+				booking_ids.append(booking_id)
+
+	threads = [threading.Thread(target=book) for _ in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert len(booking_ids) == len(set(booking_ids)) == capacity
+	assert reservations.taken(path, date) == capacity
+	assert reservations.remaining(table, path, date) == 0
+	assert (reservations.reserved, reservations.rejected) == (capacity, 8 * ATTEMPTS - capacity)
+
+
+def test_forked_workers_share_the_counters(table):
+	reservations = SlotReservations(stripes=4, entries=1024)
+	path, date = busiestSlot(table)
+	capacity = reservations.capacity(table, path, date)
+	read_end, write_end = os.pipe()
+
+	workers = []
+	for _ in range(4):
+		pid = os.fork()
+		if pid == 0:
+			granted = sum(reservations.reserve(table, path, date) is not None for _ in range(ATTEMPTS))
+			os.write(write_end, b'%d\n' % granted)
+			os._exit(0)
+		workers.append(pid)
+	os.close(write_end)
+	for pid in workers:
+		assert os.waitpid(pid, 0)[1] == 0
+	with os.fdopen(read_end) as results:
+		granted = [int(line) for line in results]
+
+	assert len(granted) == 4
+	assert sum(granted) == capacity
+	assert reservations.taken(path, date) == capacity
+
+
+def test_unknown_hospital_or_date_has_no_slots(table):
+	reservations = SlotReservations(stripes=4, entries=1024)
+	path, date = busiestSlot(table)
+
+	assert reservations.reserve(table, path[:4] + ('Nowhere',), date) is None
+	assert reservations.reserve(table, path, 'Feb 30') is None
+	assert reservations.rejected == 2
+
+
+def test_release_gives_the_slot_back(table):
+	reservations = SlotReservations(stripes=4, entries=1024)
+	path, date = busiestSlot(table)
+	for _ in range(reservations.capacity(table, path, date)):
+		assert reservations.reserve(table, path, date) is not None
+	assert reservations.reserve(table, path, date) is None
+
+	reservations.release(path, date)
+
+	assert reservations.remaining(table, path, date) == 1
+	assert reservations.reserve(table, path, date) is not None
+
+
+def test_hospitals_are_spread_over_every_stripe(table):
+	reservations = SlotReservations(stripes=4, entries=1024)
+	for key, row in table.positions.items():
+		for column, date in enumerate(table.dates):
+			if table.slots[row, column] > 0:
+				reservations.reserve(table, menuPath(key), date)
+				break
+
+	assert reservations.reserved > 100
+	assert all(reserved > 0 for reserved in reservations._reserved)
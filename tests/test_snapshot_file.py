@@ -0,0 +1,42 @@
+# Import required module/s
+import pytest
+
+from availability_store import buildAvailabilityTable, updateAvailabilityTable
+from conftest import menuTree, tableContent
+from mock_site import changedRows
+from snapshot_file import load_snapshot, save_snapshot
+
+
+@pytest.fixture
+def snapshot_path(table, tmp_path):
+	path = str(tmp_path / 'availability.snapshot')
+	save_snapshot(table, path)
+	return path
+
+
+def test_snapshot_round_trip(table, snapshot_path):
+	loaded = load_snapshot(snapshot_path)
+
+	assert tableContent(loaded) == tableContent(table)
+	assert menuTree(loaded) == menuTree(table)
+
+
+def test_update_on_snapshot_equals_full_rebuild(table, snapshot_path):
+	loaded = load_snapshot(snapshot_path)
+	fresh_rows = changedRows(loaded, 0.05, seed=2)
+
+	updated = updateAvailabilityTable(loaded, fresh_rows)
+
+	rebuilt = buildAvailabilityTable(fresh_rows)
+	assert tableContent(updated) == tableContent(rebuilt)
+	assert menuTree(updated) == menuTree(rebuilt)
+	assert tableContent(loaded) == tableContent(table)
+
+
+def test_load_rejects_other_files(tmp_path):
+	path = str(tmp_path / 'not.snapshot')
+	with open(path, 'wb') as f:
+		f.write(b'\0' * 256)
+
+	with pytest.raises(ValueError):
+		load_snapshot(path)
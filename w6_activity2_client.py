@@ -2,6 +2,12 @@
 # Import required module/s
 import socket
 import ast
+import argparse
+import json
+import os
+import select
+import sys
+from framing import encodeFrame, FrameReader, INPUT_FRAME, PATH_FRAME, INPUT_REQUESTS, GOODBYE_FRAME
 import colorama
 colorama.init()
 
@@ -24,11 +30,38 @@ def connectToServer(HOST, PORT):
 
 	server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 	server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	server_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 	server_socket.connect((HOST, PORT))
 
 	return server_socket
 
 
+def readInput(reader):
+	"""Read a line typed by the user, unless the Server sends a frame first, e.g. the new slots a Client waits for.
+
+	Parameters
+	----------
+	reader : framing.FrameReader
+		Reader of the frames of the Server
+
+	Returns
+	-------
+	str
+		Line typed, or None if a frame of the Server arrived first
+	"""
+
+	if os.name == 'nt':
+		# The console cannot be waited on together with a socket, so the frame is only read after the input
+		return input(" ==> ")
+	print(" ==> ", end='', flush=True)
+	while True:
+		if reader.readable(0):
+			print()
+			return None
+		if select.select([sys.stdin, reader.sock], [], [])[0] == [sys.stdin]:
+			return sys.stdin.readline().rstrip('\n')
+
+
 def formatRecvdData(data_recvd):
 	"""Format the data received from the Server as required for better representation.
 
@@ -70,6 +103,16 @@ if __name__ == '__main__':
 	HOST = '127.0.0.1'
 	PORT = 24680
 
+	parser = argparse.ArgumentParser(description="CoWin ChatBot client for scheduling Vaccination Appointments")
+	parser.add_argument('--book', nargs='+', metavar='FIELD=VALUE',
+		help="Send the whole selection path in one message, e.g. dose=1 age_group=18+ state=Goa district='North Goa' "
+		"hospital=1 date='May 16', the fields being given by option number or name; the menus take over from the first failing one")
+	args = parser.parse_args()
+	path = None
+	if args.book:
+		fields = dict(field.split('=', 1) for field in args.book if '=' in field)
+		path = encodeFrame(PATH_FRAME, json.dumps(fields))
+
 	# Start the connection to the Server
 	server_socket = None
 	try:
@@ -77,18 +120,24 @@ if __name__ == '__main__':
 	except ConnectionRefusedError:
 		print("*** Start the server first! ***")
 	
-	# Receive the data sent by the Server and provide inputs when asked for.
+	# Receive the frames sent by the Server and provide inputs when asked for.
 	if server_socket != None:
+		reader = FrameReader(server_socket)
 		while True:
-			data_recvd = server_socket.recv(1024).decode('utf-8')
-			formatRecvdData(data_recvd)
-
-			if '>>>' in data_recvd:
-				data_to_send = input(" ==> ")
-				server_socket.sendall(data_to_send.encode('utf-8'))
-			
-			if not data_recvd:
-				server_socket.close()
+			frame = reader.read()
+			if frame is None:
+				break
+			frame_type, payload = frame
+			formatRecvdData(payload.decode('utf-8'))
+
+			if frame_type in INPUT_REQUESTS and path is not None:
+				server_socket.sendall(path)
+				path = None
+			elif frame_type in INPUT_REQUESTS:
+				data_to_send = readInput(reader)
+				if data_to_send is not None:
+					server_socket.sendall(encodeFrame(INPUT_FRAME, data_to_send))
+			elif frame_type == GOODBYE_FRAME:
 				break
 		
 		server_socket.close()
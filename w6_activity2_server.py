@@ -1,8 +1,24 @@
 # Import required module/s
 import socket
-from bs4 import BeautifulSoup
-import requests
 import datetime
+import atexit
+import argparse
+import os
+import hashlib
+import json
+import time
+from availability_store import parseAvailabilityTable, iterAvailabilityRows, buildAvailabilityTable, updateAvailabilityTable, MergedRowStream
+from page_cache import PageCache
+from availability_refresh import SnapshotHolder, AvailabilityRefresher
+from snapshot_file import save_snapshot, load_snapshot
+from menu_cache import MenuPayloadCache
+from slot_reservations import SlotReservations
+from name_search import searchIndex
+from availability_rollups import rollupIndex
+from availability_subscriptions import SubscriptionIndex
+from server_metrics import ServerMetrics, MetricsDumper
+from booking_journal import BookingJournal, JournalLockedError, replayJournal, DEFAULT_COMMIT_WINDOW
+from framing import encodeFrame, FrameReader, FrameError, TEXT_FRAME, MENU_FRAME, PROMPT_FRAME, GOODBYE_FRAME, INPUT_FRAME, PATH_FRAME, MAX_INPUT_SIZE
 
 
 # Define constants for IP and Port address of Server
@@ -10,45 +26,188 @@ import datetime
 HOST = '127.0.0.1'
 PORT = 24680
 
+# Size of the pieces in which the web-page is read when it is fetched in streaming mode
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def fetchWebsiteData(url_website):
+# Directory where the snapshot of the web-page is cached between runs
+DEFAULT_CACHE_DIR = '.page_cache'
+
+# Binary snapshot of the parsed and indexed availability data the server starts from
+DEFAULT_SNAPSHOT_PATH = '.page_cache/availability.snapshot'
+
+# Append-only journal of the confirmed bookings, replayed on start
+DEFAULT_JOURNAL_PATH = 'bookings.journal'
+
+# Seconds between the checks for new slots of a session waiting for them in single mode, while no input comes
+WATCH_POLL_INTERVAL = 0.2
+
+# Banner sent to every Client when it connects, and message sent before closing its connection
+WELCOME_BANNER = '''$$$$$$\            $$\      $$\ $$\                  $$$$$$\  $$\                  $$\     $$$$$$$\             $$\     
+$$  __$$\           $$ | $\  $$ |\__|                $$  __$$\ $$ |                 $$ |    $$  __$$\            $$ |    
+$$ /  \__| $$$$$$\  $$ |$$$\ $$ |$$\ $$$$$$$\        $$ /  \__|$$$$$$$\   $$$$$$\ $$$$$$\   $$ |  $$ | $$$$$$\ $$$$$$\   
+$$ |      $$  __$$\ $$ $$ $$\$$ |$$ |$$  __$$\       $$ |      $$  __$$\  \____$$\\_$$  _|  $$$$$$$\ |$$  __$$\\_$$  _|  
+$$ |      $$ /  $$ |$$$$  _$$$$ |$$ |$$ |  $$ |      $$ |      $$ |  $$ | $$$$$$$ | $$ |    $$  __$$\ $$ /  $$ | $$ |    
+$$ |  $$\ $$ |  $$ |$$$  / \$$$ |$$ |$$ |  $$ |      $$ |  $$\ $$ |  $$ |$$  __$$ | $$ |$$\ $$ |  $$ |$$ |  $$ | $$ |$$\ 
+\$$$$$$  |\$$$$$$  |$$  /   \$$ |$$ |$$ |  $$ |      \$$$$$$  |$$ |  $$ |\$$$$$$$ | \$$$$  |$$$$$$$  |\$$$$$$  | \$$$$  |
+ \______/  \______/ \__/     \__|\__|\__|  \__|       \______/ \__|  \__| \_______|  \____/ \_______/  \______/   \____/         '''
+GOODBYE_MESSAGE = "\n<<< See ya! Visit again :)"
+WELCOME = encodeFrame(TEXT_FRAME, WELCOME_BANNER)
+GOODBYE = encodeFrame(GOODBYE_FRAME, GOODBYE_MESSAGE)
+# Messages sent instead when a connection is turned away, the server being full, or reaped after a round trip took too long
+BUSY_MESSAGE = "\n<<< Server busy, please retry in %d s"
+REAPED_MESSAGE = "\n<<< No reply for too long, closing the connection. Visit again :)"
+REAPED = encodeFrame(GOODBYE_FRAME, REAPED_MESSAGE)
+FIRST_DOSE_DATE_PROMPT = encodeFrame(PROMPT_FRAME, "\n>>> Provide the date of First Vaccination Dose (DD/MM/YYYY), for e.g. 12/5/2021")
+WATCH_PROMPT = encodeFrame(PROMPT_FRAME, "\n>>> b to stop waiting or q to quit")
+
+# Levels of the dialogue with a Client, in the order they are usually visited
+DOSE_LEVEL = 'dose'
+FIRST_DOSE_DATE_LEVEL = 'first_dose_date'
+AGE_GROUP_LEVEL = 'age_group'
+STATE_LEVEL = 'state'
+DISTRICT_LEVEL = 'district'
+HOSPITAL_LEVEL = 'hospital'
+SLOT_LEVEL = 'slot'
+# Level of the Vaccination Centers matching a name typed at a menu, from which the Client jumps to their slots
+SEARCH_LEVEL = 'search'
+# Level of a session waiting for new slots, at which the Client can only go back or quit
+WATCH_LEVEL = 'watch'
+
+# Maximum number of Vaccination Centers listed for a search
+SEARCH_LIMIT = 10
+
+
+def fetchWebsiteData(url_website, stream=False, cache=None, previous=None, offline=False, metrics=None, session=None, timeout=None):
 	"""Fetches rows of tabular data from given URL of a website with data excluding table headers.
 
 	Parameters
 	----------
 	url_website : str
 		URL of a website
+	stream : bool
+		If True, read the response incrementally and parse it row by row without ever holding
+		the whole page or its document tree in memory
+	cache : page_cache.PageCache
+		Cache to revalidate the web-page against with a conditional request, instead of downloading it unconditionally
+	previous : availability_store.AvailabilityTable
+		Table parsed before from the cached web-page, returned as it is if the content has not changed
+		and otherwise updated incrementally with only the rows that changed
+	offline : bool
+		If True, load the web-page from the `cache` without any network access
+	metrics : server_metrics.ServerMetrics
+		Metrics the time taken to fetch and to parse the web-page is recorded in, or None
+	session : requests.Session
+		Session to send the request with, e.g. that of a page_fetcher.SourceFetcher retrying failed requests,
+		or None for a new connection without retries
+	timeout : float
+		Timeout of the request in seconds, or None to wait for the website as long as it takes
 
 	Returns
 	-------
-	bs4.element.ResultSet
-		All rows of Tabular data fetched from a website excluding the table headers
+	availability_store.AvailabilityTable
+		All rows of Tabular data fetched from a website excluding the table headers, parsed once into typed columns
 	"""
-	
-	web_page_data = ''
 
-	page = requests.get(url_website)
+	start = time.perf_counter()
+	if cache is not None:
+		page = cache.fetch(url_website, session=session, timeout=timeout, offline=offline)
+		start = recordIngestion(metrics, 'fetch', start)
+		if previous is not None and previous.content_hash == page.sha256:
+			return previous
+
+		if previous is not None:
+			web_page_data = updateAvailabilityTable(previous, iterAvailabilityRows(page.iterChunks()))
+		elif stream:
+			web_page_data = buildAvailabilityTable(iterAvailabilityRows(page.iterChunks()))
+		else:
+			web_page_data = parseAvailabilityTable(page.read())
+		if web_page_data is not previous:
+			recordIngestion(metrics, 'parse', start, web_page_data)
+		web_page_data.content_hash = page.sha256
+		return web_page_data
+
+	if session is None:
+		import requests
+		session = requests
+
+	if stream:
+		# The page is parsed as it is read, so its fetch is recorded with its parse
+		with session.get(url_website, stream=True, timeout=timeout) as page:
+			web_page_data = buildAvailabilityTable(iterAvailabilityRows(page.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+		recordIngestion(metrics, 'parse', start, web_page_data)
+		return web_page_data
+
+	page = session.get(url_website, timeout=timeout)
+	start = recordIngestion(metrics, 'fetch', start)
+
+	web_page_data = parseAvailabilityTable(page.content)
+	recordIngestion(metrics, 'parse', start, web_page_data)
+
+	return web_page_data
+
+############################################################################################################################
 
-	soup = BeautifulSoup(page.content, 'html.parser')
+def fetchMultipleWebsiteData(url_websites, fetcher, previous=None, offline=False, metrics=None):
+	"""Fetches the tabular data of many websites, e.g. per-state or paginated pages, concurrently and merges their rows into one table.
 
-	tb = soup.find('tbody')
-	for i in tb.find_all('tr', class_='row1'):
-		web_page_data = i.find_all('td', class_='hospital_name"')
+	Parameters
+	----------
+	url_websites : list
+		URLs of the websites
+	fetcher : page_fetcher.SourceFetcher
+		Fetcher downloading the pages on a thread pool over pooled keep-alive connections
+	previous : availability_store.AvailabilityTable
+		Table merged before from the same websites, returned as it is if none of the pages changed
+		and otherwise updated incrementally with only the rows that changed
+	offline : bool
+		If True, load the web-pages from the cache of the `fetcher` without any network access
+	metrics : server_metrics.ServerMetrics
+		Metrics the time taken to fetch and to parse the web-pages is recorded in, or None
+
+	Returns
+	-------
+	availability_store.AvailabilityTable
+		All rows of Tabular data fetched from the websites excluding the table headers, parsed once into typed columns
+	"""
 
-	for j in tb.find_all('tr'):
-		name = j.find_all('td')
-		web_page_data.append(name)		
+	start = time.perf_counter()
+	pages = fetcher.fetchAll(url_websites, offline=offline)
+	start = recordIngestion(metrics, 'fetch', start)
+	content_hash = hashlib.sha256(' '.join(page.sha256 for page in pages).encode('ascii')).hexdigest()
+	if previous is not None and previous.content_hash == content_hash:
+		return previous
+
+	rows = MergedRowStream([iterAvailabilityRows(page.iterChunks()) for page in pages])
+	if previous is not None:
+		web_page_data = updateAvailabilityTable(previous, rows)
+	else:
+		web_page_data = buildAvailabilityTable(rows)
+	if web_page_data is not previous:
+		recordIngestion(metrics, 'parse', start, web_page_data)
+	web_page_data.content_hash = content_hash
 
 	return web_page_data
 
 ############################################################################################################################
 
+def recordIngestion(metrics, stage, start, table=None):
+	"""Record the time taken by a stage of loading the data since `start`, the building of the menu index of `table` being
+	recorded apart, as part of the indexing, and return the time it ended at, when the next stage starts."""
+
+	end = time.perf_counter()
+	if metrics is not None:
+		index_seconds = table.index.build_seconds if table is not None else 0.0
+		metrics.ingest.observe(end - start - index_seconds, stage)
+	return end
+
+############################################################################################################################
+
 def fetchVaccineDoses(web_page_data):
 	"""Fetch the Vaccine Doses available from the Web-page data and provide Options to select the respective Dose.
 
 	Parameters
 	----------
-	web_page_data : bs4.element.ResultSet
+	web_page_data : availability_store.AvailabilityTable
 		All rows of Tabular data fetched from a website excluding the table headers
 
 	Returns
@@ -65,25 +224,9 @@ def fetchVaccineDoses(web_page_data):
 	"""
 
 	vaccine_doses_dict = {}
-	
-	dose_list = []
-	for k in web_page_data:
-		soup2 = BeautifulSoup(str(k), 'html.parser')
-		dose = soup2.find('td', class_='dose_num')
-		dose_list.append(dose.get_text())
-		
-	unique_list = []
-
-	for x in dose_list:
-		if x not in unique_list:
-			unique_list.append(x) 
-
-	temp_dict = {}
-	for z in unique_list:
-		dose_num = 'Dose '+z
-		mydict = {z:dose_num}
-		vaccine_doses_dict = {**temp_dict,**mydict}
-		temp_dict = vaccine_doses_dict		
+
+	for z in web_page_data.index.root.options:
+		vaccine_doses_dict[z] = 'Dose '+z
 
 	return vaccine_doses_dict
 
@@ -95,7 +238,7 @@ def fetchAgeGroup(web_page_data, dose):
 
 	Parameters
 	----------
-	web_page_data : bs4.element.ResultSet
+	web_page_data : availability_store.AvailabilityTable
 		All rows of Tabular data fetched from a website excluding the table headers
 	dose : str
 		Dose available for Vaccination and its availability for the Age Groups
@@ -117,29 +260,11 @@ def fetchAgeGroup(web_page_data, dose):
 	"""
 
 	age_group_dict = {}
-	
-	age_list = []
-	for k in web_page_data:
-		soup3 = BeautifulSoup(str(k), 'html.parser')
-		dose_find = soup3.find('td', class_='dose_num')
-		if(dose_find.get_text() == dose):
-			age = soup3.find('td', class_='age')
-			age_list.append(age.get_text())	
-	unique_list = []
-	for x in age_list:
-		if x not in unique_list:
-			unique_list.append(x)
-
-	unique_list.sort()
-
-	temp_dict = {}
-	num = 1
-	for q in unique_list:
-		sr_num = str(num)
-		mydict = {sr_num:q}
-		age_group_dict = {**temp_dict,**mydict}
-		temp_dict = age_group_dict
-		num+=1		
+
+	node = web_page_data.index.lookup(dose)
+	if node is not None:
+		for num, q in enumerate(node.options, 1):
+			age_group_dict[str(num)] = q
 
 	return age_group_dict
 
@@ -151,7 +276,7 @@ def fetchStates(web_page_data, age_group, dose):
 
 	Parameters
 	----------
-	web_page_data : bs4.element.ResultSet
+	web_page_data : availability_store.AvailabilityTable
 		All rows of Tabular data fetched from a website excluding the table headers
 	age_group : str
 		Age Group available for Vaccination and its availability in the States
@@ -176,31 +301,11 @@ def fetchStates(web_page_data, age_group, dose):
 	"""
 
 	states_dict = {}
-	
-	states_list = []
-	for k in web_page_data:
-		soup4 = BeautifulSoup(str(k), 'html.parser')
-		dose_find = soup4.find('td', class_='dose_num')
-		if(dose_find.get_text() == dose):
-			age_find = soup4.find('td', class_='age')
-			if(age_find.get_text() == age_group):
-				state_find = soup4.find('td', class_='state_name')
-				states_list.append(state_find.get_text())	
-	unique_list = []
-	for x in states_list:
-		if x not in unique_list:
-			unique_list.append(x)
-
-	unique_list.sort()
-
-	temp_dict = {}
-	num = 1
-	for q in unique_list:
-		sr_num = str(num)
-		mydict = {sr_num:q}
-		states_dict = {**temp_dict,**mydict}
-		temp_dict = states_dict
-		num+=1	
+
+	node = web_page_data.index.lookup(dose, age_group)
+	if node is not None:
+		for num, q in enumerate(node.options, 1):
+			states_dict[str(num)] = q
 
 	return states_dict
 
@@ -212,7 +317,7 @@ def fetchDistricts(web_page_data, state, age_group, dose):
 
 	Parameters
 	----------
-	web_page_data : bs4.element.ResultSet
+	web_page_data : availability_store.AvailabilityTable
 		All rows of Tabular data fetched from a website excluding the table headers
 	state : str
 		State where Vaccination is available for a given Dose and Age Group
@@ -238,33 +343,11 @@ def fetchDistricts(web_page_data, state, age_group, dose):
 	"""
 
 	districts_dict = {}
-	
-	dist_list = []
-	for k in web_page_data:
-		soup5 = BeautifulSoup(str(k), 'html.parser')
-		dose_find = soup5.find('td', class_='dose_num')
-		if(dose_find.get_text() == dose):
-			age_find = soup5.find('td', class_='age')
-			if(age_find.get_text() == age_group):
-				state_find = soup5.find('td', class_='state_name')
-				if(state_find.get_text() == state):
-					dist_find = soup5.find('td', class_='district_name')
-					dist_list.append(dist_find.get_text())	
-	unique_list = []
-	for x in dist_list:
-		if x not in unique_list:
-			unique_list.append(x)
-
-	unique_list.sort()
-
-	temp_dict = {}
-	num = 1
-	for q in unique_list:
-		sr_num = str(num)
-		mydict = {sr_num:q}
-		districts_dict = {**temp_dict,**mydict}
-		temp_dict = districts_dict
-		num+=1		
+
+	node = web_page_data.index.lookup(dose, age_group, state)
+	if node is not None:
+		for num, q in enumerate(node.options, 1):
+			districts_dict[str(num)] = q
 
 	return districts_dict
 
@@ -276,7 +359,7 @@ def fetchHospitalVaccineNames(web_page_data, district, state, age_group, dose):
 
 	Parameters
 	----------
-	web_page_data : bs4.element.ResultSet
+	web_page_data : availability_store.AvailabilityTable
 		All rows of Tabular data fetched from a website excluding the table headers
 	district : str
 		District where Vaccination is available for a given State, Dose and Age Group
@@ -310,40 +393,13 @@ def fetchHospitalVaccineNames(web_page_data, district, state, age_group, dose):
 			}
 	}
 	"""
-	
+
 	hospital_vaccine_names_dict = {}
-	
-	hospital_list = []
-	for k in web_page_data:
-		soup6 = BeautifulSoup(str(k), 'html.parser')
-		dose_find = soup6.find('td', class_='dose_num')
-		if(dose_find.get_text() == dose):
-			age_find = soup6.find('td', class_='age')
-			if(age_find.get_text() == age_group):
-				state_find = soup6.find('td', class_='state_name')
-				if(state_find.get_text() == state):
-					dist_find = soup6.find('td', class_='district_name')
-					if(dist_find.get_text() == district):
-						hospital_find = soup6.find('td', class_='hospital_name')
-						vaccine_find = soup6.find('td', class_='vaccine_name')
-						hos_dict = {hospital_find.get_text() : vaccine_find.get_text()}
-						hospital_list.append(hos_dict)	
-
-	unique_list = []
-	for x in hospital_list:
-		if x not in unique_list:
-			unique_list.append(x)
-
-	unique_list.sort()
-
-	temp_dict = {}
-	num = 1
-	for q in unique_list:
-		sr_num = str(num)
-		mydict = {sr_num:q}
-		hospital_vaccine_names_dict = {**temp_dict,**mydict}
-		temp_dict = hospital_vaccine_names_dict
-		num+=1								
+
+	node = web_page_data.index.lookup(dose, age_group, state, district)
+	if node is not None:
+		for num, (hospital_find, vaccine_find) in enumerate(node.options, 1):
+			hospital_vaccine_names_dict[str(num)] = {hospital_find : vaccine_find}
 
 	return hospital_vaccine_names_dict
 
@@ -355,7 +411,7 @@ def fetchVaccineSlots(web_page_data, hospital_name, district, state, age_group,
 
 	Parameters
 	----------
-	web_page_data : bs4.element.ResultSet
+	web_page_data : availability_store.AvailabilityTable
 		All rows of Tabular data fetched from a website excluding the table headers
 	hospital_name : str
 		Name of Hospital where Vaccination is available for given District, State, Dose and Age Group
@@ -392,63 +448,31 @@ def fetchVaccineSlots(web_page_data, hospital_name, district, state, age_group,
 	"""
 
 	vaccine_slots = {}
-	
-	slot_list = []
-	for k in web_page_data:
-		soup7 = BeautifulSoup(str(k), 'html.parser')
-		dose_find = soup7.find('td', class_='dose_num')
-		if(dose_find.get_text() == dose):
-			age_find = soup7.find('td', class_='age')
-			if(age_find.get_text() == age_group):
-				state_find = soup7.find('td', class_='state_name')
-				if(state_find.get_text() == state):
-					dist_find = soup7.find('td', class_='district_name')
-					if(dist_find.get_text() == district):
-						hospital_find = soup7.find('td', class_='hospital_name')
-						if(hospital_find.get_text() == hospital_name):
-							may_15_find = soup7.find('td', class_='may_15')
-							slot_dict = {'May 15' : may_15_find.get_text()}
-							slot_list.append(slot_dict)
-							may_16_find = soup7.find('td', class_='may_16')
-							slot_dict = {'May 16' : may_16_find.get_text()}
-							slot_list.append(slot_dict)
-							may_17_find = soup7.find('td', class_='may_17')
-							slot_dict = {'May 17' : may_17_find.get_text()}
-							slot_list.append(slot_dict)
-							may_18_find = soup7.find('td', class_='may_18')
-							slot_dict = {'May 18' : may_18_find.get_text()}
-							slot_list.append(slot_dict)
-							may_19_find = soup7.find('td', class_='may_19')
-							slot_dict = {'May 19' : may_19_find.get_text()}
-							slot_list.append(slot_dict)
-							may_20_find = soup7.find('td', class_='may_20')
-							slot_dict = {'May 20' : may_20_find.get_text()}
-							slot_list.append(slot_dict)
-							may_21_find = soup7.find('td', class_='may_21')
-							slot_dict = {'May 21' : may_21_find.get_text()}
-							slot_list.append(slot_dict)	
-
-	unique_list = []
-	for x in slot_list:
-		if x not in unique_list:
-			unique_list.append(x)
-
-	temp_dict = {}
-	num = 1
-	for q in unique_list:
-		sr_num = str(num)
-		mydict = {sr_num:q}
-		vaccine_slots = {**temp_dict,**mydict}
-		temp_dict = vaccine_slots
-		num+=1	
+
+	node = web_page_data.index.lookup(dose, age_group, state, district, hospital_name)
+	if node is not None:
+		unique_slots = {}
+		for row in node.rows:
+			for date, slots in zip(web_page_data.dates, web_page_data.slots[row].tolist()):
+				unique_slots.setdefault((date, slots), None)
+
+		for num, (date, slots) in enumerate(unique_slots, 1):
+			vaccine_slots[str(num)] = {date : str(slots)}
 
 	return vaccine_slots
 
 ############################################################################################################################
 
-def openConnection():
+def openConnection(host=HOST, port=PORT):
 	"""Opens a socket connection on the HOST with the PORT address.
 
+	Parameters
+	----------
+	host : str
+		IP address to listen on
+	port : int
+		Port address to listen on
+
 	Returns
 	-------
 	socket
@@ -461,20 +485,760 @@ def openConnection():
 	client_addr = None
 
 	
-	ADDR =(HOST,PORT)
+	ADDR =(host,port)
 	server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 	server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 	server.bind(ADDR)
 	server.listen()
 
 	client_socket, client_addr = server.accept()
+	# Every step goes out as one write, which must not wait for the ACK of the previous one
+	client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 	print("Client is connected at: ",ADDR)	
 	
 	return client_socket, client_addr
 
 ############################################################################################################################
 
-def startCommunication(client_conn, client_addr, web_page_data):
+class BookingSession:
+	"""State of the dialogue with one Client for scheduling an Appointment for Vaccination, as an explicit state machine.
+
+	The session only records the level of the menu the Client is at and the selections made so far, so it
+	takes about a hundred bytes and any number of them can be driven by one thread. Every input of the
+	Client is handled by a single call of `step`, dispatched on the current level through LEVEL_HANDLERS,
+	and returns the messages to send back. The session does not know about the connection it runs on.
+
+	Parameters
+	----------
+	snapshots : availability_refresh.SnapshotHolder
+		Holder of the latest rows of Tabular data fetched from a website, read once for every prompt so that
+		each step, from a prompt to the handling of the answer to it, works on one consistent version
+
+	Attributes
+	----------
+	level : str
+		Level of the menu the Client is answering, one of the *_LEVEL constants
+	dose, age_group, state, district, hospital_name : str
+		Selections made so far, None for the levels not reached yet
+	invalid_count : int
+		Number of invalid inputs provided, the session ending on the third one
+	closed : bool
+		True once the session is over and the connection has to be closed
+	menus : menu_cache.MenuPayloadCache
+		Encoded menus shared by all the sessions, with its hit rate and bytes served
+	reservations : slot_reservations.SlotReservations
+		Inventory of the slots taken by all the sessions, each appointment reserving one
+	journal : booking_journal.BookingJournal
+		Journal of the confirmed bookings shared by all the sessions, or None
+	search : tuple
+		Level the last search was typed at and the paths of the Vaccination Centers it matched, or None
+	commit : concurrent.futures.Future
+		Journal write of the booking made by the last step, which has to be done before its messages are
+		sent, or None
+	booking : tuple
+		Booking ID, hospital path and date of the booking being written to the journal, or None
+	subscriptions : availability_subscriptions.SubscriptionIndex
+		Subscriptions of all the sessions waiting for new slots, matched against every new version of the data
+	metrics : server_metrics.ServerMetrics
+		Latency histograms of all the sessions, the menus rendered being recorded by level, or None to record nothing
+	watch : concurrent.futures.Future
+		Subscription of the session waiting for new slots, done once they appear, or None
+	watching : tuple
+		Id of the subscription and level it was made at, or None
+
+	Example
+	-------
+	>>> session = BookingSession(snapshots)
+	>>> messages = session.start()
+	>>> messages = session.step('1')
+	"""
+
+	# Menus shared by all the sessions, rendered and encoded once for every version of the data
+	menus = MenuPayloadCache()
+	# Slots taken by the sessions, shared by all of them
+	reservations = SlotReservations()
+	# Journal the confirmed bookings are made durable in before they are confirmed, or None to keep no record
+	journal = None
+	# Subscriptions of the sessions waiting for new slots, shared by all of them
+	subscriptions = SubscriptionIndex()
+	# Latency histograms and counts of the server, shared by all the sessions
+	metrics = ServerMetrics()
+
+	__slots__ = ('snapshots', 'web_page_data', 'level', 'dose', 'age_group', 'state', 'district', 'hospital_name', 'invalid_count', 'closed', 'commit', 'booking',
+		'search', 'watch', 'watching')
+
+	def __init__(self, snapshots):
+		self.snapshots = snapshots
+		self.web_page_data = None
+		self.level = DOSE_LEVEL
+		self.dose = None
+		self.age_group = None
+		self.state = None
+		self.district = None
+		self.hospital_name = None
+		self.invalid_count = 0
+		self.closed = False
+		self.commit = None
+		self.booking = None
+		self.search = None
+		self.watch = None
+		self.watching = None
+
+	def start(self):
+		"""Frames to send to the Client as soon as it connects.
+
+		Returns
+		-------
+		list
+			Encoded frames, sent together in one write
+		"""
+
+		return [WELCOME] + self.prompt()
+
+	def prompt(self):
+		"""Prompt of the current level, listing the options available in the latest data.
+
+		The menus are served from `menus`, so each one is rendered once for every version of the data.
+		"""
+
+		self.web_page_data = self.snapshots.current()
+		if(self.level == FIRST_DOSE_DATE_LEVEL):
+			return [FIRST_DOSE_DATE_PROMPT]
+		if(self.level == SEARCH_LEVEL):
+			return [self.renderMenu()]
+		if(self.level == WATCH_LEVEL):
+			return [WATCH_PROMPT]
+		if(self.level == SLOT_LEVEL):
+			# The slots left change with every booking, so their menu is rendered afresh rather than cached
+			return [self.renderMenu()]
+		key = (self.level,) + (self.dose, self.age_group, self.state, self.district, self.hospital_name)[:MENU_PATH_DEPTHS[self.level]]
+		return [self.menus.get(self.web_page_data, key, self.renderMenu)]
+
+	def renderMenu(self):
+		"""Render the menu of the current level from the latest data, on a miss of the menu cache.
+
+		Returns
+		-------
+		bytes
+			Encoded MENU frame with the prompt of the level and its options, annotated with the slots
+			published under them at the levels of ANNOTATED_LEVELS
+		"""
+
+		start = time.perf_counter()
+		prompt, fetchOptions = LEVEL_PROMPTS[self.level]
+		options = fetchOptions(self, self.web_page_data)
+		if self.level in ANNOTATED_LEVELS:
+			options = annotateOptions(self, options)
+		payload = encodeFrame(MENU_FRAME, prompt+str(options)+"\n")
+		if self.metrics is not None:
+			self.metrics.render_menu.observe(time.perf_counter() - start, self.level)
+		return payload
+
+	def step(self, data):
+		"""Handle one input of the Client.
+
+		Parameters
+		----------
+		data : str
+			Input of the Client
+
+		Returns
+		-------
+		list
+			Encoded frames to send to the Client in one write, ending with the prompt of the next level unless
+			the session is over
+		"""
+
+		if(data == 'q' or data == 'Q'):
+			print("Client wants to quit!\nSaying Bye to client and closing the connection!")
+			self.closed = True
+			return []
+		elif(data == 'b' or data == 'B'):
+			self.level = previousLevel(self)
+			self.stopWatching()
+			return self.prompt()
+
+		messages = []
+		LEVEL_HANDLERS[self.level](self, data, messages)
+		if not self.closed:
+			messages += self.prompt()
+		return messages
+
+	def path(self, data):
+		"""Handle a whole selection path sent by the Client in one message, booking in a single round trip.
+
+		The path is walked from the Dose through the same handlers as the inputs of the menus, each level
+		taking its value from PATH_FIELDS, given as the number of an option or as its name. The walk stops at
+		the first level whose value is missing, unknown or refused, e.g. a date without slots left, and the
+		session goes on from the menu of that level. If the path has a true "watch" field and stops at the
+		Vaccination Center or the date, the session waits for new slots there instead, on the dates from
+		"date" to "date_to" if they are given as labels.
+
+		Parameters
+		----------
+		data : str
+			JSON object with the value of every level, e.g. {"dose": "2", "first_dose_date": "12/5/2021",
+			"age_group": "18+", "state": "Goa", "district": "North Goa", "hospital": "1", "date": "May 16"}
+
+		Returns
+		-------
+		list
+			Encoded frames to send to the Client in one write, as for `step`
+		"""
+
+		self.stopWatching()
+		self.web_page_data = self.snapshots.current()
+		messages = []
+		try:
+			fields = json.loads(data)
+		except ValueError:
+			fields = None
+		if not isinstance(fields, dict):
+			messages.append(encodeFrame(TEXT_FRAME, "\n<<< Invalid path, expected a JSON object with the fields: "+', '.join(PATH_FIELDS.values())))
+			invalidInput(self, messages)
+			return messages if self.closed else messages + self.prompt()
+
+		print("Path received: ", fields)
+		self.level = DOSE_LEVEL
+		while not self.closed:
+			level = self.level
+			value = str(fields.get(PATH_FIELDS[level]) or '').strip()
+			option = pathOption(self, value) if value else None
+			if option is None:
+				reason = "unknown "+PATH_FIELDS[level]+" "+value if value else "missing "+PATH_FIELDS[level]
+				messages.append(encodeFrame(TEXT_FRAME, "\n<<< Path stopped at the "+LEVEL_LABELS[level]+": "+reason))
+				break
+			LEVEL_HANDLERS[level](self, option, messages)
+			if self.level == level and not self.closed:
+				messages.append(encodeFrame(TEXT_FRAME, "\n<<< Path stopped at the "+LEVEL_LABELS[level]))
+				break
+		if not self.closed and self.level in WATCH_LEVELS and str(fields.get('watch') or '').lower() in ('1', 'true', 'yes'):
+			watchSlots(self, pathDates(self, fields), messages)
+		if not self.closed:
+			messages += self.prompt()
+		return messages
+
+	def notified(self):
+		"""Handle the new slots the session was waiting for, once its `watch` is done.
+
+		Returns
+		-------
+		list
+			Encoded frames telling the Client where and when slots appeared, with the menu of the dates of that
+			Vaccination Center, to send in one write
+		"""
+
+		path, dates = self.watch.result()
+		self.watch = None
+		self.watching = None
+		print("New slots notified: ", path, dates)
+		self.dose, self.age_group, self.state, self.district, self.hospital_name = path
+		self.level = SLOT_LEVEL
+		return [encodeFrame(TEXT_FRAME, "\n<<< New slots at "+path[4]+", "+path[3]+", "+path[2]+" on "+', '.join(dates)+"!")] + self.prompt()
+
+	def commitFailed(self, error):
+		"""Give back the slot of the booking whose journal write failed, once `commit` raised it.
+
+		Parameters
+		----------
+		error : OSError
+			Error of the journal write
+
+		Returns
+		-------
+		list
+			Encoded frames telling the Client the appointment is not scheduled, to send instead of those of the
+			step, which carry the Booking ID
+		"""
+
+		booking_id, path, date = self.booking
+		print("Booking %s could not be written to the journal: %r" % (booking_id, error))
+		self.reservations.release(path, date)
+		self.commit = None
+		self.booking = None
+		return [encodeFrame(TEXT_FRAME, "\n<<< Your appointment could not be scheduled, try again later!")]
+
+	def stopWatching(self):
+		"""Drop the subscription of the session, if any, going back to the level it was made at if still waiting."""
+
+		if self.watching is not None:
+			self.subscriptions.unsubscribe(self.watching[0])
+			if self.level == WATCH_LEVEL:
+				self.level = self.watching[1]
+			self.watch = None
+			self.watching = None
+
+	def close(self):
+		"""Drop the subscription of the session, if any, once its connection is gone."""
+
+		self.stopWatching()
+
+############################################################################################################################
+
+def pathOption(session, value):
+	"""Input of the current level for a value of a path, the number of an option given by its number or name."""
+
+	if session.level not in LEVEL_PROMPTS:
+		return value
+	_, fetchOptions = LEVEL_PROMPTS[session.level]
+	options = fetchOptions(session, session.web_page_data)
+	if value in options:
+		return value
+	for key, option in options.items():
+		# Options of the Vaccination Centers and the slots are single-item dicts, named by their key
+		name, = option if isinstance(option, dict) else (option,)
+		if name.lower() == value.lower():
+			return key
+	# The 2nd Dose is chosen at the Dose level even if the data lists no row for it
+	return value if session.level == DOSE_LEVEL else None
+
+############################################################################################################################
+
+def annotateOptions(session, options):
+	"""Options of a menu with the slots published under each of them and the first date with slots, e.g.
+	'North Goa - 320 slots from May 16', read from the rollups of the data."""
+
+	rollups = rollupIndex(session.web_page_data)
+	path = (session.dose, session.age_group, session.state, session.district)[:MENU_PATH_DEPTHS[session.level]]
+	annotated = {}
+	for key, option in options.items():
+		if isinstance(option, dict):
+			(name, vaccine), = option.items()
+			annotated[key] = {name: vaccine+" - "+rollups.describe(*path, name)}
+		else:
+			annotated[key] = option+" - "+rollups.describe(*path, option)
+	return annotated
+
+############################################################################################################################
+
+def previousLevel(session):
+	"""Level the Client goes back to from the current level of the session."""
+
+	if(session.level == AGE_GROUP_LEVEL):
+		return FIRST_DOSE_DATE_LEVEL if session.dose == '2' else DOSE_LEVEL
+	if(session.level == SEARCH_LEVEL):
+		return session.search[0]
+	if(session.level == WATCH_LEVEL):
+		return session.watching[1]
+	return PREVIOUS_LEVELS[session.level]
+
+############################################################################################################################
+
+def invalidInput(session, messages):
+	"""Count an invalid input of the Client, ending the session on the third one."""
+
+	session.invalid_count+=1
+	print("Invalid input detected "+str(session.invalid_count)+" time(s)!")
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Invalid input provided "+str(session.invalid_count)+" time(s)! Try again."))
+	if(session.invalid_count == 3):
+		print("Notifying the client and closing the connection!")
+		session.closed = True
+
+############################################################################################################################
+
+def doseInput(session, data, messages):
+	"""Handle the Dose typed by the Client, the 2nd Dose going on to the date of the First Dose.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the Dose level
+	data : str
+		Input of the Client, '1' or '2'
+	messages : list
+		Encoded frames of the step, the reply being appended to it
+	"""
+
+	if(data == '2'):
+		print("Dose selected: ", data)
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<< Dose selected: 2\n"))
+		session.dose = data
+		session.level = FIRST_DOSE_DATE_LEVEL
+	elif(data == '1'):
+		if data in fetchVaccineDoses(session.web_page_data):
+			print("Dose selected: ", data)
+			messages.append(encodeFrame(TEXT_FRAME, "\n<<< Dose selected: "+str(data)))
+			session.dose = data
+			session.level = AGE_GROUP_LEVEL
+	else:
+		invalidInput(session, messages)
+
+############################################################################################################################
+
+def firstDoseDateInput(session, data, messages):
+	"""Check the date of the First Dose for the eligibility to the 2nd Dose, ending the session if it is too early.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the level of the date of the First Dose
+	data : str
+		Date typed by the Client, in the format checked by `checkdate`
+	messages : list
+		Encoded frames of the step, the weeks since the First Dose and the eligibility being appended to it
+	"""
+
+	if not checkdate(data):
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<<< Invalid Date provided of First Vaccination Dose: "))
+		return
+
+	no_of_weeks = calc_weeks(data)
+	if(no_of_weeks < 0):
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<<< Invalid Date provided of First Vaccination Dose: "))
+		return
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Date of First Vaccination Dose provided: "+str(data)+"\n<<< Number of weeks from today: "+str(no_of_weeks)))
+	if(no_of_weeks < 4):
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<< You are not eligible right now for 2nd Vaccination Dose! Try after "+str(4 - no_of_weeks)+" weeks."))
+		session.closed = True
+		return
+	elif(no_of_weeks > 8):
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<< You have been late in scheduling your 2nd Vaccination Dose by "+str(no_of_weeks - 8)+" weeks.\n"))
+	else:
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<< You are eligible for 2nd Vaccination Dose and are in the right time-frame to take it.\n"))
+	session.level = AGE_GROUP_LEVEL
+
+############################################################################################################################
+
+def menuInput(session, data, messages):
+	"""Handle the choice of one of the numbered options of a menu level, or a name typed to search for.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at one of the levels of MENU_SELECTIONS
+	data : str
+		Input of the Client: the number of an option, w to wait for new slots at the levels of WATCH_LEVELS,
+		or part of a name
+	messages : list
+		Encoded frames of the step, the reply of the selection handler being appended to it
+	"""
+
+	_, fetchOptions = LEVEL_PROMPTS[session.level]
+	options = fetchOptions(session, session.web_page_data)
+	if(data.isdigit() and int(data) <= len(options) and int(data) != 0):
+		if data in options:
+			MENU_SELECTIONS[session.level](session, options[data], messages)
+	elif((data == 'w' or data == 'W') and session.level in WATCH_LEVELS):
+		watchSlots(session, None, messages)
+	elif(data.strip() and not data.isdigit()):
+		searchInput(session, data, messages)
+	else:
+		invalidInput(session, messages)
+
+############################################################################################################################
+
+def searchInput(session, data, messages):
+	"""Search the Vaccination Centers, Districts and States for a name typed instead of an option, for the Dose selected
+	and, once selected, the Age Group.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at a menu level or at the matches of a previous search, going to the matches found
+	data : str
+		Part of a name, in any case
+	messages : list
+		Encoded frames of the step, an invalid input being counted and appended to it if nothing matches
+	"""
+
+	from_level = session.search[0] if session.level == SEARCH_LEVEL else session.level
+	age_group = session.age_group if from_level != AGE_GROUP_LEVEL else None
+	matches = searchIndex(session.web_page_data).search(data, session.dose, age_group, SEARCH_LIMIT)
+	print("Searched for: ", data, ", matches: ", len(matches))
+	if not matches:
+		messages.append(encodeFrame(TEXT_FRAME, "\n<<< No Vaccination Center found for: "+str(data)))
+		invalidInput(session, messages)
+		return
+	session.search = (from_level, matches)
+	session.level = SEARCH_LEVEL
+
+def searchMatches(session, web_page_data):
+	"""Paths and labels of the Vaccination Centers of the last search still available in the data."""
+
+	hospitals = searchIndex(web_page_data).hospitals
+	matches = []
+	for path in session.search[1]:
+		if path in hospitals:
+			vaccines, slots = hospitals[path]
+			matches.append((path, "%s, %s, %s (%s) - %s: %d slots" % (path[4], path[3], path[2], path[1], '/'.join(vaccines), slots)))
+	return matches
+
+def fetchSearchMatches(session, web_page_data):
+	"""Options listing the Vaccination Centers of the last search, with Key as 'Option' and Value as
+	'Vaccination Center, District, State (Age Group) - Vaccines: Slots'."""
+
+	return {str(num): label for num, (_, label) in enumerate(searchMatches(session, web_page_data), 1)}
+
+############################################################################################################################
+
+def watchSlots(session, dates, messages):
+	"""Have the session wait for new slots at the Vaccination Center selected or, from the menu of the
+	Vaccination Centers, anywhere in the District selected, on the given dates or on any date if None.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at one of the levels of WATCH_LEVELS, subscribed in `subscriptions` in place of any
+		subscription it already had
+	dates : list
+		Labels of the dates to wait for, or None for any date
+	messages : list
+		Encoded frames of the step, the confirmation of the wait being appended to it
+	"""
+
+	path = (session.dose, session.age_group, session.state, session.district)
+	where = session.district+", "+session.state
+	if(session.level == SLOT_LEVEL):
+		path += (session.hospital_name,)
+		where = session.hospital_name+", "+where
+	session.stopWatching()
+	subscription, session.watch = session.subscriptions.subscribe(path, dates)
+	session.watching = (subscription, session.level)
+	session.level = WATCH_LEVEL
+	print("Waiting for new slots: ", path, dates)
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Waiting for new slots at "+where+" on "+(', '.join(dates) if dates else "any date")
+		+", you will be notified here as soon as they appear..."))
+
+def pathDates(session, fields):
+	"""Dates from the "date" to the "date_to" field of a path, or None if they are not both labels of dates of the data."""
+
+	dates = session.web_page_data.dates
+	first = str(fields.get('date') or '').strip()
+	last = str(fields.get('date_to') or '').strip() or first
+	if first not in dates or last not in dates:
+		return None
+	return dates[dates.index(first):dates.index(last) + 1]
+
+def waitingInput(session, data, messages):
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Still waiting for new slots"))
+
+############################################################################################################################
+
+def selectAgeGroup(session, age_group, messages):
+	"""Select an Age Group, going on to the States.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the Age Group level
+	age_group : str
+		Age Group of the option chosen
+	messages : list
+		Encoded frames of the step, the selection being appended to it
+	"""
+
+	print("Age Group selected: ",str(age_group))
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Selected Age Group: "+str(age_group)))
+	session.age_group = age_group
+	session.level = STATE_LEVEL
+
+def selectState(session, state, messages):
+	"""Select a State, going on to its Districts.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the State level
+	state : str
+		State of the option chosen
+	messages : list
+		Encoded frames of the step, the selection being appended to it
+	"""
+
+	print("State selected: ",str(state))
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Selected State: "+str(state)))
+	session.state = state
+	session.level = DISTRICT_LEVEL
+
+def selectDistrict(session, district, messages):
+	"""Select a District, going on to its Vaccination Centers.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the District level
+	district : str
+		District of the option chosen
+	messages : list
+		Encoded frames of the step, the selection being appended to it
+	"""
+
+	print("District selected: ",str(district))
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Selected District: "+str(district)))
+	session.district = district
+	session.level = HOSPITAL_LEVEL
+
+def selectHospital(session, hospital_vaccine, messages):
+	"""Select a Vaccination Center, going on to its slots.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the Vaccination Center level
+	hospital_vaccine : dict
+		Option chosen, with Key as the name of the Vaccination Center and Value as its Vaccine
+	messages : list
+		Encoded frames of the step, the selection being appended to it
+	"""
+
+	hospital_name, = hospital_vaccine
+	print("Hospital selected: ",str(hospital_name))
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Selected Vaccination Center: "+str(hospital_name)))
+	session.hospital_name = hospital_name
+	session.level = SLOT_LEVEL
+
+def selectSearchMatch(session, label, messages):
+	"""Select one of the Vaccination Centers found by a search, jumping straight to its slots.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the matches of a search, its selections being replaced by the path of the match
+	label : str
+		Label of the match chosen, as listed by `fetchSearchMatches`
+	messages : list
+		Encoded frames of the step, the selection being appended to it
+	"""
+
+	path = {match_label: path for path, match_label in searchMatches(session, session.web_page_data)}[label]
+	print("Vaccination Center found: ", str(path))
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Selected Vaccination Center: "+str(path[4])+", "+str(path[3])+", "+str(path[2])))
+	session.dose, session.age_group, session.state, session.district, session.hospital_name = path
+	session.level = SLOT_LEVEL
+
+def remainingSlots(session, options):
+	"""Options of the slot menu with the slots left on every date once those taken are subtracted, each date listed once."""
+
+	path = (session.dose, session.age_group, session.state, session.district, session.hospital_name)
+	dates = {}
+	for option in options.values():
+		(date, _), = option.items()
+		if date not in dates:
+			dates[date] = session.reservations.remaining(session.web_page_data, path, date)
+	return {str(num): {date: str(slots)} for num, (date, slots) in enumerate(dates.items(), 1)}
+
+def selectSlot(session, date_slots, messages):
+	"""Select a date of the slot menu and reserve one of its slots, ending the session with a Booking ID.
+
+	The booking is written to the journal, if any, and `session.commit` is set to that write, which the
+	server waits for before sending the Booking ID, and calls `commitFailed` on if it fails. If no slot is
+	left, the Client stays at the slot menu.
+
+	Parameters
+	----------
+	session : BookingSession
+		Session at the slot level
+	date_slots : dict
+		Option chosen, with Key as the date and Value as the slots left on it
+	messages : list
+		Encoded frames of the step, the Booking ID or the refusal being appended to it
+	"""
+
+	(date, slots), = date_slots.items()
+	print("Vaccination Date selected: ", str(date))
+	print("Available Slots on that date: ", str(slots))
+	path = (session.dose, session.age_group, session.state, session.district, session.hospital_name)
+	remaining = session.reservations.remaining(session.web_page_data, path, date)
+	messages.append(encodeFrame(TEXT_FRAME, "\n<<< Selected Vaccination Appointment Date: "+str(date)+"\n<<< Available Slots on the selected Date: "+str(remaining)))
+	booking_id = session.reservations.reserve(session.web_page_data, path, date) if remaining > 0 else None
+	if booking_id is not None:
+		print("Slot reserved, Booking ID: ", booking_id)
+		if session.journal is not None:
+			session.commit = session.journal.append(booking_id, path, date)
+			session.booking = (booking_id, path, date)
+		messages.append(encodeFrame(TEXT_FRAME, "<<< Your appointment is scheduled with Booking ID "+booking_id+". Make sure to carry ID Proof while you visit Vaccination Center!"))
+		session.closed = True
+	else:
+		messages.append(encodeFrame(TEXT_FRAME, "<<< Selected Appointment Date has no available slots, select another date!"))
+
+############################################################################################################################
+
+# Line added to the prompts of the menus at which a name can be typed to search for a Vaccination Center
+SEARCH_HINT = " (or type part of a Vaccination Center, District or State name to search)\n"
+
+# Prompt of every menu level and the options it lists, given the session and the data
+LEVEL_PROMPTS = {
+	DOSE_LEVEL: ("\n>>> Select the Dose of Vaccination:\n", lambda session, data: fetchVaccineDoses(data)),
+	AGE_GROUP_LEVEL: ("\n>>> Select the Age Group:"+SEARCH_HINT, lambda session, data: fetchAgeGroup(data, session.dose)),
+	STATE_LEVEL: ("\n>>> Select the State:"+SEARCH_HINT, lambda session, data: fetchStates(data, session.age_group, session.dose)),
+	DISTRICT_LEVEL: ("\n>>> Select the District:"+SEARCH_HINT, lambda session, data: fetchDistricts(data, session.state, session.age_group, session.dose)),
+	HOSPITAL_LEVEL: ("\n>>> Select the Vaccination Center Name (or w to be notified of new slots in the District):"+SEARCH_HINT,
+		lambda session, data: fetchHospitalVaccineNames(data, session.district, session.state, session.age_group, session.dose)),
+	SLOT_LEVEL: ("\n>>> Select one of the available slots to schedule the Appointment (or w to be notified of new slots):\n",
+		lambda session, data: remainingSlots(session, fetchVaccineSlots(data, session.hospital_name, session.district, session.state, session.age_group, session.dose))),
+	SEARCH_LEVEL: ("\n>>> Select one of the matching Vaccination Centers:\n", fetchSearchMatches),
+}
+
+# Menu levels at which the Client can wait for new slots, at the Vaccination Center selected or in the District
+WATCH_LEVELS = (HOSPITAL_LEVEL, SLOT_LEVEL)
+
+# Menu levels whose options are annotated with the slots published under them
+ANNOTATED_LEVELS = (AGE_GROUP_LEVEL, STATE_LEVEL, DISTRICT_LEVEL, HOSPITAL_LEVEL)
+
+# Number of selections, from the Dose down to the Vaccination Center, the menu of every level depends on
+MENU_PATH_DEPTHS = {
+	DOSE_LEVEL: 0,
+	AGE_GROUP_LEVEL: 1,
+	STATE_LEVEL: 2,
+	DISTRICT_LEVEL: 3,
+	HOSPITAL_LEVEL: 4,
+	SLOT_LEVEL: 5,
+}
+
+# Handler of the inputs at every level, and of the choice of an option at every menu level
+LEVEL_HANDLERS = {
+	DOSE_LEVEL: doseInput,
+	FIRST_DOSE_DATE_LEVEL: firstDoseDateInput,
+	AGE_GROUP_LEVEL: menuInput,
+	STATE_LEVEL: menuInput,
+	DISTRICT_LEVEL: menuInput,
+	HOSPITAL_LEVEL: menuInput,
+	SLOT_LEVEL: menuInput,
+	SEARCH_LEVEL: menuInput,
+	WATCH_LEVEL: waitingInput,
+}
+MENU_SELECTIONS = {
+	AGE_GROUP_LEVEL: selectAgeGroup,
+	STATE_LEVEL: selectState,
+	DISTRICT_LEVEL: selectDistrict,
+	HOSPITAL_LEVEL: selectHospital,
+	SLOT_LEVEL: selectSlot,
+	SEARCH_LEVEL: selectSearchMatch,
+}
+
+# Field of a path sent in one message giving the value of every level, and name of every level in the replies
+PATH_FIELDS = {
+	DOSE_LEVEL: 'dose',
+	FIRST_DOSE_DATE_LEVEL: 'first_dose_date',
+	AGE_GROUP_LEVEL: 'age_group',
+	STATE_LEVEL: 'state',
+	DISTRICT_LEVEL: 'district',
+	HOSPITAL_LEVEL: 'hospital',
+	SLOT_LEVEL: 'date',
+}
+LEVEL_LABELS = {
+	DOSE_LEVEL: 'Dose',
+	FIRST_DOSE_DATE_LEVEL: 'date of First Vaccination Dose',
+	AGE_GROUP_LEVEL: 'Age Group',
+	STATE_LEVEL: 'State',
+	DISTRICT_LEVEL: 'District',
+	HOSPITAL_LEVEL: 'Vaccination Center',
+	SLOT_LEVEL: 'Vaccination Appointment Date',
+}
+
+# Level the Client goes back to from every level, the Age Group going back to the date of the First Dose for the 2nd Dose
+PREVIOUS_LEVELS = {
+	DOSE_LEVEL: DOSE_LEVEL,
+	FIRST_DOSE_DATE_LEVEL: DOSE_LEVEL,
+	STATE_LEVEL: AGE_GROUP_LEVEL,
+	DISTRICT_LEVEL: STATE_LEVEL,
+	HOSPITAL_LEVEL: DISTRICT_LEVEL,
+	SLOT_LEVEL: HOSPITAL_LEVEL,
+}
+
+############################################################################################################################
+
+def startCommunication(client_conn, client_addr, snapshots, idle_timeout=None):
 	"""Starts the communication channel with the connected Client for scheduling an Appointment for Vaccination.
 
 	Parameters
@@ -483,426 +1247,82 @@ def startCommunication(client_conn, client_addr, web_page_data):
 		Object of socket class for the Client connected to Server and communicate further with it
 	client_addr : tuple
 		IP and Port address of the Client connected to Server
-	web_page_data : bs4.element.ResultSet
-		All rows of Tabular data fetched from a website excluding the table headers
+	snapshots : availability_refresh.SnapshotHolder
+		Holder of the latest rows of Tabular data fetched from a website, read once at the start of
+		every step of the dialogue so that each step works on one consistent version
+	idle_timeout : float
+		Seconds every send to and receive from the Client may take before its connection is closed, None for no limit
 	"""
 
-	invalid_count = 0
-	while True:
-		client_conn.send(bytes('''$$$$$$\            $$\      $$\ $$\                  $$$$$$\  $$\                  $$\     $$$$$$$\             $$\     
-$$  __$$\           $$ | $\  $$ |\__|                $$  __$$\ $$ |                 $$ |    $$  __$$\            $$ |    
-$$ /  \__| $$$$$$\  $$ |$$$\ $$ |$$\ $$$$$$$\        $$ /  \__|$$$$$$$\   $$$$$$\ $$$$$$\   $$ |  $$ | $$$$$$\ $$$$$$\   
-$$ |      $$  __$$\ $$ $$ $$\$$ |$$ |$$  __$$\       $$ |      $$  __$$\  \____$$\\_$$  _|  $$$$$$$\ |$$  __$$\\_$$  _|  
-$$ |      $$ /  $$ |$$$$  _$$$$ |$$ |$$ |  $$ |      $$ |      $$ |  $$ | $$$$$$$ | $$ |    $$  __$$\ $$ /  $$ | $$ |    
-$$ |  $$\ $$ |  $$ |$$$  / \$$$ |$$ |$$ |  $$ |      $$ |  $$\ $$ |  $$ |$$  __$$ | $$ |$$\ $$ |  $$ |$$ |  $$ | $$ |$$\ 
-\$$$$$$  |\$$$$$$  |$$  /   \$$ |$$ |$$ |  $$ |      \$$$$$$  |$$ |  $$ |\$$$$$$$ | \$$$$  |$$$$$$$  |\$$$$$$  | \$$$$  |
- \______/  \______/ \__/     \__|\__|\__|  \__|       \______/ \__|  \__| \_______|  \____/ \_______/  \______/   \____/         ''','utf-8'))
-		while True:
-			client_conn.send(bytes("\n>>> Select the Dose of Vaccination:\n"+str(fetchVaccineDoses(web_page_data))+"\n",'utf-8'))
-			data = client_conn.recv(1024)
-			if(data.decode('utf-8') == '2'):
-				print("Dose selected: ", data.decode('utf-8'))
-				client_conn.send(bytes("\n<<< Dose selected: 2\n",'utf-8'))
-				while True:
-					client_conn.sendall(bytes("\n>>> Provide the date of First Vaccination Dose (DD/MM/YYYY), for e.g. 12/5/2021",'utf-8'))
-					data = client_conn.recv(1024)
-					if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-						print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-						stopCommunication(client_conn)
-					elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-						break
-					elif(checkdate(data.decode('utf-8'))):
-						no_of_weeks = calc_weeks(data.decode('utf-8')) 
-						if(no_of_weeks < 0):
-							while True:
-								client_conn.send(bytes("\n<<<< Invalid Date provided of First Vaccination Dose: ",'utf-8'))
-								break
-						else:
-							client_conn.send(bytes("\n<<< Date of First Vaccination Dose provided: "+str(data.decode('utf-8'))+"\n<<< Number of weeks from today: "+str(no_of_weeks),'utf-8'))
-							if(no_of_weeks >= 0 and no_of_weeks < 4):
-								client_conn.send(bytes("\n<<< You are not eligible right now for 2nd Vaccination Dose! Try after "+str(4 - no_of_weeks)+" weeks.",'utf-8'))
-								stopCommunication(client_conn)
-							elif(no_of_weeks > 8):
-								client_conn.send(bytes("\n<<< You have been late in scheduling your 2nd Vaccination Dose by "+str(no_of_weeks - 8)+" weeks.\n",'utf-8'))
-							elif(no_of_weeks >= 4 and no_of_weeks <= 8):
-								client_conn.send(bytes("\n<<< You are eligible for 2nd Vaccination Dose and are in the right time-frame to take it.\n",'utf-8'))
-							key_dose = '2'
-							while True:
-								client_conn.send(bytes("\n>>> Select the Age Group:\n"+str(fetchAgeGroup(web_page_data, key_dose))+"\n",'utf-8'))
-								data = client_conn.recv(1024)
-								if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-									print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-									stopCommunication(client_conn)
-								elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-									break
-								elif((data.decode('utf-8')).isdigit()):
-									if(int(data.decode('utf-8')) <= len(fetchAgeGroup(web_page_data, key_dose)) and int(data.decode('utf-8')) != 0):
-										for index, (key_age, value_age) in enumerate(fetchAgeGroup(web_page_data, key_dose).items()):
-											if (data.decode('utf-8') == key_age):
-												print("Age Group selected: ",str(value_age))
-												client_conn.send(bytes("\n<<< Selected Age Group: "+str(value_age),'utf-8'))
-												while True:
-													client_conn.send(bytes("\n>>> Select the State:\n"+str(fetchStates(web_page_data,  value_age, key_dose))+"\n",'utf-8'))
-													data = client_conn.recv(1024)
-													if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-														print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-														stopCommunication(client_conn)
-													elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-														break
-													elif((data.decode('utf-8')).isdigit()):
-														if(int(data.decode('utf-8')) <= len(fetchStates(web_page_data,  value_age, key_dose)) and int(data.decode('utf-8')) != 0):
-															for index, (key_state, value_state) in enumerate(fetchStates(web_page_data, value_age, key_dose).items()):
-																if(data.decode('utf-8') == key_state):
-																	print("State selected: ",str(value_state))
-																	client_conn.send(bytes("\n<<< Selected State: "+str(value_state),'utf-8'))
-																	while True:
-																		client_conn.send(bytes("\n>>> Select the District:\n"+str(fetchDistricts(web_page_data, value_state, value_age, key_dose))+"\n",'utf-8'))
-																		data = client_conn.recv(1024)
-																		if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-																			print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-																			stopCommunication(client_conn)
-																		elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-																			break
-																		elif((data.decode('utf-8')).isdigit()):
-																			if(int(data.decode('utf-8')) <= len(fetchDistricts(web_page_data, value_state, value_age, key_dose)) and int(data.decode('utf-8')) != 0):
-																				for index, (key_dist, value_dist) in enumerate(fetchDistricts(web_page_data, value_state, value_age, key_dose).items()):
-																					if(data.decode('utf-8') == key_dist):
-																						print("District selected: ",str(value_dist))
-																						client_conn.send(bytes("\n<<< Selected District: "+str(value_dist),'utf-8'))
-																						while True:
-																							client_conn.send(bytes(	"\n>>> Select the Vaccination Center Name:\n"+str(fetchHospitalVaccineNames(web_page_data, value_dist, value_state, value_age, key_dose))+"\n",'utf-8'))
-																							data = client_conn.recv(1024)
-																							if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-																								print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-																								stopCommunication(client_conn)
-																							elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-																								break
-																							elif((data.decode('utf-8')).isdigit()):
-																								if(int(data.decode('utf-8')) <= len(fetchHospitalVaccineNames(web_page_data, value_dist, value_state, value_age, key_dose)) and int(data.decode('utf-8')) != 0):
-																									for index, (key_hos, value_hos) in enumerate(fetchHospitalVaccineNames(web_page_data, value_dist, value_state, value_age, key_dose).items()):
-																										if(data.decode('utf-8') == key_hos):
-																											hos_dict = value_hos
-																											for index, (key_hos_dict, value_hos_dict) in enumerate(hos_dict.items()):
-																												print("Hospital selected: ",str(key_hos_dict))
-																												client_conn.send(bytes("\n<<< Selected Vaccination Center: "+str(key_hos_dict),'utf-8'))
-																												while True:
-																													client_conn.send(bytes("\n>>> Select one of the available slots to schedule the Appointment:\n"+str(fetchVaccineSlots(web_page_data, key_hos_dict, value_dist, value_state,value_age,key_dose))+"\n",'utf-8'))
-																													data = client_conn.recv(1024)
-																													if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-																														print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-																														stopCommunication(client_conn)
-																													elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-																														break
-																													elif((data.decode('utf-8')).isdigit()):
-																														if(int(data.decode('utf-8')) <= len(fetchVaccineSlots(web_page_data, key_hos_dict, value_dist, value_state,value_age,key_dose)) and int(data.decode('utf-8')) != 0):
-																															for index, (key_slot, value_slot) in enumerate(fetchVaccineSlots(web_page_data, key_hos_dict, value_dist, value_state,value_age,key_dose).items()):
-																																if(data.decode('utf-8') == key_slot):
-																																	slot_dict = value_slot
-																																	for index, (key_slot_dict, value_slot_dict) in enumerate(slot_dict.items()):
-																																		print("Vaccination Date selected: ", str(key_slot_dict))
-																																		print("Available Slots on that date: ", str(value_slot_dict))
-																																		client_conn.send(bytes("\n<<< Selected Vaccination Appointment Date: "+str(key_slot_dict)+"\n<<< Available Slots on the selected Date: "+str(value_slot_dict),'utf-8'))
-																																		if(int(value_slot_dict) > 0):
-																																			client_conn.send(bytes("<<< Your appointment is scheduled. Make sure to carry ID Proof while you visit Vaccination Center!",'utf-8'))
-																																			stopCommunication(client_conn)
-																																		else:
-																																			client_conn.send(bytes("<<< Selected Appointment Date has no available slots, select another date!",'utf-8'))
-																																			continue
-																														else:
-																															invalid_count+=1
-																															print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																															client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																															if(invalid_count < 3):
-																																continue
-																															elif(invalid_count == 3):
-																																print("Notifying the client and closing the connection!")
-																																stopCommunication(client_conn)
-																													else:
-																														invalid_count+=1
-																														print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																														client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																														if(invalid_count < 3):
-																															continue
-																														elif(invalid_count == 3):
-																															print("Notifying the client and closing the connection!")
-																															stopCommunication(client_conn)
-																								else:
-																									invalid_count+=1
-																									print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																									client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																									if(invalid_count < 3):
-																										continue
-																									elif(invalid_count == 3):
-																										print("Notifying the client and closing the connection!")
-																										stopCommunication(client_conn)							
-																							else:
-																								invalid_count+=1
-																								print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																								client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																								if(invalid_count < 3):
-																									continue
-																								elif(invalid_count == 3):
-																									print("Notifying the client and closing the connection!")
-																									stopCommunication(client_conn)
-																			else:
-																				invalid_count+=1
-																				print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																				client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																				if(invalid_count < 3):
-																					continue
-																				elif(invalid_count == 3):
-																					print("Notifying the client and closing the connection!")
-																					stopCommunication(client_conn)						
-																		else:
-																			invalid_count+=1
-																			print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																			client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																			if(invalid_count < 3):
-																				continue
-																			elif(invalid_count == 3):
-																				print("Notifying the client and closing the connection!")
-																				stopCommunication(client_conn)
-														else:
-															invalid_count+=1
-															print("Invalid input detected "+str(invalid_count)+" time(s)!")
-															client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-															if(invalid_count < 3):
-																continue
-															elif(invalid_count == 3):
-																print("Notifying the client and closing the connection!")
-																stopCommunication(client_conn)														
-													else:
-														invalid_count+=1
-														print("Invalid input detected "+str(invalid_count)+" time(s)!")
-														client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-														if(invalid_count < 3):
-															continue
-														elif(invalid_count == 3):
-															print("Notifying the client and closing the connection!")
-															stopCommunication(client_conn)
-									else:
-										invalid_count+=1
-										print("Invalid input detected "+str(invalid_count)+" time(s)!")
-										client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-										if(invalid_count < 3):
-											continue
-										elif(invalid_count == 3):
-											print("Notifying the client and closing the connection!")
-											stopCommunication(client_conn)						
-								else:
-									invalid_count+=1
-									print("Invalid input detected "+str(invalid_count)+" time(s)!")
-									client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-									if(invalid_count < 3):
-										continue
-									elif(invalid_count == 3):
-										print("Notifying the client and closing the connection!")
-										stopCommunication(client_conn)
-					else:
-						continue
-
-			elif(data.decode('utf-8') == '1'):
-				for index, (key_dose, value_dose) in enumerate(fetchVaccineDoses(web_page_data).items()):
-					if (data.decode('utf-8') == key_dose):
-						print("Dose selected: ", data.decode('utf-8'))
-						client_conn.send(bytes("\n<<< Dose selected: "+str(key_dose),'utf-8'))
-						while True:
-							client_conn.send(bytes("\n>>> Select the Age Group:\n"+str(fetchAgeGroup(web_page_data, key_dose))+"\n",'utf-8'))
-							data = client_conn.recv(1024)
-							if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-								print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-								stopCommunication(client_conn)
-							elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-								break
-							elif((data.decode('utf-8')).isdigit()):
-								if(int(data.decode('utf-8')) <= len(fetchAgeGroup(web_page_data, key_dose)) and int(data.decode('utf-8')) != 0):
-									for index, (key_age, value_age) in enumerate(fetchAgeGroup(web_page_data, key_dose).items()):
-										if (data.decode('utf-8') == key_age):
-											print("Age Group selected: ",str(value_age))
-											client_conn.send(bytes("\n<<< Selected Age Group: "+str(value_age),'utf-8'))
-											while True:
-												client_conn.send(bytes("\n>>> Select the State:\n"+str(fetchStates(web_page_data,  value_age, key_dose))+"\n",'utf-8'))
-												data = client_conn.recv(1024)
-												if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-													print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-													stopCommunication(client_conn)
-												elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-													break
-												elif((data.decode('utf-8')).isdigit()):
-													if(int(data.decode('utf-8')) <= len(fetchStates(web_page_data,  value_age, key_dose)) and int(data.decode('utf-8')) != 0):
-														for index, (key_state, value_state) in enumerate(fetchStates(web_page_data, value_age, key_dose).items()):
-															if(data.decode('utf-8') == key_state):
-																print("State selected: ",str(value_state))
-																client_conn.send(bytes("\n<<< Selected State: "+str(value_state),'utf-8'))
-																while True:
-																	client_conn.send(bytes("\n>>> Select the District:\n"+str(fetchDistricts(web_page_data, value_state, value_age, key_dose))+"\n",'utf-8'))
-																	data = client_conn.recv(1024)
-																	if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-																		print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-																		stopCommunication(client_conn)
-																	elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-																		break
-																	elif((data.decode('utf-8')).isdigit()):
-																		if(int(data.decode('utf-8')) <= len(fetchDistricts(web_page_data, value_state, value_age, key_dose)) and int(data.decode('utf-8')) != 0):
-																			for index, (key_dist, value_dist) in enumerate(fetchDistricts(web_page_data, value_state, value_age, key_dose).items()):
-																				if(data.decode('utf-8') == key_dist):
-																					print("District selected: ",str(value_dist))
-																					client_conn.send(bytes("\n<<< Selected District: "+str(value_dist),'utf-8'))
-																					while True:
-																						client_conn.send(bytes(	"\n>>> Select the Vaccination Center Name:\n"+str(fetchHospitalVaccineNames(web_page_data, value_dist, value_state, value_age, key_dose))+"\n",'utf-8'))
-																						data = client_conn.recv(1024)
-																						if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-																							print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-																							stopCommunication(client_conn)
-																						elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-																							break
-																						elif((data.decode('utf-8')).isdigit()):
-																							if(int(data.decode('utf-8')) <= len(fetchHospitalVaccineNames(web_page_data, value_dist, value_state, value_age, key_dose)) and int(data.decode('utf-8')) != 0):
-																								for index, (key_hos, value_hos) in enumerate(fetchHospitalVaccineNames(web_page_data, value_dist, value_state, value_age, key_dose).items()):
-																									if(data.decode('utf-8') == key_hos):
-																										hos_dict = value_hos
-																										for index, (key_hos_dict, value_hos_dict) in enumerate(hos_dict.items()):
-																											print("Hospital selected: ",str(key_hos_dict))
-																											client_conn.send(bytes("\n<<< Selected Vaccination Center: "+str(key_hos_dict),'utf-8'))
-																											while True:
-																												client_conn.send(bytes("\n>>> Select one of the available slots to schedule the Appointment:\n"+str(fetchVaccineSlots(web_page_data, key_hos_dict, value_dist, value_state,value_age,key_dose))+"\n",'utf-8'))
-																												data = client_conn.recv(1024)
-																												if(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-																													print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-																													stopCommunication(client_conn)
-																												elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
-																													break
-																												elif((data.decode('utf-8')).isdigit()):
-																													if(int(data.decode('utf-8')) <= len(fetchVaccineSlots(web_page_data, key_hos_dict, value_dist, value_state,value_age,key_dose)) and int(data.decode('utf-8')) != 0):
-																														for index, (key_slot, value_slot) in enumerate(fetchVaccineSlots(web_page_data, key_hos_dict, value_dist, value_state,value_age,key_dose).items()):
-																															if(data.decode('utf-8') == key_slot):
-																																slot_dict = value_slot
-																																for index, (key_slot_dict, value_slot_dict) in enumerate(slot_dict.items()):
-																																	print("Vaccination Date selected: ", str(key_slot_dict))
-																																	print("Available Slots on that date: ", str(value_slot_dict))
-																																	client_conn.send(bytes("\n<<< Selected Vaccination Appointment Date: "+str(key_slot_dict)+"\n<<< Available Slots on the selected Date: "+str(value_slot_dict),'utf-8'))
-																																	if(int(value_slot_dict) > 0):
-																																		client_conn.send(bytes("<<< Your appointment is scheduled. Make sure to carry ID Proof while you visit Vaccination Center!",'utf-8'))
-																																		stopCommunication(client_conn)
-																																	else:
-																																		client_conn.send(bytes("<<< Selected Appointment Date has no available slots, select another date!",'utf-8'))
-																																		continue
-																													else:
-																														invalid_count+=1
-																														print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																														client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																														if(invalid_count < 3):
-																															continue
-																														elif(invalid_count == 3):
-																															print("Notifying the client and closing the connection!")
-																															stopCommunication(client_conn)
-																												else:
-																													invalid_count+=1
-																													print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																													client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																													if(invalid_count < 3):
-																														continue
-																													elif(invalid_count == 3):
-																														print("Notifying the client and closing the connection!")
-																														stopCommunication(client_conn)
-																							else:
-																								invalid_count+=1
-																								print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																								client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																								if(invalid_count < 3):
-																									continue
-																								elif(invalid_count == 3):
-																									print("Notifying the client and closing the connection!")
-																									stopCommunication(client_conn)							
-																						else:
-																							invalid_count+=1
-																							print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																							client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																							if(invalid_count < 3):
-																								continue
-																							elif(invalid_count == 3):
-																								print("Notifying the client and closing the connection!")
-																								stopCommunication(client_conn)
-																		else:
-																			invalid_count+=1
-																			print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																			client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																			if(invalid_count < 3):
-																				continue
-																			elif(invalid_count == 3):
-																				print("Notifying the client and closing the connection!")
-																				stopCommunication(client_conn)						
-																	else:
-																		invalid_count+=1
-																		print("Invalid input detected "+str(invalid_count)+" time(s)!")
-																		client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-																		if(invalid_count < 3):
-																			continue
-																		elif(invalid_count == 3):
-																			print("Notifying the client and closing the connection!")
-																			stopCommunication(client_conn)
-													else:
-														invalid_count+=1
-														print("Invalid input detected "+str(invalid_count)+" time(s)!")
-														client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-														if(invalid_count < 3):
-															continue
-														elif(invalid_count == 3):
-															print("Notifying the client and closing the connection!")
-															stopCommunication(client_conn)														
-												else:
-													invalid_count+=1
-													print("Invalid input detected "+str(invalid_count)+" time(s)!")
-													client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-													if(invalid_count < 3):
-														continue
-													elif(invalid_count == 3):
-														print("Notifying the client and closing the connection!")
-														stopCommunication(client_conn)
-								else:
-									invalid_count+=1
-									print("Invalid input detected "+str(invalid_count)+" time(s)!")
-									client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-									if(invalid_count < 3):
-										continue
-									elif(invalid_count == 3):
-										print("Notifying the client and closing the connection!")
-										stopCommunication(client_conn)						
-							else:
-								invalid_count+=1
-								print("Invalid input detected "+str(invalid_count)+" time(s)!")
-								client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-								if(invalid_count < 3):
-									continue
-								elif(invalid_count == 3):
-									print("Notifying the client and closing the connection!")
-									stopCommunication(client_conn)
-
-			elif(data.decode('utf-8') == 'q' or data.decode('utf-8') == 'Q'):
-				print("Client wants to quit!\nSaying Bye to client and closing the connection!")
-				stopCommunication(client_conn)
-			elif(data.decode('utf-8') == 'b' or data.decode('utf-8') == 'B'):
+	metrics = BookingSession.metrics
+	started = time.perf_counter()
+	session = BookingSession(snapshots)
+	reader = FrameReader(client_conn, MAX_INPUT_SIZE)
+	client_conn.settimeout(idle_timeout)
+	goodbye = GOODBYE
+	messages = session.start()
+	while not session.closed:
+		try:
+			start = time.perf_counter()
+			client_conn.sendall(b''.join(messages))
+			if metrics is not None:
+				metrics.send.observe(time.perf_counter() - start, session.level)
+			# A session waiting for new slots is woken up by them or by an input of the Client, whichever comes first
+			while session.watch is not None and not session.watch.done() and not reader.readable(WATCH_POLL_INTERVAL):
+				pass
+			if session.watch is not None and session.watch.done():
+				messages = session.notified()
 				continue
-			else:
-				invalid_count+=1
-				print("Invalid input detected "+str(invalid_count)+" time(s)!")
-				client_conn.send(bytes("\n<<< Invalid input provided "+str(invalid_count)+" time(s)! Try again.",'utf-8'))
-				if(invalid_count == 3):
-					print("Notifying the client and closing the connection!")
-					stopCommunication(client_conn)
+			frame = reader.read()
+		except socket.timeout:
+			print("Client idle for more than %s s, closing the connection" % idle_timeout)
+			messages = []
+			goodbye = REAPED
+			break
+		except (FrameError, ConnectionError):
+			frame = None
+		if frame is None or frame[0] not in (INPUT_FRAME, PATH_FRAME):
+			print("Client disconnected!")
+			messages = []
+			break
+		start = time.perf_counter()
+		if frame[0] == PATH_FRAME:
+			level = 'path'
+			messages = session.path(frame[1].decode('utf-8', errors='replace'))
+		else:
+			level = session.level
+			messages = session.step(frame[1].decode('utf-8', errors='replace'))
+		if metrics is not None:
+			metrics.step.observe(time.perf_counter() - start, level)
+		if session.commit is not None:
+			try:
+				session.commit.result()
+			except OSError as error:
+				messages = session.commitFailed(error)
+	session.close()
+	if metrics is not None:
+		metrics.session.observe(time.perf_counter() - started)
+	stopCommunication(client_conn, messages, goodbye)
 
 ############################################################################################################################
 
-def stopCommunication(client_conn):
+def stopCommunication(client_conn, messages=(), goodbye=GOODBYE):
 	"""Stops or Closes the communication channel of the Client with a message.
 
 	Parameters
 	----------
 	client_conn : socket
 		Object of socket class for the Client connected to Server and communicate further with it
+	messages : list
+		Last frames of the session, sent in the same write as the goodbye message
+	goodbye : bytes
+		Goodbye message sent last
 	"""
 	
-	client_conn.send(bytes("\n<<< See ya! Visit again :)",'utf-8'))
+	try:
+		client_conn.sendall(b''.join(messages) + goodbye)
+	except OSError:
+		pass
 	client_conn.close()
 	exit()
 
@@ -916,12 +1336,16 @@ def checkdate(date_given):
 	----------
 	date_given : str
 		Date provided for the first dose
+
+	Returns
+	-------
+	bool
+		True if the date is in the DD/MM/YYYY format, the Client being told otherwise by the dialogue
 	"""
 	try:
 		datetime.datetime.strptime(date_given,"%d/%m/%Y")
 		return True
-	except:
-		client_conn.send(bytes("\n<<<< Invalid Date provided of First Vaccination Dose: ",'utf-8'))
+	except ValueError:
 		return False
 
 ############################################################################################################################
@@ -948,7 +1372,178 @@ def calc_weeks(first_date):
 if __name__ == '__main__':
 	"""Main function, code begins here
 	"""
-	url_website = "https://www.mooc.e-yantra.org/task-spec/fetch-mock-covidpage"
-	web_page_data = fetchWebsiteData(url_website)
-	client_conn, client_addr = openConnection()
-	startCommunication(client_conn, client_addr, web_page_data)
+	parser = argparse.ArgumentParser(description="CoWin ChatBot server for scheduling Vaccination Appointments")
+	parser.add_argument('--url', nargs='+', default=["https://www.mooc.e-yantra.org/task-spec/fetch-mock-covidpage"],
+		help="URL of the web-page with the Vaccination availability table, several pages are fetched concurrently and merged")
+	parser.add_argument('--stream', action='store_true',
+		help="Parse the web-page row by row while it downloads, with bounded memory")
+	parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+		help="Directory of the on-disk snapshot of the web-page, revalidated on start")
+	parser.add_argument('--no-cache', action='store_true',
+		help="Download the web-page unconditionally without keeping a snapshot")
+	parser.add_argument('--offline', action='store_true',
+		help="Start from the cached snapshot of the web-page without any network access")
+	parser.add_argument('--refresh-interval', type=float, default=300.0,
+		help="Seconds between background refreshes of the availability data, 0 to never refresh")
+	parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH,
+		help="Binary snapshot of the parsed and indexed data to start from, rewritten whenever the data changes")
+	parser.add_argument('--journal', default=DEFAULT_JOURNAL_PATH,
+		help="Journal of the confirmed bookings, replayed on start to take their slots again, empty to keep no record")
+	parser.add_argument('--commit-window', type=float, default=DEFAULT_COMMIT_WINDOW,
+		help="Seconds a booking waits for others to be made durable with the same fsync of the journal")
+	parser.add_argument('--bulk', metavar='REQUESTS',
+		help="Book the requests of a CSV or JSON Lines file in one pass, write the results and exit instead of serving Clients")
+	parser.add_argument('--bulk-results', metavar='RESULTS',
+		help="File the results of --bulk are written to, REQUESTS with .results before its extension by default")
+	parser.add_argument('--fetch-workers', type=int, default=8,
+		help="Number of web-pages fetched at the same time when several URLs are given")
+	parser.add_argument('--fetch-timeout', type=float, default=10.0,
+		help="Timeout in seconds of every request for a web-page")
+	parser.add_argument('--fetch-retries', type=int, default=2,
+		help="Number of retries of a failed request for a web-page")
+	parser.add_argument('--mode', choices=('single', 'async', 'prefork'), default='single',
+		help="Serve one Client and exit (single), any number of Clients at once on an asyncio event loop (async), "
+		"or on one event loop in each of several worker processes sharing the port (prefork)")
+	parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+		help="Number of worker processes in prefork mode")
+	parser.add_argument('--port', type=int, default=PORT,
+		help="Port address to listen on")
+	parser.add_argument('--http-port', type=int, default=0,
+		help="Port of the HTTP/JSON query endpoint served alongside the dialogue, 0 to serve none")
+	parser.add_argument('--idle-timeout', type=float, default=300.0,
+		help="Seconds a Client may take to answer a step, or to read it, before its connection is reaped, 0 for no limit")
+	parser.add_argument('--max-sessions', type=int, default=0,
+		help="Number of sessions open at once, per worker in prefork mode, past which new Clients are told to retry later, 0 for no limit")
+	parser.add_argument('--retry-after', type=int, default=5,
+		help="Seconds the Clients turned away over --max-sessions are told to wait before retrying")
+	parser.add_argument('--metrics-file', default='',
+		help="File the latency metrics are written to every --metrics-interval seconds, in the text format of Prometheus, "
+		"suffixed by the process id of every worker in prefork mode; they are also served at /metrics with --http-port")
+	parser.add_argument('--metrics-interval', type=float, default=10.0,
+		help="Seconds between two writes of --metrics-file")
+	args = parser.parse_args()
+	if args.workers < 1:
+		parser.error("--workers must be at least 1")
+	if args.max_sessions < 0:
+		parser.error("--max-sessions must not be negative")
+	if args.http_port and args.mode == 'prefork':
+		parser.error("--http-port is not available in prefork mode, whose master must not run threads when it forks")
+
+	if args.journal:
+		# The journal is locked before anything else, so a bulk pass started while a server runs stops at once
+		try:
+			BookingSession.journal = BookingJournal(args.journal, commit_window=args.commit_window)
+		except JournalLockedError as error:
+			print(error)
+			exit(1)
+
+	cache = None if args.no_cache else PageCache(args.cache_dir)
+	# A single web-page is fetched over the session of the fetcher too, so it gets the same timeout and retries
+	from page_fetcher import SourceFetcher
+	fetcher = SourceFetcher(cache, workers=min(args.fetch_workers, len(args.url)), timeout=args.fetch_timeout, retries=args.fetch_retries)
+
+	metrics = BookingSession.metrics
+
+	def loadData(previous=None):
+		if len(args.url) > 1:
+			table = fetchMultipleWebsiteData(args.url, fetcher, previous=previous, offline=args.offline, metrics=metrics)
+		else:
+			table = fetchWebsiteData(args.url[0], stream=args.stream, cache=cache, previous=previous, offline=args.offline, metrics=metrics,
+				session=fetcher.session, timeout=fetcher.timeout)
+		# The search index and the rollups are built before the table is swapped in, so that no Client waits for them,
+		# updated from those of the previous table for the rows of its change set
+		searchIndex(table, previous)
+		rollupIndex(table, previous)
+		if table is not previous:
+			metrics.ingest.observe(table.index.build_seconds + table.name_search.build_seconds + table.rollups.build_seconds, 'index')
+		return table
+
+	from_snapshot = bool(args.snapshot) and os.path.exists(args.snapshot)
+	if from_snapshot:
+		start = datetime.datetime.now()
+		web_page_data = load_snapshot(args.snapshot)
+		print("Loaded snapshot %s in %.2f ms" % (args.snapshot, (datetime.datetime.now() - start).total_seconds() * 1000))
+	else:
+		web_page_data = loadData()
+		print("Menu index built in %.2f ms, size: %d bytes" % (web_page_data.index.build_seconds * 1000, web_page_data.index.sizeInBytes()))
+		if args.snapshot:
+			save_snapshot(web_page_data, args.snapshot)
+	if len(web_page_data):
+		print("Table: %d rows, %.0f bytes per row" % (len(web_page_data), sum(web_page_data.sizeInBytes().values()) / len(web_page_data)))
+	print("Search index built in %.2f ms" % (searchIndex(web_page_data).build_seconds * 1000))
+	print("Availability rollups built in %.2f ms" % (rollupIndex(web_page_data).build_seconds * 1000))
+	snapshots = SnapshotHolder(web_page_data)
+	# Every new version of the data is matched against the subscriptions of the sessions waiting for new slots
+	snapshots.listeners.append(BookingSession.subscriptions.match)
+
+	if args.journal:
+		start = datetime.datetime.now()
+		replayed = replayJournal(args.journal, BookingSession.reservations, web_page_data)
+		print("Replayed %d bookings from %s in %.2f ms" % (replayed, args.journal, (datetime.datetime.now() - start).total_seconds() * 1000))
+
+	if args.bulk:
+		from bulk_booking import readBookingRequests, bookRequests, writeBookingResults
+		start = datetime.datetime.now()
+		results = bookRequests(readBookingRequests(args.bulk), web_page_data, BookingSession.reservations, BookingSession.journal)
+		root, extension = os.path.splitext(args.bulk)
+		results_path = args.bulk_results or root + '.results' + extension
+		writeBookingResults(results_path, results)
+		statuses = {}
+		for result in results:
+			statuses[result['status']] = statuses.get(result['status'], 0) + 1
+		print("Processed %d booking requests in %.2f ms: %r, results written to %s"
+			% (len(results), (datetime.datetime.now() - start).total_seconds() * 1000, statuses, results_path))
+		if BookingSession.journal is not None:
+			BookingSession.journal.close()
+		exit()
+
+	refresher = None
+	if args.refresh_interval > 0:
+		refresher = AvailabilityRefresher(snapshots, loadData, args.refresh_interval, refresh_on_start=from_snapshot)
+		if args.snapshot:
+			refresher.listeners.append(lambda previous, table: save_snapshot(table, args.snapshot))
+		# In prefork mode the master refreshes between supervising its workers, as it must not fork with threads running
+		if args.mode != 'prefork':
+			refresher.start()
+
+	# Counts kept by the objects shared by the sessions, only read when the metrics are rendered
+	metrics.gauge('data_version', "Version of the availability data served", lambda: snapshots.version)
+	metrics.counter('bookings_total', "Slots booked since the server started", lambda: BookingSession.reservations.reserved)
+	metrics.counter('bookings_refused_total', "Bookings refused because no slot was left", lambda: BookingSession.reservations.rejected)
+	metrics.gauge('subscriptions_waiting', "Sessions waiting for new slots", lambda: len(BookingSession.subscriptions))
+	metrics.counter('subscriptions_notified_total', "Sessions notified of new slots", lambda: BookingSession.subscriptions.notified)
+	metrics.counter('menu_cache_hits_total', "Menus served from the menu cache", lambda: BookingSession.menus.hits)
+	metrics.counter('menu_cache_misses_total', "Menus rendered on a miss of the menu cache", lambda: BookingSession.menus.misses)
+	if BookingSession.journal is not None:
+		metrics.counter('journal_commits_total', "Group commits of the booking journal", lambda: BookingSession.journal.commits)
+	if refresher is not None and args.mode != 'prefork':
+		metrics.counter('refreshes_total', "Refreshes of the availability data attempted", lambda: refresher.refresh_count)
+	if args.metrics_file and args.mode != 'prefork':
+		dumper = MetricsDumper(metrics, args.metrics_file, args.metrics_interval)
+		dumper.start()
+		atexit.register(dumper.stop)
+
+	if args.http_port:
+		from query_server import AvailabilityQueries, QueryServer
+		query_server = QueryServer(AvailabilityQueries(snapshots, BookingSession.reservations), HOST, args.http_port, metrics=metrics).start()
+		print("Serving JSON queries at: ", query_server.url())
+
+	# Every round trip with a Client is limited in time, and over --max-sessions new Clients are told to retry later
+	limits = {'idle_timeout': args.idle_timeout or None, 'max_sessions': args.max_sessions,
+		'busy': encodeFrame(GOODBYE_FRAME, BUSY_MESSAGE % args.retry_after), 'reaped': REAPED, 'metrics': metrics}
+	if args.mode == 'prefork':
+		from prefork_server import PreforkServer
+		if refresher is not None and not args.snapshot:
+			print("No --snapshot to hand refreshed data to the workers, they keep serving the data loaded at start")
+			refresher = None
+		print("Serving Clients at: ", (HOST, args.port), "with", args.workers, "workers")
+		PreforkServer(snapshots, BookingSession, HOST, args.port, args.workers, goodbye=GOODBYE,
+			refresher=refresher, snapshot_path=args.snapshot, metrics_file=args.metrics_file, metrics_interval=args.metrics_interval,
+			**limits).run()
+	elif args.mode == 'async':
+		from async_server import AsyncBookingServer
+		print("Serving Clients at: ", (HOST, args.port))
+		AsyncBookingServer(snapshots, BookingSession, HOST, args.port, goodbye=GOODBYE, **limits).run()
+	else:
+		client_conn, client_addr = openConnection(HOST, args.port)
+		startCommunication(client_conn, client_addr, snapshots, idle_timeout=args.idle_timeout or None)